@@ -9,10 +9,21 @@
 
 
 import pandas as pd
-import requests
 import zipfile
 import io
 import os
+import sys
+
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
+from commun.columnar import save_dataset, to_long
+from commun.http_cache import HttpCache
+from commun.watermarks import Watermarks, file_fingerprint
+from commun.wb_reader import read_wb_csv
+
+# Rapport d'exécution structuré (voir commun/metrics.py)
+metrics.start_run("C_3")
 
 # === Configuration des chemins ===
 DATA_RAW_DIR = "/content/data/raw"
@@ -26,25 +37,32 @@ os.makedirs(DATA_CLEANED_DIR, exist_ok=True)
 indicator_code = "SE.PRM.TCAQ.MA.ZS"  # % d'enseignants formés dans l'enseignement primaire
 url = f"https://api.worldbank.org/v2/en/indicator/SE.PRM.TCAQ.MA.ZS?downloadformat=csv"
 
-print(f"Téléchargement du fichier ZIP pour l'indicateur : {indicator_code}")
-response = requests.get(url)
-response.raise_for_status()  # Lève une exception en cas d'erreur HTTP
-
-# Sauvegarde locale du fichier ZIP
+metrics.log(f"Téléchargement du fichier ZIP pour l'indicateur : {indicator_code}")
+# Sauvegarde locale du fichier ZIP via le cache HTTP partagé : le fichier n'est
+# retéléchargé que si le serveur signale une nouvelle version (sinon réponse 304)
 zip_path = os.path.join(DATA_RAW_DIR, f"wb_teachers_trained_benin.zip")
-with open(zip_path, "wb") as f:
-    f.write(response.content)
+HttpCache().materialize(url, zip_path)  # Lève une exception en cas d'erreur HTTP
 
-print(f"Fichier ZIP téléchargé : {zip_path}")
+metrics.log(f"Fichier ZIP téléchargé : {zip_path}")
+
+# === Rafraîchissement incrémental ===
+# Si ni le ZIP source ni ce script n'ont changé depuis la dernière exécution et
+# que le fichier nettoyé existe, il n'y a rien à recalculer
+output_path = os.path.join(DATA_CLEANED_DIR, "wb_teachers_trained_primary_benin.csv")
+watermarks = Watermarks(os.path.join(DATA_CLEANED_DIR, "watermarks.json"))
+fingerprint = file_fingerprint(zip_path, os.path.abspath(__file__))
+if os.path.exists(output_path) and watermarks.is_current(os.path.basename(output_path), fingerprint):
+    metrics.log(f"Source inchangée : '{output_path}' est déjà à jour.")
+    sys.exit(0)
 
-# === ÉTAPE 2 : Extraction des fichiers contenus dans le ZIP ===
-print("Extraction des fichiers du ZIP...")
+# === ÉTAPE 2 : Identification du fichier de données contenu dans le ZIP ===
+metrics.log("Inspection des fichiers du ZIP...")
 
 with zipfile.ZipFile(zip_path, "r") as z:
     file_list = z.namelist()
-    print("Fichiers contenus dans le ZIP :")
+    metrics.log("Fichiers contenus dans le ZIP :")
     for filename in file_list:
-        print(f"  - {filename}")
+        metrics.log(f"  - {filename}")
 
     # Recherche du fichier de données principal (non métadonnées)
     data_file = None
@@ -59,19 +77,15 @@ with zipfile.ZipFile(zip_path, "r") as z:
             "Vérifiez le code indicateurs ou le fichier téléchargé."
         )
 
-    print(f"Fichier de données identifié : {data_file}")
+    metrics.log(f"Fichier de données identifié : {data_file}")
 
-    # Extraction du fichier CSV dans le dossier raw
-    z.extract(data_file, DATA_RAW_DIR)
+# === ÉTAPE 3 : Lecture en flux du CSV directement depuis le ZIP ===
+# Le CSV n'est pas extrait sur disque : seules les lignes du Bénin sont conservées,
+# les lignes de métadonnées précédant l'en-tête étant ignorées par le lecteur
+metrics.log(f"Lecture du fichier CSV depuis le ZIP : {data_file}")
+df = read_wb_csv(zip_path, data_file, countries=["Benin"])
 
-# === ÉTAPE 3 : Chargement du fichier CSV avec saut des lignes d'en-tête ===
-csv_path = os.path.join(DATA_RAW_DIR, data_file)
-print(f"Chargement du fichier CSV : {csv_path}")
-
-# Les 4 premières lignes sont des métadonnées ; elles doivent être ignorées
-df = pd.read_csv(csv_path, skiprows=4)
-
-print(f"Dimensions du jeu de données : {df.shape[0]} pays × {df.shape[1]} colonnes")
+metrics.log(f"Lignes conservées après filtrage sur le Bénin : {df.shape[0]} ({df.shape[1]} colonnes)")
 
 # === ÉTAPE 4 : Filtrage des données pour le Bénin ===
 benin_data = df[df["Country Name"] == "Benin"].copy()
@@ -79,7 +93,7 @@ benin_data = df[df["Country Name"] == "Benin"].copy()
 if benin_data.empty:
     raise ValueError("Aucune donnée trouvée pour le Bénin. Vérifiez le code pays ou le fichier source.")
 
-print(f"Données du Bénin extraites : {len(benin_data)} ligne(s)")
+metrics.log(f"Données du Bénin extraites : {len(benin_data)} ligne(s)")
 
 # === ÉTAPE 5 : Sélection des années et préparation des colonnes ===
 # Définir la plage d'années couverte (1970 à 2023 — période cohérente avec les autres indicateurs)
@@ -102,7 +116,7 @@ df_benin_long = df_benin_clean.melt(
     value_name="Pourcentage_Enseignants_Formes_Primaire"
 )
 
-print(f"Format transformé : {len(df_benin_long)} lignes après pivotage")
+metrics.log(f"Format transformé : {len(df_benin_long)} lignes après pivotage")
 
 # === ÉTAPE 7 : Nettoyage des données ===
 # Conversion de la colonne Année en entier
@@ -122,18 +136,29 @@ df_benin_final = df_benin_long[[
 # Vérification finale des types
 df_benin_final["Année"] = df_benin_final["Année"].astype(int)
 
-print(f"Données nettoyées : {len(df_benin_final)} observations valides")
-print(f"Période couverte : {df_benin_final['Année'].min()} à {df_benin_final['Année'].max()}")
+metrics.log(f"Données nettoyées : {len(df_benin_final)} observations valides")
+metrics.log(f"Période couverte : {df_benin_final['Année'].min()} à {df_benin_final['Année'].max()}")
 
 # === ÉTAPE 8 : Sauvegarde du jeu de données final ===
-output_path = os.path.join(DATA_CLEANED_DIR, "wb_teachers_trained_primary_benin.csv")
-df_benin_final.to_csv(output_path, index=False, encoding="utf-8")
+# Export CSV et/ou magasin Parquet partitionné par source et indicateur (voir commun/columnar.py)
+df_benin_parquet = to_long(
+    df_benin_final.rename(columns={"Country Code": "country_code"}),
+    id_columns=["country_code"],
+    value_columns={"Pourcentage_Enseignants_Formes_Primaire": indicator_code},
+    year_column="Année"
+)
+save_dataset(df_benin_final, output_path, "world_bank", df_benin_parquet, ["country_code"],
+             index=False, encoding="utf-8")
+
+metrics.log(f"Fichier final sauvegardé : {output_path}")
 
-print(f"Fichier final sauvegardé : {output_path}")
+# Enregistrement du filigrane pour le prochain rafraîchissement incrémental
+watermarks.update(os.path.basename(output_path), fingerprint, df_benin_final["Année"].max())
+watermarks.save()
 
 # === ÉTAPE 9 : Aperçu des premières et dernières lignes ===
-print("\nAperçu des 10 premières lignes :")
+metrics.log("\nAperçu des 10 premières lignes :")
 print(df_benin_final.head(10).to_string(index=False))
 
-print("\nAperçu des 10 dernières lignes :")
+metrics.log("\nAperçu des 10 dernières lignes :")
 print(df_benin_final.tail(10).to_string(index=False))
\ No newline at end of file
@@ -11,15 +11,37 @@
 import pandas as pd
 import requests
 import zipfile
-import io
 import os
 import sys
-from functools import reduce
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
+from commun.columnar import save_dataset, to_long
+from commun.consolidation import consolidate, consolidate_panel
+from commun.http_cache import HttpCache, create_session
+from commun.pays import resolve_countries
+from commun.wb_api import fetch_api_panel
+from commun.watermarks import Watermarks, file_fingerprint, frame_fingerprint, upsert
+from commun.wb_reader import find_data_member, read_wb_csv, to_long_panel
 
 # --- CONFIGURATION ---
 DATA_RAW_DIR = "data/raw"
 DATA_CLEANED_DIR = "data/cleaned"
-COUNTRY_NAME = "Benin"
+COUNTRY_CODE = "BEN"
+# Années conservées lors de la lecture des fichiers
+YEARS = [str(year) for year in range(1960, 2025)]
+
+# Source des données : "zip" (fichier global ?downloadformat=csv) ou "api" (API JSON filtrée)
+SOURCE = "zip"
+
+# Nombre maximal de téléchargements simultanés (1 = traitement séquentiel)
+MAX_WORKERS = 8
+
+# Valeur renvoyée en mode incrémental pour un indicateur dont la source n'a pas changé
+UNCHANGED = "inchangé"
 
 # Dictionnaire central des indicateurs à télécharger
 # Clé = Code de l'indicateur, Valeur = Nom de la colonne dans le fichier final
@@ -32,88 +54,221 @@ INDICATORS = {
     "SE.PRM.PRSL.MA.ZS": "tx_persistance_primaire_masculin"
 }
 
-def process_indicator(indicator_code, value_name):
+def _read_zip_panel(indicator_code, value_name, countries, cache, known_fingerprint=None):
     """
-    Télécharge, nettoie et formate les données pour un indicateur de la Banque Mondiale.
+    Mode « zip » : télécharge le fichier global de l'indicateur (via le cache
+    HTTP partagé) et le lit en flux en ne conservant que les pays demandés.
+    Renvoie (panel, empreinte du ZIP) ; la lecture est évitée si l'empreinte
+    est égale à `known_fingerprint`.
     """
-    print(f"\nTraitement de l'indicateur : {indicator_code}...")
-    
     # Étape 1: Téléchargement
     url = f"https://api.worldbank.org/v2/en/indicator/{indicator_code}?downloadformat=csv"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        zip_path = cache.fetch(url)
     except requests.exceptions.RequestException as e:
-        print(f"ERREUR: Téléchargement échoué pour {indicator_code}. Détails: {e}")
-        return None
+        metrics.log(f"ERREUR: Téléchargement échoué pour {indicator_code}. Détails: {e}")
+        return None, None
+
+    fingerprint = file_fingerprint(zip_path)
+    if fingerprint == known_fingerprint:
+        return UNCHANGED, fingerprint
 
-    # Étape 2: Extraction
+    # Étape 2: Lecture en flux du CSV dans le ZIP (seules les lignes des pays demandés sont conservées)
     try:
-        with zipfile.ZipFile(io.BytesIO(response.content), "r") as z:
-            data_file = next(f for f in z.namelist() if f.startswith(f"API_{indicator_code}") and "Metadata" not in f)
-            with z.open(data_file) as csvfile:
-                df = pd.read_csv(csvfile, skiprows=4)
-    except (zipfile.BadZipFile, StopIteration, FileNotFoundError) as e:
-        print(f"ERREUR: Impossible d'extraire le CSV pour {indicator_code}. Détails: {e}")
-        return None
+        data_file = find_data_member(zip_path, indicator_code)
+        df_wide = read_wb_csv(zip_path, data_file, countries=countries, years=YEARS)
+    except (zipfile.BadZipFile, ValueError, FileNotFoundError) as e:
+        metrics.log(f"ERREUR: Impossible d'extraire le CSV pour {indicator_code}. Détails: {e}")
+        return None, None
+
+    # Étape 3: Passage au format long (vectorisé pour tous les pays) et suppression des valeurs manquantes
+    return to_long_panel(df_wide, value_name), fingerprint
+
+def _read_api_panel(indicator_code, value_name, countries, cache, known_fingerprint=None):
+    """
+    Mode « api » : interroge l'API JSON filtrée côté serveur sur les pays et
+    la plage d'années, de sorte que seules les lignes utiles sont transférées.
+    Renvoie (panel, empreinte des données reçues).
+    """
+    try:
+        df_long = fetch_api_panel([indicator_code], countries,
+                                  date_range=(YEARS[0], YEARS[-1]), session=cache.session)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        metrics.log(f"ERREUR: Requête API échouée pour {indicator_code}. Détails: {e}")
+        return None, None
+    fingerprint = frame_fingerprint(df_long)
+    if fingerprint == known_fingerprint:
+        return UNCHANGED, fingerprint
+    df_long["indicator"] = value_name
+    return df_long, fingerprint
+
+def load_indicator_panel(indicator_code, value_name, countries, cache=None, source=SOURCE, watermarks=None):
+    """
+    Télécharge un indicateur de la Banque Mondiale et renvoie son panel long
+    (country_code, annee, indicator, valeur) pour les pays demandés (codes
+    ISO3). Les deux sources (`zip` ou `api`) produisent le même résultat.
+    Si `watermarks` est fourni (mode incrémental), renvoie UNCHANGED lorsque
+    la source n'a pas changé depuis le dernier traitement, et met à jour le
+    filigrane de l'indicateur sinon.
+    """
+    metrics.log(f"\nTraitement de l'indicateur : {indicator_code}...")
+    if cache is None:
+        cache = HttpCache()
 
-    # Étape 3: Filtrage et Transformation
-    if "Country Name" not in df.columns or df[df["Country Name"] == COUNTRY_NAME].empty:
-        print(f"AVERTISSEMENT: Aucune donnée trouvée pour {COUNTRY_NAME} dans l'indicateur {indicator_code}.")
+    read_panel = _read_api_panel if source == "api" else _read_zip_panel
+    known_fingerprint = watermarks.fingerprint(indicator_code) if watermarks is not None else None
+    df_long, fingerprint = read_panel(indicator_code, value_name, countries, cache, known_fingerprint)
+    if df_long is None:
+        return None
+    if df_long is UNCHANGED:
+        metrics.log(f"Source inchangée pour {indicator_code} : indicateur ignoré.")
+        return UNCHANGED
+    if df_long.empty:
+        metrics.log(f"AVERTISSEMENT: Aucune donnée trouvée pour {', '.join(countries)} dans l'indicateur {indicator_code}.")
         return None
 
-    benin_data = df[df["Country Name"] == COUNTRY_NAME].copy()
-    
-    years = [str(year) for year in range(1960, 2025)]
-    id_vars = ["Country Name", "Country Code"]
-    cols_to_keep = id_vars + [y for y in years if y in benin_data.columns]
-    
-    df_benin_long = benin_data[cols_to_keep].melt(
-        id_vars=id_vars,
-        var_name="annee",
-        value_name=value_name
-    )
-
-    # Étape 4: Nettoyage
-    df_benin_long["annee"] = pd.to_numeric(df_benin_long["annee"], errors="coerce")
-    df_benin_long.dropna(subset=[value_name], inplace=True)
-    df_benin_long["annee"] = df_benin_long["annee"].astype(int)
-    
-    df_final = df_benin_long[["annee", value_name]]
-    print(f"Traitement réussi. {len(df_final)} observations valides trouvées.")
-    return df_final
+    metrics.log(f"Traitement réussi. {len(df_long)} observations valides trouvées.")
+    if watermarks is not None:
+        watermarks.update(indicator_code, fingerprint, df_long["annee"].max())
+    return df_long
 
-# --- SCRIPT PRINCIPAL ---
-if __name__ == "__main__":
-    print("Script 7: Démarrage de la collecte des données sur l'éducation de la Banque Mondiale.")
+def process_indicator(indicator_code, value_name, cache=None, source=SOURCE, watermarks=None):
+    """
+    Télécharge, nettoie et formate les données pour un indicateur de la Banque Mondiale.
+    """
+    df_long = load_indicator_panel(indicator_code, value_name, [COUNTRY_CODE], cache, source, watermarks)
+    if df_long is None or df_long is UNCHANGED:
+        return df_long
+    return df_long[["annee", "valeur"]].rename(columns={"valeur": value_name})
+
+def collect_indicators(indicators, max_workers=MAX_WORKERS, countries=None, source=SOURCE, watermarks=None):
+    """
+    Télécharge et traite les indicateurs en parallèle sur une session partagée.
+    Les résultats sont renvoyés dans l'ordre de `indicators`, quel que soit
+    l'ordre de fin des téléchargements, afin que la consolidation reste déterministe.
+    Si `countries` est fourni, chaque résultat est le panel long de ces pays.
+    En mode incrémental (`watermarks`), les indicateurs inchangés valent UNCHANGED.
+    """
+    max_workers = max(1, min(max_workers, len(indicators)))
+    with create_session(max_workers) as session:
+        cache = HttpCache(session=session)
+
+        def worker(item):
+            # Une étape du rapport d'exécution par indicateur
+            with metrics.stage(item[0]):
+                if countries is None:
+                    return process_indicator(item[0], item[1], cache, source, watermarks)
+                return load_indicator_panel(item[0], item[1], countries, cache, source)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(worker, indicators.items())
+            return [df for df in results if df is not None]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collecte des indicateurs d'éducation de la Banque Mondiale.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Nombre de téléchargements simultanés (défaut : {MAX_WORKERS}, 1 = séquentiel)")
+    parser.add_argument("--pays", nargs="+", metavar="CODE",
+                        help="Mode batch : codes ISO3 et/ou groupes (cedeao, afrique_subsaharienne). "
+                             "Produit un panel long multi-pays au lieu du fichier consolidé du Bénin.")
+    parser.add_argument("--source", choices=["zip", "api"], default=SOURCE,
+                        help="zip : fichier global de l'indicateur ; api : API JSON filtrée par pays et années "
+                             f"(défaut : {SOURCE})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ne retraiter que les indicateurs dont la source a changé et n'insérer que les "
+                             "années nouvelles ou révisées dans le fichier consolidé existant.")
+    args = parser.parse_args(argv)
+
+    metrics.start_run("C_7")
+    metrics.log("Script 7: Démarrage de la collecte des données sur l'éducation de la Banque Mondiale.")
     
     os.makedirs(DATA_RAW_DIR, exist_ok=True)
     os.makedirs(DATA_CLEANED_DIR, exist_ok=True)
     
-    all_dfs = []
-    
-    for code, name in INDICATORS.items():
-        processed_df = process_indicator(code, name)
-        if processed_df is not None:
-            all_dfs.append(processed_df)
+    # --- Mode batch multi-pays ---
+    if args.pays:
+        countries = resolve_countries(args.pays)
+        metrics.log(f"Mode batch : {len(countries)} pays demandés.")
+        panels = collect_indicators(INDICATORS, max_workers=args.workers, countries=countries,
+                                    source=args.source)
+        if not panels:
+            metrics.log("ERREUR: Aucune donnée n'a pu être collectée. Le script s'arrête.")
+            sys.exit(1)
+
+        # Tri stable : les indicateurs restent dans l'ordre d'INDICATORS pour un même pays et une même année
+        df_panel = pd.concat(panels, ignore_index=True)
+        df_panel.sort_values(["country_code", "annee"], kind="stable", inplace=True)
+
+        output_path = os.path.join(DATA_CLEANED_DIR, "education_indicators_panel.csv")
+        # Dans le magasin Parquet, les indicateurs sont identifiés par leur code Banque Mondiale
+        name_to_code = {name: code for code, name in INDICATORS.items()}
+        save_dataset(df_panel, output_path, "world_bank",
+                     df_panel.assign(indicator=df_panel["indicator"].map(name_to_code)), ["country_code"],
+                     index=False, encoding="utf-8-sig")
+
+        # Version large : une ligne par (pays, année), une colonne par indicateur
+        df_panel_wide = consolidate_panel(panels)
+        wide_path = os.path.join(DATA_CLEANED_DIR, "education_indicators_panel_consolidated.csv")
+        df_panel_wide.to_csv(wide_path, index=False, encoding="utf-8-sig")
+
+        metrics.log(f"\nScript terminé. Panel de {len(df_panel)} observations sauvegardé dans : '{output_path}'")
+        metrics.log(f"Version consolidée ({len(df_panel_wide)} lignes pays × année) sauvegardée dans : '{wide_path}'")
+        return
+
+    output_path = os.path.join(DATA_CLEANED_DIR, "education_indicators_benin_consolidated.csv")
+
+    # --- Mode incrémental: filigranes par indicateur ---
+    # Les filigranes ne sont utilisés que si le fichier consolidé existe déjà ;
+    # sinon tous les indicateurs sont retraités
+    watermarks = None
+    incremental = args.incremental and os.path.exists(output_path)
+    if args.incremental:
+        watermarks = Watermarks(os.path.join(DATA_CLEANED_DIR, "education_indicators_benin_consolidated.watermarks.json"))
+        if not incremental:
+            metrics.log("Aucun fichier consolidé existant : reconstruction complète.")
+            watermarks.clear()
+
+    all_dfs = collect_indicators(INDICATORS, max_workers=args.workers, source=args.source, watermarks=watermarks)
             
     if not all_dfs:
-        print("ERREUR: Aucune donnée n'a pu être collectée. Le script s'arrête.")
+        metrics.log("ERREUR: Aucune donnée n'a pu être collectée. Le script s'arrête.")
         sys.exit(1)
 
     # --- Étape finale: Consolidation ---
-    print("\nConsolidation de tous les indicateurs d'éducation...")
+    metrics.log("\nConsolidation de tous les indicateurs d'éducation...")
     
-    # Fusionner tous les DataFrames sur la colonne 'annee'
-    df_consolidated = reduce(lambda left, right: pd.merge(left, right, on='annee', how='outer'), all_dfs)
+    with metrics.stage("consolidation"):
+        if incremental:
+            changed_dfs = [df for df in all_dfs if df is not UNCHANGED]
+            if not changed_dfs:
+                metrics.log("\nScript terminé. Aucune source modifiée : le fichier consolidé est déjà à jour.")
+                return
+            # Insérer uniquement les années nouvelles ou révisées des indicateurs modifiés
+            df_existing = pd.read_csv(output_path, encoding="utf-8-sig")
+            df_consolidated, n_changed = upsert(df_existing, consolidate(changed_dfs, on='annee'), on='annee')
+            metrics.log(f"{len(changed_dfs)} indicateur(s) modifié(s), {n_changed} valeur(s) nouvelle(s), révisée(s) ou retirée(s).")
+        else:
+            # Aligner tous les DataFrames sur la colonne 'annee' en une seule passe (triée par année)
+            df_consolidated = consolidate(all_dfs, on='annee')
     
-    # Trier par année
-    df_consolidated.sort_values('annee', inplace=True)
+    with metrics.stage("sauvegarde"):
+        # Export CSV et/ou magasin Parquet partitionné par source et indicateur (voir commun/columnar.py)
+        df_parquet = to_long(
+            df_consolidated.assign(country_code=COUNTRY_CODE),
+            id_columns=["country_code"],
+            value_columns={name: code for code, name in INDICATORS.items() if name in df_consolidated.columns}
+        )
+        save_dataset(df_consolidated, output_path, "world_bank", df_parquet, ["country_code"],
+                     index=False, encoding="utf-8-sig")
+        if watermarks is not None:
+            watermarks.save()
     
-    output_path = os.path.join(DATA_CLEANED_DIR, "education_indicators_benin_consolidated.csv")
-    df_consolidated.to_csv(output_path, index=False, encoding="utf-8-sig")
-    
-    print("\nScript terminé.")
-    print(f"Le dataset consolidé sur l'éducation a été sauvegardé dans : '{output_path}'")
-    print("\nAperçu du dataset final :")
-    print(df_consolidated.tail(15))
\ No newline at end of file
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Le dataset consolidé sur l'éducation a été sauvegardé dans : '{output_path}'")
+    metrics.log("\nAperçu du dataset final :")
+    print(df_consolidated.tail(15))
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    main()
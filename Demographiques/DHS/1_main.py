@@ -1,43 +1,93 @@
 # ==============================================================================
 # SCRIPT D'EXPLORATION : DÉCOUVERTE DES INDICATEURS DHS POUR LE BÉNIN
-# Objectif : Utiliser une route API générale pour lister tous les indicateurs
-#            disponibles pour le Bénin afin d'identifier de nouvelles
-#            variables pertinentes pour l'analyse.
+# Objectif : Lister et rechercher les indicateurs disponibles pour le Bénin
+#            afin d'identifier de nouvelles variables pertinentes pour
+#            l'analyse. Le catalogue local (commun/dhs_catalog.py) est mis à
+#            jour à partir des métadonnées de l'API (/indicators, /surveys),
+#            sans télécharger de données ; la recherche se fait hors ligne.
+# Utilisation : python 1_main.py [--recherche "electricity"] [--pays BJ TG]
+#               [--hors-ligne] [--forcer]
 # ==============================================================================
 
+import argparse
+import os
+import sys
+
 import requests
-import pandas as pd
-
-# URL directe pour toutes les données du Bénin
-url = "https://api.dhsprogram.com/rest/dhs/data/BJ?perPage=5000"
-print("Interrogation de l'API pour l'ensemble des données du Bénin...")
-
-try:
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
-
-    if 'Data' in data and data['Data']:
-        print(f"Réponse reçue. {len(data['Data'])} points de données trouvés au total.")
-        
-        # Convertir en DataFrame pour une exploration facile
-        df_full = pd.DataFrame(data['Data'])
-        
+
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import dhs_catalog, metrics
+
+# --- CONFIGURATION ---
+COUNTRY_CODES = ["BJ"]
+# Liste complète des indicateurs disponibles pour le premier pays
+OUTPUT_CSV_PATH = 'dhs_liste_indicateurs_benin.csv'
+SEARCH_LIMIT = 15
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Catalogue local des indicateurs DHS.")
+    parser.add_argument("--recherche", default="", help="Mots à rechercher dans les libellés et définitions")
+    parser.add_argument("--pays", nargs="+", default=COUNTRY_CODES, help="Codes pays DHS (ex. BJ TG)")
+    parser.add_argument("--hors-ligne", action="store_true", help="Interroger le catalogue sans le mettre à jour")
+    parser.add_argument("--forcer", action="store_true", help="Reconstruire entièrement le catalogue")
+    parser.add_argument("--limite", type=int, default=SEARCH_LIMIT, help="Nombre de résultats affichés")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Rapport d'exécution structuré (voir commun/metrics.py)
+    metrics.start_run("dhs_catalogue")
+    conn = dhs_catalog.open_catalog()
+
+    if not args.hors_ligne:
+        metrics.log(f"Mise à jour du catalogue des indicateurs DHS ({', '.join(args.pays)})...")
+        try:
+            with metrics.stage("mise_a_jour_catalogue"):
+                summary = dhs_catalog.update_catalog(conn, args.pays, force=args.forcer)
+                metrics.add("rows_out", summary["indicateurs_ajoutes"] + summary["indicateurs_modifies"])
+            metrics.log(f"{summary['enquetes']} enquêtes publiées ; indicateurs ajoutés : {summary['indicateurs_ajoutes']}, "
+                        f"modifiés : {summary['indicateurs_modifies']}, supprimés : {summary['indicateurs_supprimes']}.")
+            if summary["pays_actualises"]:
+                metrics.log(f"Disponibilité recalculée pour : {', '.join(summary['pays_actualises'])}")
+            else:
+                metrics.log("Aucune nouvelle enquête : disponibilités inchangées.")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            metrics.log(f"AVERTISSEMENT: Mise à jour du catalogue impossible, utilisation de la version locale. Détails : {e}")
+
+    country = args.pays[0]
+    if args.recherche:
+        metrics.log(f"\n--- Indicateurs correspondant à '{args.recherche}' ({country}) ---")
+        with metrics.stage("recherche"):
+            results = dhs_catalog.search(conn, args.recherche, country=country, limit=args.limite)
+            metrics.add("rows_out", len(results))
+        if results.empty:
+            metrics.log("Aucun indicateur trouvé.")
+        else:
+            print(results[["indicator_id", "label", "level1"]].to_string(index=False))
+    else:
         # --- Exploration des indicateurs disponibles ---
-        print("\n--- Analyse des indicateurs uniques disponibles ---")
-        
-        # Grouper par ID d'indicateur et nom pour voir tout ce qui est disponible
-        unique_indicators = df_full[['IndicatorId', 'Indicator']].drop_duplicates().sort_values('Indicator')
-        
-        print(f"{len(unique_indicators)} indicateurs uniques ont été trouvés pour le Bénin.")
-        
-        print("\nExtrait de la liste des indicateurs disponibles :")
-        # 'display' est utilisé pour un meilleur affichage dans les notebooks
-        display(unique_indicators.head(15))
-        
-        # Sauvegarder la liste complète pour référence future
-        unique_indicators.to_csv('dhs_liste_indicateurs_benin.csv', index=False)
-        print("\nLa liste complète de tous les indicateurs a été sauvegardée dans 'dhs_liste_indicateurs_benin.csv'")
-
-except requests.exceptions.RequestException as e:
-    print(f"ERREUR: La requête a échoué. Détails : {e}")
\ No newline at end of file
+        with metrics.stage("liste_indicateurs"):
+            unique_indicators = dhs_catalog.search(conn, country=country, limit=None)
+            metrics.add("rows_out", len(unique_indicators))
+        metrics.log(f"\n{len(unique_indicators)} indicateurs uniques sont disponibles pour {country}.")
+        if not unique_indicators.empty:
+            metrics.log("\nExtrait de la liste des indicateurs disponibles :")
+            print(unique_indicators[["indicator_id", "label"]].head(args.limite).to_string(index=False))
+
+            # Sauvegarder la liste complète pour référence future (même format qu'auparavant)
+            with metrics.stage("sauvegarde"):
+                unique_indicators.rename(columns={"indicator_id": "IndicatorId", "label": "Indicator"})[
+                    ["IndicatorId", "Indicator"]
+                ].to_csv(OUTPUT_CSV_PATH, index=False)
+                metrics.add("rows_written_csv", len(unique_indicators))
+            metrics.log(f"\nLa liste complète de tous les indicateurs a été sauvegardée dans '{OUTPUT_CSV_PATH}'")
+
+    conn.close()
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,20 @@
 # Date : 21/09/25
 # ==============================================================================
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import pandas as pd
+import os
 import sys
 
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
+from commun.columnar import save_dataset, to_long, write_entity_partitions
+from commun.departements import to_departement
+from commun.dhs_api import RateLimiter, fetch_dhs_data
+
 # --- CONFIGURATION ---
 INDICATOR_IDS = {
     "HC_ELEC_H_ELC": "pct_menages_electricite",
@@ -22,62 +32,212 @@ INDICATOR_IDS = {
     "WS_SRCE_H_IMP": "pct_acces_eau_potable"
 }
 COUNTRY_CODE = 'BJ'
+# Seules les colonnes exploitées par ce script sont demandées à l'API
+RETURN_FIELDS = ["IndicatorId", "SurveyYear", "Value", "IsPreferred"]
 OUTPUT_CSV_PATH = 'dhs_indicators_benin_api.csv'
+# Mode infranational (--sous-national) : valeurs par département, à joindre à
+# geographique/population_par_departement_benin.csv sur la colonne `departement`
+SUBNATIONAL_RETURN_FIELDS = ["IndicatorId", "SurveyYear", "Value", "IsPreferred",
+                             "CharacteristicCategory", "CharacteristicLabel"]
+SUBNATIONAL_CATEGORY = "Region"
+# Les enquêtes antérieures (1996, 2001) sont publiées selon les 6 anciens départements,
+# dont les noms recouvrent des territoires différents des 12 départements actuels
+SUBNATIONAL_MIN_YEAR = 2006
+OUTPUT_SUBNATIONAL_CSV_PATH = 'dhs_indicators_benin_departements.csv'
+# Mode panel (--pays, --afrique-ouest) : mêmes indicateurs pour plusieurs pays, écrits dans
+# le magasin Parquet avec un fichier par pays et par indicateur (pas de CSV fusionné) :
+#   source=dhs_pays/indicator=<indicateur>/country_code=<pays>/data.parquet
+# Lecture de quelques pays seulement :
+#   read_parquet("dhs_pays", filters=[("country_code", "in", ["BJ", "TG"])])
+WEST_AFRICA_COUNTRY_CODES = ["BJ", "BF", "CV", "CI", "GM", "GH", "GN", "LB", "ML", "MR", "NI", "NG", "SN", "SL", "TG"]
+PANEL_SOURCE = "dhs_pays"
+MAX_COUNTRY_WORKERS = 4
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Indicateurs DHS du Bénin via l'API du DHS Program.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sous-national", action="store_true",
+                      help="Valeurs par département (breakdown=subnational) au lieu des valeurs nationales")
+    mode.add_argument("--pays", nargs="+", metavar="CODE",
+                      help="Panel multi-pays (codes DHS, ex. BJ TG) écrit dans le magasin partitionné par pays")
+    mode.add_argument("--afrique-ouest", action="store_true",
+                      help="Panel de tous les pays DHS d'Afrique de l'Ouest (WEST_AFRICA_COUNTRY_CODES)")
+    args = parser.parse_args(argv)
+    if args.afrique_ouest:
+        args.pays = WEST_AFRICA_COUNTRY_CODES
+    return args
 
-# print("Script 6: Démarrage de la collecte des indicateurs via l'API du DHS Program.")
-
-# --- Étape 1: Exécuter la requête API ---
-try:
-    base_url = "https://api.dhsprogram.com/rest/dhs/data"
-    params = {"countryIds": COUNTRY_CODE, "indicatorIds": ",".join(INDICATOR_IDS.keys()), "f": "json", "perPage": 1000}
-    
-    print("Envoi de la requête à l'API DHS...")
-    response = requests.get(base_url, params=params)
-    response.raise_for_status()
-    data = response.json()
-
-    # --- Étape 2: Valider et traiter la réponse ---
-    if 'Data' not in data or not data['Data']:
-        print("AVERTISSEMENT: L'API n'a retourné aucune donnée pour cette sélection.")
-        sys.exit(0)
 
-    print(f"{len(data['Data'])} points de données bruts reçus de l'API.")
-    df_api = pd.DataFrame(data['Data'])
-    
+def pivot_national(df_api):
+    """Valeurs nationales préférées, pivotées : une ligne par année, une colonne par indicateur."""
     # --- Étape 3: Filtrer et nettoyer les données ---
     df_filtered = df_api[df_api['IsPreferred'] == 1].copy()
-    print(f"{len(df_filtered)} points de données pertinents conservés après filtrage.")
-    
+    metrics.log(f"{len(df_filtered)} points de données pertinents conservés après filtrage.")
+
     # **On sélectionne 'IndicatorId' au lieu de 'Indicator'**
     df_cleaned = df_filtered[['IndicatorId', 'SurveyYear', 'Value']].copy()
-    
+
     # --- Étape 4: Pivoter les données pour obtenir le format final ---
     # **On pivote sur 'IndicatorId'**
     df_pivot = df_cleaned.pivot_table(
-        index='SurveyYear', 
-        columns='IndicatorId', 
+        index='SurveyYear',
+        columns='IndicatorId',
         values='Value'
     ).reset_index()
-    
+
     # Le renommage va maintenant fonctionner car les noms de colonnes sont les IDs
     df_pivot.rename(columns=INDICATOR_IDS, inplace=True)
     df_pivot.rename(columns={'SurveyYear': 'annee'}, inplace=True)
-    
+
     # On supprime le nom de l'index des colonnes pour un résultat plus propre
     df_pivot.rename_axis(None, axis=1, inplace=True)
-    
-    print("Données transformées avec succès.")
-
-except requests.exceptions.RequestException as e:
-    print(f"ERREUR: La requête à l'API a échoué. Détails: {e}")
-    sys.exit(1)
-except Exception as e:
-    print(f"ERREUR: Le traitement des données a échoué. Détails: {e}")
-    sys.exit(1)
-
-# --- Étape 5: Sauvegarder le dataset final ---
-df_pivot.to_csv(OUTPUT_CSV_PATH, index=False)
-
-print("\nScript terminé.")
-print(f"Le dataset des indicateurs DHS a été sauvegardé dans : '{OUTPUT_CSV_PATH}'")
-print(df_pivot) # Afficher tout le DataFrame car il est petit
\ No newline at end of file
+    return df_pivot
+
+
+def run_panel(country_codes):
+    """
+    Récupère les indicateurs de chaque pays en parallèle (débit de requêtes
+    partagé) et remplace, pour chacun, ses seules partitions du magasin.
+    """
+    session, limiter = requests.Session(), RateLimiter()
+
+    def collect_country(country):
+        """Renvoie (pays, nombre de fichiers écrits), ou (pays, None) en cas d'échec."""
+        with metrics.stage(f"pays_{country}"):
+            try:
+                df_api = fetch_dhs_data(country, INDICATOR_IDS, return_fields=RETURN_FIELDS,
+                                        session=session, limiter=limiter)
+                if df_api.empty:
+                    metrics.log(f"AVERTISSEMENT: {country} : l'API n'a retourné aucune donnée pour cette sélection.")
+                    return country, 0
+                df_pivot = pivot_national(df_api)
+                df_long = to_long(
+                    df_pivot.assign(country_code=country),
+                    id_columns=["country_code"],
+                    value_columns={name: code for code, name in INDICATOR_IDS.items() if name in df_pivot.columns}
+                )
+                paths = write_entity_partitions(df_long, PANEL_SOURCE, ["country_code"])
+            except (requests.exceptions.RequestException, ValueError, ImportError, OSError) as e:
+                metrics.log(f"ERREUR: {country} : la collecte a échoué. Détails: {e}")
+                return country, None
+            metrics.log(f"{country} : {len(df_pivot)} enquêtes, {len(paths)} partition(s) écrite(s).")
+            return country, len(paths)
+
+    metrics.log(f"Collecte du panel DHS pour {len(country_codes)} pays : {', '.join(country_codes)}")
+    with ThreadPoolExecutor(max_workers=MAX_COUNTRY_WORKERS) as executor:
+        results = list(executor.map(collect_country, country_codes))
+
+    failed = [country for country, written in results if written is None]
+    metrics.log(f"\nPanel DHS mis à jour pour {len(results) - len(failed)}/{len(results)} pays (source '{PANEL_SOURCE}').")
+    if failed:
+        metrics.log(f"ERREUR: Pays en échec (partitions inchangées) : {', '.join(failed)}")
+        sys.exit(1)
+
+
+def run_subnational():
+    """
+    Récupère en une fois toutes les lignes infranationales des indicateurs et
+    les pivote (département, année) x indicateur en une seule opération.
+    """
+    metrics.log("Envoi de la requête infranationale à l'API DHS...")
+    try:
+        with metrics.stage("extraction"):
+            df_api = fetch_dhs_data(COUNTRY_CODE, INDICATOR_IDS, params={"breakdown": "subnational"},
+                                    return_fields=SUBNATIONAL_RETURN_FIELDS)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        metrics.log(f"ERREUR: La requête à l'API a échoué. Détails: {e}")
+        sys.exit(1)
+    if df_api.empty:
+        metrics.log("AVERTISSEMENT: L'API n'a retourné aucune donnée pour cette sélection.")
+        sys.exit(0)
+    metrics.log(f"{len(df_api)} points de données bruts reçus de l'API.")
+
+    with metrics.stage("pivot"):
+        metrics.add("rows_in", len(df_api))
+        df = df_api[(df_api['CharacteristicCategory'] == SUBNATIONAL_CATEGORY)
+                    & (df_api['IsPreferred'] == 1)
+                    & (df_api['SurveyYear'] >= SUBNATIONAL_MIN_YEAR)]
+        # Libellés DHS -> départements via la table précalculée (valeurs distinctes uniquement)
+        departements = to_departement(df['CharacteristicLabel'])
+        # Libellés manquants (null dans la réponse de l'API) exclus : ils ne se comparent pas à du texte
+        unknown = sorted(df.loc[departements.isna().values, 'CharacteristicLabel'].dropna().astype(str).unique())
+        if unknown:
+            metrics.log(f"AVERTISSEMENT: Régions DHS non reconnues, ignorées : {', '.join(unknown)}")
+        df = df.assign(departement=departements.values)[departements.notna().values]
+
+        # Index à trois niveaux (département, année, indicateur) puis indicateurs en colonnes
+        df_pivot = df.pivot_table(index=['departement', 'SurveyYear'], columns='IndicatorId',
+                                  values='Value', aggfunc='mean', observed=True).reset_index()
+        df_pivot.rename(columns={**INDICATOR_IDS, 'SurveyYear': 'annee'}, inplace=True)
+        df_pivot.rename_axis(None, axis=1, inplace=True)
+        df_pivot['departement'] = df_pivot['departement'].astype(str)
+        df_pivot = df_pivot.sort_values(['departement', 'annee'], ignore_index=True)
+        metrics.add("rows_out", len(df_pivot))
+    metrics.log(f"{df_pivot['departement'].nunique()} départements x {df_pivot['annee'].nunique()} enquêtes.")
+
+    with metrics.stage("sauvegarde"):
+        df_parquet = to_long(
+            df_pivot,
+            id_columns=["departement"],
+            value_columns={name: code for code, name in INDICATOR_IDS.items() if name in df_pivot.columns}
+        )
+        save_dataset(df_pivot, OUTPUT_SUBNATIONAL_CSV_PATH, "dhs_departements", df_parquet, ["departement"],
+                     index=False, encoding='utf-8-sig')
+    metrics.log(f"Le dataset des indicateurs DHS par département a été sauvegardé dans : '{OUTPUT_SUBNATIONAL_CSV_PATH}'")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Rapport d'exécution structuré (voir commun/metrics.py)
+    metrics.start_run("dhs_departements" if args.sous_national else "dhs_panel" if args.pays else "dhs_indicateurs")
+    if args.sous_national:
+        run_subnational()
+        return
+    if args.pays:
+        run_panel(args.pays)
+        return
+
+    # print("Script 6: Démarrage de la collecte des indicateurs via l'API du DHS Program.")
+
+    # --- Étape 1: Exécuter la requête API ---
+    try:
+        # Toutes les pages sont récupérées (TotalPages), les indicateurs étant regroupés par lots
+        metrics.log("Envoi de la requête à l'API DHS...")
+        df_api = fetch_dhs_data(COUNTRY_CODE, INDICATOR_IDS, return_fields=RETURN_FIELDS)
+
+        # --- Étape 2: Valider et traiter la réponse ---
+        if df_api.empty:
+            metrics.log("AVERTISSEMENT: L'API n'a retourné aucune donnée pour cette sélection.")
+            sys.exit(0)
+
+        metrics.log(f"{len(df_api)} points de données bruts reçus de l'API.")
+
+        df_pivot = pivot_national(df_api)
+
+        metrics.log("Données transformées avec succès.")
+
+    except requests.exceptions.RequestException as e:
+        metrics.log(f"ERREUR: La requête à l'API a échoué. Détails: {e}")
+        sys.exit(1)
+    except Exception as e:
+        metrics.log(f"ERREUR: Le traitement des données a échoué. Détails: {e}")
+        sys.exit(1)
+
+    # --- Étape 5: Sauvegarder le dataset final ---
+    # Export CSV et/ou magasin Parquet partitionné par source et indicateur (voir commun/columnar.py)
+    df_parquet = to_long(
+        df_pivot.assign(country_code=COUNTRY_CODE),
+        id_columns=["country_code"],
+        value_columns={name: code for code, name in INDICATOR_IDS.items() if name in df_pivot.columns}
+    )
+    save_dataset(df_pivot, OUTPUT_CSV_PATH, "dhs", df_parquet, ["country_code"], index=False)
+
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Le dataset des indicateurs DHS a été sauvegardé dans : '{OUTPUT_CSV_PATH}'")
+    print(df_pivot) # Afficher tout le DataFrame car il est petit
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    main()
@@ -4,63 +4,142 @@
 # Objectif : Charger les données démographiques des Nations Unies (WPP 2024),
 #            gérer le formatage complexe du fichier Excel, et extraire
 #            uniquement les données brutes concernant le Bénin.
+#            La feuille est parcourue ligne par ligne : seules les lignes du
+#            Bénin et les colonnes utilisées par 2_clean_un_data.py sont
+#            gardées en mémoire, puis mises en cache au format Parquet pour
+#            les exécutions suivantes (voir commun/wpp_reader.py).
+#            Avec --projections, les feuilles de projection (variantes moyenne,
+#            haute et basse) sont lues en plus, en parallèle, chaque ligne
+#            étant étiquetée par sa variante.
+#            Avec --index-pays, toutes les feuilles sont découpées une fois en
+#            un magasin partitionné par pays (commun/wpp_reader.py), que
+#            2_clean_un_data.py --pays interroge sans relire le classeur.
+# Utilisation : python 1_load_un_data.py [--projections | --index-pays [--forcer]]
 # Source : Fichier WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL.xlsx de Kaggle
 # Auteur : SOULE Fadile
 # Date : 21/09/25
 # ==============================================================================
 
-import pandas as pd
+import argparse
 import os
 import sys
 
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
+from commun.wpp_reader import ESTIMATES_SHEET, WPP_STORE_DIR, build_location_store, load_sheet, load_variants
+
 # --- CONFIGURATION ---
 # Chemin vers le fichier Excel brut décompressé
 INPUT_EXCEL_PATH = 'kaggle_data_unzipped/WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL.xlsx'
 
 # Chemin où sauvegarder le fichier CSV intermédiaire
 OUTPUT_CSV_PATH = 'un_data_benin_raw.csv'
+# Estimations et projections, étiquetées par variante (mode --projections)
+OUTPUT_PROJECTIONS_CSV_PATH = 'un_data_benin_raw_projections.csv'
+
+# Feuilles de projection lues en plus des estimations (mode --projections)
+PROJECTION_SHEETS = ['Medium variant', 'High variant', 'Low variant']
 
 # Le numéro de ligne qui contient les en-têtes (identifié après inspection)
 HEADER_ROW_INDEX = 16
 
-print("Script 4: Démarrage du chargement et filtrage des données des Nations Unies.")
-
-# --- Étape 1: Vérifier que le fichier source existe ---
-if not os.path.exists(INPUT_EXCEL_PATH):
-    print(f"ERREUR: Le fichier d'entrée '{INPUT_EXCEL_PATH}' n'a pas été trouvé.")
-    sys.exit(1)
-
-# --- Étape 2: Charger les données en spécifiant la ligne d'en-tête ---
-try:
-    print(f"Chargement de la feuille 'Estimates' depuis '{INPUT_EXCEL_PATH}'...")
-    # On ne charge que la feuille 'Estimates' pour les données historiques
-    df_estimates = pd.read_excel(INPUT_EXCEL_PATH, sheet_name='Estimates', header=HEADER_ROW_INDEX)
-    print("Fichier Excel chargé avec succès.")
-
-except Exception as e:
-    print(f"ERREUR: Impossible de lire le fichier Excel. Détails : {e}")
-    sys.exit(1)
-
-# --- Étape 3: Filtrer les données pour ne conserver que le Bénin ---
-try:
-    # Nom exact de la colonne contenant les noms de pays
-    location_col = 'Region, subregion, country or area *'
-    
-    print(f"Filtrage des données pour 'Benin'...")
-    df_estimates_benin = df_estimates[df_estimates[location_col] == 'Benin'].copy()
-    
-    if df_estimates_benin.empty:
-        print("AVERTISSEMENT: Aucune donnée trouvée pour 'Benin'. Le script va s'arrêter.")
+# Nom exact de la colonne contenant les noms de pays
+LOCATION_COLUMN = 'Region, subregion, country or area *'
+
+# Colonnes utilisées par le script 5 (2_clean_un_data.py) : les autres ne sont pas lues
+COLUMNS_TO_KEEP = [
+    LOCATION_COLUMN,
+    'Year',
+    'Total Population, as of 1 July (thousands)',
+    'Population Density, as of 1 July (persons per square km)',
+    'Life Expectancy at Birth, both sexes (years)'
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extraction des données WPP 2024 du Bénin.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--projections", action="store_true",
+                      help="Lire aussi les variantes de projection (1950-2100)")
+    mode.add_argument("--index-pays", action="store_true",
+                      help="Construire le magasin partitionné par pays (toutes feuilles, tous pays)")
+    parser.add_argument("--forcer", action="store_true", help="Reconstruire le magasin même s'il est à jour")
+    return parser.parse_args(argv)
+
+
+def run_location_store(force):
+    """Découpe toutes les feuilles du classeur en un magasin partitionné par pays."""
+    sheets = [ESTIMATES_SHEET] + PROJECTION_SHEETS
+    metrics.log(f"Construction du magasin par pays à partir des feuilles {', '.join(sheets)}...")
+    try:
+        with metrics.stage("index_pays"):
+            index, rebuilt = build_location_store(INPUT_EXCEL_PATH, HEADER_ROW_INDEX, sheets, force=force)
+    except (KeyError, ImportError) as e:
+        metrics.log(f"ERREUR: Construction du magasin impossible. Détails : {e}")
+        sys.exit(1)
+    if rebuilt:
+        metrics.log(f"{len(index['locations'])} lieux indexés dans : '{WPP_STORE_DIR}'")
+    else:
+        metrics.log(f"Le magasin par pays est déjà à jour pour ce classeur : '{WPP_STORE_DIR}'")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Rapport d'exécution structuré (voir commun/metrics.py)
+    metrics.start_run("wpp_index_pays" if args.index_pays else
+                      "wpp_projections_chargement" if args.projections else "wpp_chargement")
+    sheets = [ESTIMATES_SHEET] + PROJECTION_SHEETS if args.projections else [ESTIMATES_SHEET]
+    output_path = OUTPUT_PROJECTIONS_CSV_PATH if args.projections else OUTPUT_CSV_PATH
+
+    metrics.log("Script 4: Démarrage du chargement et filtrage des données des Nations Unies.")
+
+    # --- Étape 1: Vérifier que le fichier source existe ---
+    if not os.path.exists(INPUT_EXCEL_PATH):
+        metrics.log(f"ERREUR: Le fichier d'entrée '{INPUT_EXCEL_PATH}' n'a pas été trouvé.")
+        sys.exit(1)
+
+    if args.index_pays:
+        run_location_store(args.forcer)
+        return
+
+    # --- Étapes 2 et 3: Charger les feuilles en ne gardant que le Bénin ---
+    # Le filtre est appliqué pendant la lecture : les autres pays ne sont jamais chargés
+    location_filter = [(LOCATION_COLUMN, '==', 'Benin')]
+    try:
+        metrics.log(f"Chargement des feuilles {', '.join(sheets)} depuis '{INPUT_EXCEL_PATH}' (filtre 'Benin')...")
+        with metrics.stage("chargement"):
+            if args.projections:
+                # Une feuille par processus : la durée est celle de la feuille la plus longue
+                df_benin = load_variants(INPUT_EXCEL_PATH, sheets, HEADER_ROW_INDEX,
+                                         columns=COLUMNS_TO_KEEP, filters=location_filter)
+            else:
+                # On ne charge que la feuille 'Estimates' pour les données historiques
+                df_benin = load_sheet(INPUT_EXCEL_PATH, ESTIMATES_SHEET, HEADER_ROW_INDEX,
+                                      columns=COLUMNS_TO_KEEP, filters=location_filter, stream=True)
+        metrics.log("Fichier Excel chargé avec succès.")
+
+    except KeyError as e:
+        metrics.log(f"ERREUR: La ou les colonnes {e} n'ont pas été trouvées.")
+        metrics.log("Vérifiez que la ligne d'en-tête et que le nom de la colonne sont corrects.")
+        sys.exit(1)
+
+    except Exception as e:
+        metrics.log(f"ERREUR: Impossible de lire le fichier Excel. Détails : {e}")
+        sys.exit(1)
+
+    if df_benin.empty:
+        metrics.log("AVERTISSEMENT: Aucune donnée trouvée pour 'Benin'. Le script va s'arrêter.")
         sys.exit(0)
-        
-    print(f"Filtrage réussi. {len(df_estimates_benin)} lignes trouvées pour le Bénin.")
-
-except KeyError:
-    print(f"ERREUR: La colonne '{location_col}' n'a pas été trouvée.")
-    print("Vérifiez que la ligne d'en-tête et que le nom de la colonne sont corrects.")
-    sys.exit(1)
-
-# --- Étape 4: Sauvegarder le résultat intermédiaire ---
-df_estimates_benin.to_csv(OUTPUT_CSV_PATH, index=False)
-print("\nScript terminé.")
-print(f"Les données brutes pour le Bénin ont été sauvegardées dans : '{OUTPUT_CSV_PATH}'")
\ No newline at end of file
+
+    metrics.log(f"Filtrage réussi. {len(df_benin)} lignes trouvées pour le Bénin.")
+
+    # --- Étape 4: Sauvegarder le résultat intermédiaire ---
+    df_benin.to_csv(output_path, index=False)
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Les données brutes pour le Bénin ont été sauvegardées dans : '{output_path}'")
+
+
+# Garde indispensable : les processus du pool (mode --projections) réimportent ce script
+if __name__ == "__main__":
+    main()
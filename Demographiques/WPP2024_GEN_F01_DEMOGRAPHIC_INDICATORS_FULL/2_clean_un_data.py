@@ -4,75 +4,216 @@
 # Objectif : Lire les données brutes extraites pour le Bénin, les nettoyer,
 #            sélectionner les colonnes pertinentes, renommer les en-têtes,
 #            et convertir les unités pour créer un dataset final propre.
-# Source : Fichier un_data_benin_raw.csv (généré par le script 4)
+#            Avec --depuis-excel, le chargement (script 4) et le nettoyage
+#            sont enchaînés en mémoire : seules les colonnes utiles des
+#            lignes du Bénin sont lues dans le classeur, sans passer par le
+#            CSV intermédiaire (écrit seulement avec --ecrire-brut).
+#            Avec --projections, les estimations sont raccordées à chaque
+#            variante de projection : une série continue 1950-2100 par
+#            scénario (colonne `scenario`), chaque ligne gardant sa variante
+#            d'origine (colonne `variante`).
+#            Avec --pays, les données de n'importe quels pays (codes ISO3 ou
+#            noms) sont lues directement dans le magasin partitionné par pays
+#            construit par 1_load_un_data.py --index-pays : seuls leurs
+#            fichiers sont ouverts.
+# Utilisation : python 2_clean_un_data.py [--depuis-excel [--ecrire-brut]]
+#               [--projections] [--pays BEN TGO NER]
+# Source : Fichier un_data_benin_raw.csv (généré par le script 4) ou classeur WPP
 # Auteur : SOULE Fadile
 # Date : 21/09/25
 # ==============================================================================
 
+import argparse
 import pandas as pd
 import os
 import sys
 
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
+from commun.columnar import save_dataset, to_long
+from commun.wpp_reader import (ESTIMATES_SHEET, VARIANT_SHEETS, load_sheet, load_variants, read_locations,
+                               stitch_series)
+
 # --- CONFIGURATION ---
 # Chemin vers le fichier CSV brut généré par le script précédent
 INPUT_CSV_PATH = 'un_data_benin_raw.csv'
+INPUT_PROJECTIONS_CSV_PATH = 'un_data_benin_raw_projections.csv'
+
+# Classeur et ligne d'en-tête lus par le mode --depuis-excel (identiques au script 4)
+INPUT_EXCEL_PATH = 'kaggle_data_unzipped/WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL.xlsx'
+HEADER_ROW_INDEX = 16
+PROJECTION_SHEETS = ['Medium variant', 'High variant', 'Low variant']
 
 # Chemin où sauvegarder le dataset final, nettoyé et prêt à l'analyse
 OUTPUT_CLEANED_CSV_PATH = 'un_demographic_indicators_benin_cleaned.csv'
+OUTPUT_PROJECTIONS_CLEANED_CSV_PATH = 'un_demographic_indicators_benin_projections_cleaned.csv'
+# Équivalents du mode --pays
+OUTPUT_COUNTRIES_CLEANED_CSV_PATH = 'un_demographic_indicators_pays_cleaned.csv'
+OUTPUT_COUNTRIES_PROJECTIONS_CLEANED_CSV_PATH = 'un_demographic_indicators_pays_projections_cleaned.csv'
+
+# Liste des colonnes originales que nous souhaitons conserver
+COLUMNS_TO_KEEP = [
+    'Region, subregion, country or area *',
+    'Year',
+    'Total Population, as of 1 July (thousands)',
+    'Population Density, as of 1 July (persons per square km)',
+    'Life Expectancy at Birth, both sexes (years)'
+]
+
+# Dictionnaire pour renommer les colonnes avec des noms simples et standardisés
+RENAME_DICT = {
+    'Region, subregion, country or area *': 'pays',
+    'Year': 'annee',
+    'Total Population, as of 1 July (thousands)': 'population_nationale_un',
+    'Population Density, as of 1 July (persons per square km)': 'densite_nationale_un',
+    'Life Expectancy at Birth, both sexes (years)': 'esperance_vie_un'
+}
+
+VALUE_COLUMNS = ['population_nationale_un', 'densite_nationale_un', 'esperance_vie_un']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nettoyage des données WPP 2024 du Bénin.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--depuis-excel", action="store_true",
+                        help="Lire directement le classeur (chargement et nettoyage en mémoire, sans CSV brut)")
+    source.add_argument("--pays", nargs="+", metavar="PAYS",
+                        help="Pays à lire dans le magasin par pays (codes ISO3, codes de lieu ou noms)")
+    parser.add_argument("--ecrire-brut", action="store_true",
+                        help="Avec --depuis-excel : écrire aussi le CSV brut intermédiaire")
+    parser.add_argument("--projections", action="store_true",
+                        help="Nettoyer les estimations et projections (1950-2100)")
+    args = parser.parse_args(argv)
+    if args.ecrire_brut and not args.depuis_excel:
+        parser.error("--ecrire-brut n'a de sens qu'avec --depuis-excel")
+    return args
+
+
+def load_raw(args):
+    """
+    Charge les colonnes COLUMNS_TO_KEEP (et `variante` avec --projections)
+    depuis la source choisie. L'en-tête de la source est vérifié avant toute
+    lecture de lignes, et seules ces colonnes sont lues.
+    """
+    columns = COLUMNS_TO_KEEP + ['variante'] if args.projections else COLUMNS_TO_KEEP
+
+    if args.pays:
+        # Lecture des seules partitions des pays demandés (et des seules estimations hors mode --projections)
+        try:
+            df_raw = read_locations(args.pays, columns=columns,
+                                    variants=None if args.projections else [VARIANT_SHEETS[ESTIMATES_SHEET]])
+        except FileNotFoundError as e:
+            metrics.log(f"ERREUR: {e}")
+            metrics.log("Veuillez d'abord exécuter 'python 1_load_un_data.py --index-pays'.")
+            sys.exit(1)
+        except KeyError as e:
+            metrics.log(f"ERREUR: Pays ou colonne inconnu(s) dans le magasin par pays : {e}")
+            sys.exit(1)
+        metrics.log(f"{len(df_raw)} lignes chargées pour {len(args.pays)} pays depuis le magasin par pays.")
+        return df_raw
+
+    if args.depuis_excel:
+        if not os.path.exists(INPUT_EXCEL_PATH):
+            metrics.log(f"ERREUR: Le fichier d'entrée '{INPUT_EXCEL_PATH}' n'a pas été trouvé.")
+            sys.exit(1)
+        # Filtre et colonnes appliqués pendant la lecture de chaque feuille
+        location_filter = [(COLUMNS_TO_KEEP[0], '==', 'Benin')]
+        try:
+            if args.projections:
+                df_raw = load_variants(INPUT_EXCEL_PATH, [ESTIMATES_SHEET] + PROJECTION_SHEETS, HEADER_ROW_INDEX,
+                                       columns=COLUMNS_TO_KEEP, filters=location_filter)
+            else:
+                df_raw = load_sheet(INPUT_EXCEL_PATH, ESTIMATES_SHEET, HEADER_ROW_INDEX,
+                                    columns=COLUMNS_TO_KEEP, filters=location_filter, stream=True)
+        except KeyError as e:
+            metrics.log(f"ERREUR: La ou les colonnes {e} n'ont pas été trouvées dans le classeur.")
+            sys.exit(1)
+        except Exception as e:
+            metrics.log(f"ERREUR: Impossible de lire le fichier Excel. Détails : {e}")
+            sys.exit(1)
+        metrics.log(f"{len(df_raw)} lignes chargées pour le Bénin depuis le classeur.")
+        if args.ecrire_brut:
+            raw_path = INPUT_PROJECTIONS_CSV_PATH if args.projections else INPUT_CSV_PATH
+            df_raw.to_csv(raw_path, index=False)
+            metrics.log(f"Données brutes sauvegardées dans : '{raw_path}'")
+        return df_raw
+
+    input_path = INPUT_PROJECTIONS_CSV_PATH if args.projections else INPUT_CSV_PATH
+    if not os.path.exists(input_path):
+        metrics.log(f"ERREUR: Le fichier d'entrée '{input_path}' n'a pas été trouvé.")
+        metrics.log("Veuillez d'abord exécuter le script '4_load_un_data.py'.")
+        sys.exit(1)
+    missing = [c for c in columns if c not in pd.read_csv(input_path, nrows=0).columns]
+    if missing:
+        metrics.log(f"ERREUR: La ou les colonnes {missing} n'ont pas été trouvées dans le fichier source.")
+        sys.exit(1)
+    df_raw = pd.read_csv(input_path, usecols=columns)
+    metrics.log("Fichier de données brutes pour le Bénin chargé.")
+    return df_raw
+
+
+def clean(df_raw, projections):
+    """Sélection, renommage et conversion des unités (puis raccordement des séries avec --projections)."""
+    columns = COLUMNS_TO_KEEP + ['variante'] if projections else COLUMNS_TO_KEEP
+    df_cleaned = df_raw[columns].rename(columns=RENAME_DICT)
+    metrics.log("Colonnes sélectionnées et renommées.")
+
+    # Convertir la population de 'milliers' en unité (ex: 2258.5 -> 2258500)
+    df_cleaned['population_nationale_un'] = (df_cleaned['population_nationale_un'] * 1000).astype(int)
+
+    # Convertir l'année en un nombre entier (ex: 1951.0 -> 1951)
+    df_cleaned['annee'] = df_cleaned['annee'].astype(int)
+
+    # S'assurer qu'il n'y a pas de valeurs manquantes dans les colonnes clés
+    df_cleaned = df_cleaned.dropna(subset=['annee', 'population_nationale_un'])
+    metrics.log("Unités converties et types de données corrigés.")
+
+    # Raccorder les estimations à chaque variante de projection (une série continue par scénario)
+    if projections:
+        df_cleaned = stitch_series(df_cleaned, 'annee', group_columns=['pays'])
+        metrics.log(f"Séries raccordées : {df_cleaned['annee'].min()}-{df_cleaned['annee'].max()}, "
+                    f"scénarios {', '.join(df_cleaned['scenario'].cat.categories)}.")
+    return df_cleaned
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Rapport d'exécution structuré (voir commun/metrics.py)
+    metrics.start_run(("wpp_pays_" if args.pays else "wpp_") +
+                      ("projections_nettoyage" if args.projections else "nettoyage"))
+    if args.pays:
+        output_path = (OUTPUT_COUNTRIES_PROJECTIONS_CLEANED_CSV_PATH if args.projections
+                       else OUTPUT_COUNTRIES_CLEANED_CSV_PATH)
+    else:
+        output_path = OUTPUT_PROJECTIONS_CLEANED_CSV_PATH if args.projections else OUTPUT_CLEANED_CSV_PATH
+
+    metrics.log("Script 5: Démarrage du nettoyage et de la transformation des données des Nations Unies.")
+
+    # --- Étape 1: Vérifier et charger les données sources ---
+    with metrics.stage("chargement"):
+        df_raw = load_raw(args)
+    if df_raw.empty:
+        metrics.log("AVERTISSEMENT: Aucune donnée à nettoyer. Le script va s'arrêter.")
+        sys.exit(0)
+
+    # --- Étapes 2 et 3: Sélectionner, renommer et convertir les unités ---
+    with metrics.stage("nettoyage"):
+        df_cleaned = clean(df_raw, args.projections)
+
+    # --- Étape 4: Sauvegarder le dataset final nettoyé ---
+    # Export CSV et/ou magasin Parquet partitionné par source et indicateur (voir commun/columnar.py)
+    id_columns = ['pays', 'scenario', 'variante'] if args.projections else ['pays']
+    df_parquet = to_long(df_cleaned, id_columns=id_columns, value_columns={c: c for c in VALUE_COLUMNS})
+    save_dataset(df_cleaned, output_path, 'un_wpp_projections' if args.projections else 'un_wpp',
+                 df_parquet, id_columns, index=False)
+
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Le dataset nettoyé a été sauvegardé dans : '{output_path}'")
+    metrics.log("\nAperçu du dataset final :")
+    print(df_cleaned.head())
+
 
-print("Script 5: Démarrage du nettoyage et de la transformation des données des Nations Unies.")
-
-# --- Étape 1: Vérifier et charger le fichier source ---
-if not os.path.exists(INPUT_CSV_PATH):
-    print(f"ERREUR: Le fichier d'entrée '{INPUT_CSV_PATH}' n'a pas été trouvé.")
-    print("Veuillez d'abord exécuter le script '4_load_un_data.py'.")
-    sys.exit(1)
-
-df_raw_benin = pd.read_csv(INPUT_CSV_PATH)
-print("Fichier de données brutes pour le Bénin chargé.")
-
-# --- Étape 2: Sélectionner et renommer les colonnes d'intérêt ---
-try:
-    # Liste des colonnes originales que nous souhaitons conserver
-    columns_to_keep = [
-        'Region, subregion, country or area *',
-        'Year',
-        'Total Population, as of 1 July (thousands)',
-        'Population Density, as of 1 July (persons per square km)',
-        'Life Expectancy at Birth, both sexes (years)'
-    ]
-    df_cleaned = df_raw_benin[columns_to_keep].copy()
-
-    # Dictionnaire pour renommer les colonnes avec des noms simples et standardisés
-    rename_dict = {
-        'Region, subregion, country or area *': 'pays',
-        'Year': 'annee',
-        'Total Population, as of 1 July (thousands)': 'population_nationale_un',
-        'Population Density, as of 1 July (persons per square km)': 'densite_nationale_un',
-        'Life Expectancy at Birth, both sexes (years)': 'esperance_vie_un'
-    }
-    df_cleaned.rename(columns=rename_dict, inplace=True)
-    print("Colonnes sélectionnées et renommées.")
-
-except KeyError as e:
-    print(f"ERREUR: La colonne {e} n'a pas été trouvée dans le fichier source.")
-    sys.exit(1)
-
-# --- Étape 3: Nettoyer les données et convertir les unités ---
-# Convertir la population de 'milliers' en unité (ex: 2258.5 -> 2258500)
-df_cleaned['population_nationale_un'] = (df_cleaned['population_nationale_un'] * 1000).astype(int)
-
-# Convertir l'année en un nombre entier (ex: 1951.0 -> 1951)
-df_cleaned['annee'] = df_cleaned['annee'].astype(int)
-
-# S'assurer qu'il n'y a pas de valeurs manquantes dans les colonnes clés
-df_cleaned.dropna(subset=['annee', 'population_nationale_un'], inplace=True)
-print("Unités converties et types de données corrigés.")
-
-# --- Étape 4: Sauvegarder le dataset final nettoyé ---
-df_cleaned.to_csv(OUTPUT_CLEANED_CSV_PATH, index=False)
-
-print("\nScript terminé.")
-print(f"Le dataset nettoyé a été sauvegardé dans : '{OUTPUT_CLEANED_CSV_PATH}'")
-print("\nAperçu du dataset final :")
-print(df_cleaned.head())
\ No newline at end of file
+# Garde indispensable : les processus du pool (--depuis-excel --projections) réimportent ce script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# ==============================================================================
+# INTERFACE EN LIGNE DE COMMANDE UNIFIÉE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Point d'entrée unique pour toutes les collectes :
+#                python Demographiques wb|education|dhs|wpp|geo|all [options]
+#            Seul `argparse` est chargé au démarrage : les dépendances lourdes
+#            (pandas, geopandas, rasterio, bs4, tqdm...) ne sont importées que
+#            par la sous-commande qui en a besoin. Une actualisation DHS ou
+#            `--help` ne paient donc pas l'import de GDAL.
+#            Chaque script expose une fonction `main(argv)`, appelée
+#            directement (le script n'est chargé qu'à ce moment-là).
+# Utilisation : python Demographiques <commande> --help pour les options de chaque commande.
+# ==============================================================================
+
+import argparse
+import importlib.util
+import os
+import sys
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WPP_DIR = "WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL"
+# Scripts exécutés, dans l'ordre, par les commandes qui enchaînent plusieurs étapes
+SCRIPTS = {
+    "education": ["C_7/main.py"],
+    "dhs": ["DHS/2_main.py"],
+    "wpp": [f"{WPP_DIR}/1_load_un_data.py", f"{WPP_DIR}/2_clean_un_data.py"],
+    "geo": ["geographique/1_scrapping.py", "geographique/2_benin_departements.py",
+            "geographique/3_filtrage_netoyage.py"],
+}
+# Commandes dont les options sont transmises au script sous-jacent
+PASSTHROUGH_COMMANDS = ("wb", "education", "dhs", "all")
+
+
+def load_script(relative_path):
+    """Importe un script du projet (nom de fichier numéroté, ex. DHS/2_main.py) et renvoie le module."""
+    path = os.path.join(BASE_DIR, relative_path)
+    name = "demographiques_" + os.path.splitext(relative_path)[0].replace("/", "_")
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return sys.modules[name]
+
+
+def run_script(relative_path, argv=()):
+    """
+    Appelle la fonction `main(argv)` d'un script du projet depuis le dossier
+    du script (les scripts utilisent des chemins relatifs), clôt son rapport
+    d'exécution et renvoie son code de sortie.
+    """
+    from commun import metrics
+
+    previous_cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.join(BASE_DIR, relative_path)))
+    try:
+        code = load_script(relative_path).main(list(argv))
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code)
+        return 1
+    finally:
+        # Rapport du script écrit à la fin du script, et non de la commande
+        metrics.finish_run()
+        os.chdir(previous_cwd)
+    return code or 0
+
+
+def run_scripts(command, argv=()):
+    """Enchaîne les scripts d'une commande et s'arrête au premier échec."""
+    scripts = SCRIPTS[command]
+    for i, script in enumerate(scripts, start=1):
+        print(f"\n=== [{command} {i}/{len(scripts)}] {script} ===")
+        code = run_script(script, argv)
+        if code != 0:
+            print(f"ERREUR: '{script}' a échoué (code {code}) : commande '{command}' interrompue.")
+            return code
+    return 0
+
+
+def run_wb(argv):
+    """Indicateurs C_1 à C_6 via le registre déclaratif (voir wb_runner.py)."""
+    import wb_runner
+    return wb_runner.main(argv, prog="demographiques wb")
+
+
+def run_all(argv):
+    """Pipeline complet avec dépendances et exécution parallèle (voir pipeline.py)."""
+    import pipeline
+    return pipeline.main(argv, prog="demographiques all")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="demographiques", description="Collecte des données démographiques du Bénin.")
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="commande")
+    # Les options de ces commandes sont transmises telles quelles au script sous-jacent
+    # (add_help=False : `--help` est traité par ce script)
+    for name, help_text in [
+        ("wb", "Indicateurs de la Banque Mondiale C_1 à C_6 (wb_runner.py)"),
+        ("education", "Indicateurs d'éducation consolidés C_7 (--pays, --source, --incremental...)"),
+        ("dhs", "Indicateurs DHS (DHS/2_main.py : --sous-national, --pays BJ TG, --afrique-ouest)"),
+        ("all", "Pipeline complet : toutes les sources, en parallèle (pipeline.py)"),
+    ]:
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    subparsers.add_parser("wpp", help="Indicateurs WPP des Nations Unies : chargement puis nettoyage")
+    subparsers.add_parser("geo", help="Population par département : rasters, limites, agrégation")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in PASSTHROUGH_COMMANDS:
+        parser.error(f"arguments non reconnus : {' '.join(extra)}")
+    # Rendre `commun`, `wb_runner` et `pipeline` importables quel que soit le dossier courant
+    sys.path.insert(0, BASE_DIR)
+    if args.command == "wb":
+        return run_wb(extra)
+    if args.command == "all":
+        return run_all(extra)
+    if args.command == "education":
+        return run_script(SCRIPTS["education"][0], extra)
+    return run_scripts(args.command, extra)
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# ==============================================================================
+# BENCHMARK : CONSOLIDATION DES INDICATEURS
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Comparer, sur des indicateurs synthétiques, l'ancienne
+#            consolidation par fusions externes successives (reduce + merge)
+#            à la consolidation en une seule passe de `commun.consolidation`,
+#            et vérifier que le coût de cette dernière croît linéairement
+#            avec le nombre d'indicateurs.
+# Utilisation : python benchmarks/bench_consolidation.py [--pays N]
+# ==============================================================================
+
+import argparse
+import os
+import sys
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun.consolidation import consolidate, consolidate_panel
+
+# Nombres d'indicateurs testés
+SIZES = [25, 50, 100, 200, 400, 800]
+YEARS = np.arange(1960, 2025)
+REPEAT = 3
+
+
+def make_frames(n_indicators, rng):
+    """Génère des indicateurs (annee, valeur) avec environ 40 % d'années manquantes."""
+    frames = []
+    for k in range(n_indicators):
+        years = YEARS[rng.random(len(YEARS)) > 0.4]
+        frames.append(pd.DataFrame({"annee": years, f"ind_{k}": rng.random(len(years)) * 100}))
+    return frames
+
+
+def make_panels(n_indicators, n_countries, rng):
+    """Génère des panels longs (country_code, annee, indicator, valeur) pour n_countries pays."""
+    codes = np.array([f"C{c:03d}" for c in range(n_countries)])
+    panels = []
+    for k in range(n_indicators):
+        keep = rng.random(n_countries * len(YEARS)) > 0.4
+        panels.append(pd.DataFrame({
+            "country_code": np.repeat(codes, len(YEARS))[keep],
+            "annee": np.tile(YEARS, n_countries)[keep],
+            "indicator": f"ind_{k}",
+            "valeur": rng.random(int(keep.sum())) * 100,
+        }))
+    return panels
+
+
+def chained_merge(frames):
+    """Ancienne méthode de C_7 : k-1 fusions externes successives puis tri."""
+    df = reduce(lambda left, right: pd.merge(left, right, on="annee", how="outer"), frames)
+    return df.sort_values("annee")
+
+
+def best_time(func, *args):
+    """Meilleur temps (en secondes) sur REPEAT exécutions."""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la consolidation des indicateurs.")
+    parser.add_argument("--pays", type=int, default=0,
+                        help="Nombre de pays synthétiques pour le benchmark du panel (0 = ignoré)")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print("Consolidation année × indicateur (un pays)")
+    print(f"{'indicateurs':>12} {'merge (s)':>10} {'1 passe (s)':>11} {'1 passe µs/ind.':>15}")
+    for n in SIZES:
+        frames = make_frames(n, rng)
+        # Les deux méthodes doivent produire exactement le même tableau
+        pd.testing.assert_frame_equal(
+            chained_merge(frames).reset_index(drop=True), consolidate(frames), check_dtype=False
+        )
+        t_merge = best_time(chained_merge, frames)
+        t_concat = best_time(consolidate, frames)
+        print(f"{n:>12} {t_merge:>10.4f} {t_concat:>11.4f} {t_concat / n * 1e6:>15.1f}")
+
+    if args.pays:
+        print(f"\nConsolidation pays × année × indicateur ({args.pays} pays)")
+        print(f"{'indicateurs':>12} {'pivot (s)':>10} {'pivot µs/ind.':>14}")
+        for n in SIZES:
+            panels = make_panels(n, args.pays, rng)
+            t_pivot = best_time(consolidate_panel, panels)
+            print(f"{n:>12} {t_pivot:>10.4f} {t_pivot / n * 1e6:>14.1f}")
+
+    print("\nUn coût par indicateur (µs/ind.) stable d'une ligne à l'autre indique une croissance linéaire.")
@@ -0,0 +1,344 @@
+# ==============================================================================
+# BENCHMARK : CHAÎNE DE TRAITEMENT BANQUE MONDIALE (HORS LIGNE)
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Mesurer, sans accès réseau, le chemin extraction -> filtrage ->
+#            format long -> nettoyage -> consolidation des scripts C_1 à C_7 :
+#            - scénario "fixtures" : les ZIP réels versionnés sous
+#              C_*/content/data/raw/, filtrés sur le Bénin ;
+#            - scénario "synthetique" : des ZIP au format de la Banque
+#              Mondiale générés à grande échelle (1 000 pays, 500 indicateurs
+#              par défaut), tous pays conservés.
+#            Pour chaque étape : temps (horloge murale), pic de mémoire
+#            résidente (RSS) et lignes par seconde. Les résultats sont
+#            comparés à une référence (--save-baseline) et le script échoue
+#            (code 1) en cas de régression. La référence versionnée
+#            (baseline_pipeline.json) ne contient que des grandeurs
+#            indépendantes de la machine : le nombre de lignes de chaque
+#            étape (exact), la part de chaque étape dans le temps total et
+#            son temps normalisé, c'est-à-dire divisé par celui d'une boucle
+#            d'étalonnage fixe mesurée sur la même machine juste avant.
+#            Une référence locale écrite par --json peut être passée à
+#            --baseline pour comparer aussi les temps et la mémoire absolus.
+#            Scénarios versionnés : fixtures, et synthétique avec
+#            --pays 200 --indicateurs 50.
+# Utilisation : python benchmarks/bench_pipeline.py [--scenario fixtures|synthetique|tous] [--repeat N]
+#                   [--pays N] [--indicateurs N] [--save-baseline] [--json FICHIER]
+# ==============================================================================
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun.consolidation import consolidate_panel
+from commun.wb_reader import iter_wb_rows, read_wb_csv, to_long_panel
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_PATTERN = os.path.join(BASE_DIR, "C_*", "content", "data", "raw", "*.zip")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_pipeline.json")
+STAGES = ["extraction", "filtrage", "format_long", "nettoyage", "consolidation"]
+YEARS = list(range(1960, 2025))
+REPEAT = 3
+# Le scénario synthétique (plusieurs Go de RAM, quelques minutes) n'est exécuté qu'une fois par défaut
+SYNTHETIC_REPEAT = 1
+# Tolérances avant de signaler une régression (relative, et absolue pour ignorer le bruit des étapes très courtes)
+TIME_TOLERANCE = 0.25
+TIME_MIN_DELTA_S = 0.01
+RSS_TOLERANCE = 0.20
+RSS_MIN_DELTA_MB = 16
+# Part d'une étape dans le temps total de la chaîne : tolérance relative, et absolue (en points de part)
+SHARE_TOLERANCE = 0.5
+SHARE_MIN_DELTA = 0.05
+# Temps normalisé (temps de l'étape / temps d'étalonnage) : tolérance relative ; l'écart absolu
+# correspondant doit aussi dépasser TIME_MIN_DELTA_S
+NORM_TOLERANCE = 0.5
+# Boucle d'étalonnage : analyse CSV et passage au format long d'une matrice fixe, médiane de N mesures
+CALIBRATION_SHAPE = (2000, 65)
+CALIBRATION_REPEAT = 5
+# Grandeurs enregistrées dans la référence versionnée
+BASELINE_FIELDS = ("rows", "share", "norm")
+RSS_SAMPLE_INTERVAL_S = 0.005
+
+
+def _rss_bytes():
+    """Mémoire résidente actuelle du processus (Linux : /proc, sinon pic via resource)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageProbe:
+    """
+    Mesure une étape : temps écoulé et pic de RSS échantillonné par un thread
+    pendant son exécution. L'appelant renseigne `rows` (lignes produites).
+    """
+
+    def __enter__(self):
+        self.rows = 0
+        self.peak_rss = _rss_bytes()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL_S):
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._start
+        self._stop.set()
+        self._sampler.join()
+        self.peak_rss = max(self.peak_rss, _rss_bytes())
+        return False
+
+
+def fixture_sources():
+    """ZIP versionnés dans le dépôt, un par indicateur : [(chemin, membre, code)]."""
+    sources, seen = [], set()
+    for zip_path in sorted(glob.glob(FIXTURE_PATTERN)):
+        with zipfile.ZipFile(zip_path) as z:
+            member = next(n for n in z.namelist() if n.startswith("API_") and n.endswith(".csv"))
+        code = member[len("API_"):].split("_DS2_")[0]
+        if code not in seen:
+            seen.add(code)
+            sources.append((zip_path, member, code))
+    return sources
+
+
+def make_synthetic_sources(directory, n_countries, n_indicators, rng):
+    """
+    Génère n_indicators ZIP au format de la Banque Mondiale (lignes de
+    métadonnées, en-tête, une ligne par pays, ~40 % de valeurs vides).
+    """
+    codes = [f"X{k:03d}" for k in range(n_countries)]
+    names = [f"Pays synthetique {k}" for k in range(n_countries)]
+    values = rng.random((n_countries, len(YEARS))) * 100
+    cells = np.char.mod("%.6f", values)
+    cells[rng.random(cells.shape) < 0.4] = ""
+
+    sources = []
+    for k in range(n_indicators):
+        code = f"SYN.IND.{k:04d}"
+        member = f"API_{code}_DS2_en_csv_v2_0.csv"
+        buffer = io.StringIO()
+        buffer.write('"Data Source","World Development Indicators",\n\n"Last Updated Date","2025-07-01",\n\n')
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator=",\n")
+        writer.writerow(["Country Name", "Country Code", "Indicator Name", "Indicator Code"] + [str(y) for y in YEARS])
+        for i in rng.permutation(n_countries):
+            writer.writerow([names[i], codes[i], f"Indicateur synthetique {k}", code] + list(cells[i]))
+        zip_path = os.path.join(directory, f"synthetic_{k:04d}.zip")
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+            z.writestr(member, buffer.getvalue())
+        sources.append((zip_path, member, code))
+    return sources
+
+
+def run_chain(sources, countries):
+    """Exécute une fois la chaîne complète et renvoie {étape: StageProbe}."""
+    probes = {}
+    with StageProbe() as probe:
+        for zip_path, member, _ in sources:
+            probe.rows += sum(1 for _ in iter_wb_rows(zip_path, member)) - 1
+    probes["extraction"] = probe
+
+    with StageProbe() as probe:
+        frames = [(code, read_wb_csv(zip_path, member, countries=countries, years=[str(y) for y in YEARS]))
+                  for zip_path, member, code in sources]
+        probe.rows = sum(len(df) for _, df in frames)
+    probes["filtrage"] = probe
+
+    with StageProbe() as probe:
+        panels = [(df, to_long_panel(df, code)) for code, df in frames]
+        probe.rows = sum(len(panel) for _, panel in panels)
+    probes["format_long"] = probe
+
+    # Nettoyage : mise en forme finale des scripts C_* et sérialisation CSV
+    with StageProbe() as probe:
+        for df_wide, panel in panels:
+            names = dict(zip(df_wide["Country Code"], df_wide["Country Name"]))
+            df_final = pd.DataFrame({
+                "Country Name": panel["country_code"].map(names),
+                "Country Code": panel["country_code"],
+                "Année": panel["annee"],
+                "valeur": panel["valeur"],
+            })
+            df_final.to_csv(io.StringIO(), index=False)
+            probe.rows += len(df_final)
+    probes["nettoyage"] = probe
+
+    with StageProbe() as probe:
+        probe.rows = len(consolidate_panel([panel for _, panel in panels]))
+    probes["consolidation"] = probe
+    return probes
+
+
+def calibrate(repeat=CALIBRATION_REPEAT):
+    """
+    Temps (en secondes) d'une charge fixe proche de la chaîne mesurée :
+    analyse d'un CSV en mémoire puis passage au format long. Sert d'unité de
+    temps pour comparer des mesures prises sur des machines différentes.
+    """
+    values = np.random.default_rng(0).random(CALIBRATION_SHAPE)
+    text = "\n".join(",".join(f"{v:.6f}" for v in row) for row in values)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = [[float(cell) for cell in row] for row in csv.reader(io.StringIO(text))]
+        pd.DataFrame(np.array(rows)).melt()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def benchmark(sources, countries, repeat):
+    """
+    Temps médian et pic de RSS maximal par étape sur `repeat` exécutions,
+    avec le temps normalisé par l'étalonnage de la machine. La médiane (plutôt
+    que le meilleur temps) résiste aux mesures anormalement rapides ou lentes
+    d'une machine virtuelle partagée.
+    """
+    # Étalonnage répété entre les exécutions, pour subir les mêmes variations que les étapes
+    calibrations, walls = [], {}
+    results = {}
+    for _ in range(repeat):
+        calibrations.append(calibrate())
+        for stage, probe in run_chain(sources, countries).items():
+            entry = results.setdefault(stage, {"peak_rss_mb": 0.0, "rows": probe.rows})
+            walls.setdefault(stage, []).append(probe.wall)
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], probe.peak_rss / 2**20)
+    calibration_s = statistics.median(calibrations)
+    for stage, entry in results.items():
+        entry["wall_s"] = statistics.median(walls[stage])
+    total = sum(entry["wall_s"] for entry in results.values())
+    for entry in results.values():
+        entry["rows_per_s"] = entry["rows"] / entry["wall_s"] if entry["wall_s"] else 0.0
+        entry["share"] = entry["wall_s"] / total if total else 0.0
+        entry["calibration_s"] = calibration_s
+        entry["norm"] = entry["wall_s"] / calibration_s
+    return results
+
+
+def baseline_entries(results):
+    """Grandeurs indépendantes de la machine (BASELINE_FIELDS) à enregistrer dans la référence versionnée."""
+    return {
+        scenario: {stage: {f: round(entry[f], 3) for f in BASELINE_FIELDS} for stage, entry in stages.items()}
+        for scenario, stages in results.items()
+    }
+
+
+def find_regressions(results, baseline):
+    """
+    Compare aux mesures de référence ; renvoie la liste des régressions
+    constatées. Les temps et la mémoire absolus ne sont comparés que si la
+    référence les contient (référence locale écrite par --json).
+    """
+    regressions = []
+    for scenario, stages in results.items():
+        for stage, entry in stages.items():
+            ref = baseline.get(scenario, {}).get(stage)
+            if ref is None:
+                continue
+            if entry["rows"] != ref["rows"]:
+                regressions.append(f"{scenario}/{stage} : {entry['rows']} lignes au lieu de {ref['rows']}")
+            if ("share" in ref and entry["share"] > ref["share"] * (1 + SHARE_TOLERANCE)
+                    and entry["share"] - ref["share"] > SHARE_MIN_DELTA):
+                regressions.append(f"{scenario}/{stage} : {entry['share']:.0%} du temps total "
+                                   f"au lieu de {ref['share']:.0%}")
+            if ("norm" in ref and entry["norm"] > ref["norm"] * (1 + NORM_TOLERANCE)
+                    and (entry["norm"] - ref["norm"]) * entry["calibration_s"] > TIME_MIN_DELTA_S):
+                regressions.append(f"{scenario}/{stage} : temps normalisé {entry['norm']:.2f} "
+                                   f"au lieu de {ref['norm']:.2f} (étalonnage {entry['calibration_s']:.4f} s)")
+            if ("wall_s" in ref and entry["wall_s"] > ref["wall_s"] * (1 + TIME_TOLERANCE)
+                    and entry["wall_s"] - ref["wall_s"] > TIME_MIN_DELTA_S):
+                regressions.append(f"{scenario}/{stage} : {entry['wall_s']:.4f} s au lieu de {ref['wall_s']:.4f} s")
+            if ("peak_rss_mb" in ref and entry["peak_rss_mb"] > ref["peak_rss_mb"] * (1 + RSS_TOLERANCE)
+                    and entry["peak_rss_mb"] - ref["peak_rss_mb"] > RSS_MIN_DELTA_MB):
+                regressions.append(f"{scenario}/{stage} : pic RSS {entry['peak_rss_mb']:.0f} Mo "
+                                   f"au lieu de {ref['peak_rss_mb']:.0f} Mo")
+    return regressions
+
+
+def print_results(scenario, results):
+    print(f"\nScénario : {scenario} (étalonnage : {results[STAGES[0]]['calibration_s']:.4f} s)")
+    print(f"{'étape':<14} {'temps (s)':>10} {'part':>6} {'normalisé':>10} {'pic RSS (Mo)':>13} "
+          f"{'lignes':>10} {'lignes/s':>12}")
+    for stage in STAGES:
+        entry = results[stage]
+        print(f"{stage:<14} {entry['wall_s']:>10.4f} {entry['share']:>6.0%} {entry['norm']:>10.2f} "
+              f"{entry['peak_rss_mb']:>13.0f} {entry['rows']:>10} {entry['rows_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de la chaîne de traitement Banque Mondiale.")
+    parser.add_argument("--scenario", choices=["fixtures", "synthetique", "tous"], default="fixtures")
+    parser.add_argument("--pays", type=int, default=1000, help="Nombre de pays du scénario synthétique")
+    parser.add_argument("--indicateurs", type=int, default=500, help="Nombre d'indicateurs du scénario synthétique")
+    parser.add_argument("--repeat", type=int,
+                        help=f"Nombre d'exécutions par scénario (défaut : {REPEAT}, {SYNTHETIC_REPEAT} en synthétique)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Fichier JSON des mesures de référence")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer les mesures comme nouvelle référence")
+    parser.add_argument("--json", help="Écrire les mesures dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = {}
+    if args.scenario in ("fixtures", "tous"):
+        sources = fixture_sources()
+        print(f"Scénario fixtures : {len(sources)} indicateur(s) versionné(s), filtrés sur le Bénin.")
+        results["fixtures"] = benchmark(sources, ["Benin"], args.repeat or REPEAT)
+        print_results("fixtures", results["fixtures"])
+
+    if args.scenario in ("synthetique", "tous"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            print(f"\nGénération du scénario synthétique : {args.pays} pays × {args.indicateurs} indicateurs...")
+            sources = make_synthetic_sources(tmp_dir, args.pays, args.indicateurs, np.random.default_rng(0))
+            name = f"synthetique_{args.pays}x{args.indicateurs}"
+            results[name] = benchmark(sources, None, args.repeat or SYNTHETIC_REPEAT)
+        print_results(name, results[name])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(baseline_entries(results))
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"\nMesures de référence enregistrées dans : '{args.baseline}'")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"\nAVERTISSEMENT: Aucune référence '{args.baseline}' : lancez avec --save-baseline pour en créer une.")
+        sys.exit(0)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    for scenario in results:
+        if scenario not in baseline:
+            print(f"\nAVERTISSEMENT: Aucune référence pour le scénario '{scenario}' dans '{args.baseline}'.")
+    regressions = find_regressions(results, baseline)
+    if regressions:
+        print("\nERREUR: Régressions par rapport à la référence :")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("\nAucune régression par rapport à la référence.")
@@ -0,0 +1,6 @@
+# ==============================================================================
+# MODULES PARTAGÉS ENTRE LES SCRIPTS DE COLLECTE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Regrouper le code commun (téléchargement, cache, lecture) utilisé
+#            par les scripts C_1 à C_7, DHS, WPP et géographique.
+# ==============================================================================
@@ -0,0 +1,247 @@
+# ==============================================================================
+# SORTIES COLONNAIRES (PARQUET) PARTITIONNÉES
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Écrire les jeux de données nettoyés au format Parquet avec des
+#            types compacts (année int16, valeurs float32, libellés encodés en
+#            dictionnaire), partitionnés par source et par indicateur :
+#                <PARQUET_DIR>/source=<source>/indicator=<indicateur>/data.parquet
+#            Les panels multi-entités volumineux (ex. indicateurs DHS de tous
+#            les pays d'Afrique de l'Ouest) ont en plus un fichier par entité :
+#                <PARQUET_DIR>/source=<source>/indicator=<indicateur>/<colonne>=<valeur>/data.parquet
+#            Les lecteurs peuvent ainsi ne charger que les colonnes et les
+#            partitions utiles. Le CSV reste disponible comme export optionnel.
+# Dépendance optionnelle : pyarrow
+# ==============================================================================
+
+import glob
+import operator
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import reduce
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité aux threads du processus
+    fcntl = None
+
+import pandas as pd
+
+from . import metrics
+
+# --- CONFIGURATION ---
+# Racine du magasin Parquet (surchargeable par DEMOGRAPHIQUES_PARQUET_DIR)
+PARQUET_DIR = os.environ.get(
+    "DEMOGRAPHIQUES_PARQUET_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "parquet")
+)
+# Formats de sortie, séparés par des virgules : "csv", "parquet" ou "csv,parquet"
+OUTPUT_FORMATS = [
+    f.strip() for f in os.environ.get("DEMOGRAPHIQUES_OUTPUT_FORMATS", "csv,parquet").split(",") if f.strip()
+]
+PARQUET_FILE_NAME = "data.parquet"
+# Opérateurs acceptés dans les filtres de `read_parquet` (en plus de "in")
+FILTER_OPERATORS = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge,
+}
+# Sérialise les lectures-modifications-écritures de partitions entre threads d'un même processus
+# (entre processus, voir _partition_lock)
+_WRITE_LOCK = threading.Lock()
+PARTITION_LOCK_FILE = ".lock"
+# Préfixe des fichiers temporaires : pyarrow.dataset ignore les fichiers commençant par "." ou "_",
+# de sorte qu'une écriture en cours ou interrompue ne casse pas les lectures du magasin
+TEMP_PREFIX = "."
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None, None
+    return pa, pq
+
+
+def to_long(df, id_columns, value_columns, year_column="annee"):
+    """
+    Passe un tableau large (une colonne par indicateur) au format long
+    (dimensions..., annee, indicator, valeur), sans les valeurs manquantes.
+    `value_columns` associe chaque colonne de valeurs à son identifiant d'indicateur.
+    """
+    df_long = df.melt(
+        id_vars=list(id_columns) + [year_column],
+        value_vars=list(value_columns),
+        var_name="indicator",
+        value_name="valeur",
+    )
+    df_long["indicator"] = df_long["indicator"].map(value_columns)
+    if year_column != "annee":
+        df_long = df_long.rename(columns={year_column: "annee"})
+    return df_long.dropna(subset=["valeur"]).reset_index(drop=True)
+
+
+def compact_types(df_long, key_columns):
+    """Types compacts : année int16, valeurs float32, dimensions en catégories (dictionnaire)."""
+    df = df_long.copy()
+    df["annee"] = df["annee"].astype("int16")
+    df["valeur"] = df["valeur"].astype("float32")
+    for col in key_columns:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def write_parquet(df_long, source, key_columns, root=None):
+    """
+    Écrit un panel long (key_columns..., annee, indicator, valeur) dans le
+    magasin partitionné. Pour chaque indicateur, les lignes déjà présentes
+    pour d'autres valeurs de `key_columns[0]` (autres pays ou départements)
+    sont conservées : seules les entités fournies sont remplacées.
+    Renvoie la liste des fichiers écrits. Lève ImportError sans pyarrow.
+    """
+    pa, pq = _import_pyarrow()
+    if pa is None:
+        raise ImportError("Le module 'pyarrow' est requis pour écrire au format Parquet (pip install pyarrow).")
+
+    root = root or PARQUET_DIR
+    with _WRITE_LOCK:
+        return _write_partitions(pa, pq, df_long, source, key_columns, root)
+
+
+def _temp_file(part_dir):
+    """Fichier temporaire caché dans la partition ; renvoie (descripteur, chemin)."""
+    return tempfile.mkstemp(dir=part_dir, prefix=TEMP_PREFIX, suffix=".tmp")
+
+
+@contextmanager
+def _partition_lock(part_dir):
+    """
+    Verrou exclusif (fcntl.flock) sur une partition, pour que deux processus
+    (ex. wb_runner.py et C_7/main.py lancés en parallèle par le pipeline) ne
+    réécrivent pas la même partition à partir de la même version.
+    """
+    with open(os.path.join(part_dir, PARTITION_LOCK_FILE), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_partitions(pa, pq, df_long, source, key_columns, root):
+    """Remplace, pour chaque indicateur de `df_long`, les entités fournies dans leur partition."""
+    key = key_columns[0]
+    written = []
+    for indicator, part in df_long.groupby("indicator", sort=False):
+        part_dir = os.path.join(root, f"source={source}", f"indicator={indicator}")
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, PARQUET_FILE_NAME)
+
+        part = part.drop(columns="indicator")
+        # Lecture, fusion et remplacement sous le verrou de la partition
+        with _partition_lock(part_dir):
+            if os.path.exists(path):
+                existing = pd.read_parquet(path)
+                existing = existing[~existing[key].astype(str).isin(part[key].astype(str))]
+                part = pd.concat([existing.astype({key: str}), part.astype({key: str})], ignore_index=True)
+            part = compact_types(part, key_columns).sort_values(list(key_columns) + ["annee"])
+
+            # Écriture atomique : un lecteur concurrent ne voit jamais de fichier partiel
+            fd, tmp_path = _temp_file(part_dir)
+            os.close(fd)
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+        written.append(path)
+    return written
+
+
+def write_entity_partitions(df_long, source, partition_columns, root=None):
+    """
+    Écrit un panel long (partition_columns..., annee, indicator, valeur) avec
+    un fichier par indicateur et par entité :
+        source=<source>/indicator=<indicateur>/<colonne>=<valeur>/data.parquet
+    Seules les entités présentes dans `df_long` sont réécrites (leurs anciens
+    fichiers d'indicateurs disparus sont supprimés) ; les autres ne sont ni
+    lues ni modifiées. Renvoie la liste des fichiers écrits. Lève ImportError
+    sans pyarrow.
+    """
+    pa, pq = _import_pyarrow()
+    if pa is None:
+        raise ImportError("Le module 'pyarrow' est requis pour écrire au format Parquet (pip install pyarrow).")
+
+    source_dir = os.path.join(root or PARQUET_DIR, f"source={source}")
+    written = []
+    for keys, part in df_long.groupby(["indicator"] + list(partition_columns), sort=False, observed=True):
+        indicator, *values = keys
+        part_dir = os.path.join(source_dir, f"indicator={indicator}",
+                                *(f"{c}={v}" for c, v in zip(partition_columns, values)))
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, PARQUET_FILE_NAME)
+        # Indicateur et entité sont portés par le chemin (partitionnement « hive »)
+        part = compact_types(part.drop(columns=["indicator"] + list(partition_columns)), []).sort_values("annee")
+
+        fd, tmp_path = _temp_file(part_dir)
+        os.close(fd)
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+        written.append(path)
+
+    # Indicateurs qui n'existent plus pour les entités rafraîchies
+    for values in df_long[list(partition_columns)].drop_duplicates().itertuples(index=False, name=None):
+        pattern = os.path.join(source_dir, "indicator=*", *(f"{c}={v}" for c, v in zip(partition_columns, values)),
+                               PARQUET_FILE_NAME)
+        for path in set(glob.glob(pattern)) - set(written):
+            os.remove(path)
+    return written
+
+
+def read_parquet(source=None, indicators=None, columns=None, filters=None, root=None):
+    """
+    Lit le magasin Parquet en ne chargeant que les partitions (`source`,
+    `indicators`) et les colonnes demandées. `filters` suit la syntaxe de
+    pyarrow (ex. [("annee", ">=", 2000)]) et est appliqué à la lecture.
+    """
+    import pyarrow.dataset as ds
+
+    root = root or PARQUET_DIR
+    conditions = []
+    if source is not None:
+        # Seule l'arborescence de la source est parcourue : les sources n'ont pas le même schéma
+        dataset = ds.dataset(os.path.join(root, f"source={source}"), format="parquet", partitioning="hive")
+    else:
+        dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    if indicators is not None:
+        conditions.append(ds.field("indicator").isin(list(indicators)))
+    for name, op, value in filters or []:
+        field = ds.field(name)
+        conditions.append(field.isin(list(value)) if op == "in" else FILTER_OPERATORS[op](field, value))
+    expression = reduce(operator.and_, conditions) if conditions else None
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def save_dataset(df, csv_path, source, df_long, key_columns, **csv_kwargs):
+    """
+    Sauvegarde un jeu de données nettoyé selon OUTPUT_FORMATS :
+    - "csv" : `df` tel quel dans `csv_path` (export historique) ;
+    - "parquet" : `df_long` dans le magasin partitionné par source et indicateur.
+    Si pyarrow n'est pas installé, seul le CSV est écrit (avec un avertissement).
+    """
+    start = time.perf_counter()
+    if "parquet" in OUTPUT_FORMATS:
+        try:
+            paths = write_parquet(df_long, source, key_columns)
+            metrics.log(f"{len(paths)} partition(s) Parquet écrite(s) sous : '{os.path.join(PARQUET_DIR, f'source={source}')}'")
+            metrics.add("rows_written_parquet", len(df_long))
+        except ImportError as e:
+            metrics.log(f"AVERTISSEMENT: Sortie Parquet ignorée. {e}")
+            if "csv" not in OUTPUT_FORMATS:
+                raise
+    if "csv" in OUTPUT_FORMATS:
+        df.to_csv(csv_path, **csv_kwargs)
+        metrics.add("rows_written_csv", len(df))
+    metrics.add("write_s", time.perf_counter() - start)
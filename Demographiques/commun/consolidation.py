@@ -0,0 +1,48 @@
+# ==============================================================================
+# CONSOLIDATION DES INDICATEURS EN UNE SEULE PASSE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Assembler les indicateurs traités séparément en une matrice
+#            année × indicateur (× pays) par un unique alignement d'index,
+#            au lieu d'enchaîner k-1 fusions externes qui recopient à chaque
+#            étape le tableau en cours de construction.
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+
+def consolidate(frames, on="annee"):
+    """
+    Consolide des DataFrames (`on`, valeur) en un seul tableau trié par `on`,
+    avec une colonne par indicateur dans l'ordre de `frames`.
+    Équivaut à une succession de `pd.merge(..., how='outer')` suivie d'un tri,
+    mais chaque indicateur est copié une seule fois dans une matrice
+    pré-allouée sur l'union triée des clés.
+    """
+    keys = np.unique(np.concatenate([df[on].to_numpy() for df in frames]))
+    columns = [df.columns.drop(on)[0] for df in frames]
+    matrix = np.full((len(keys), len(frames)), np.nan)
+    for j, df in enumerate(frames):
+        matrix[np.searchsorted(keys, df[on].to_numpy()), j] = df[columns[j]].to_numpy(dtype="float64")
+
+    df_consolidated = pd.DataFrame(matrix, columns=columns)
+    df_consolidated.insert(0, on, keys)
+    return df_consolidated
+
+
+def consolidate_panel(panels, index=("country_code", "annee")):
+    """
+    Consolide des panels longs (country_code, annee, indicator, valeur) en un
+    tableau large indexé par `index`, avec une colonne par indicateur dans
+    l'ordre d'apparition, par une seule concaténation suivie d'un pivot.
+    """
+    df_long = pd.concat(panels, ignore_index=True)
+    indicators = list(dict.fromkeys(df_long["indicator"]))
+    df_wide = (
+        df_long.set_index(list(index) + ["indicator"])["valeur"]
+        .unstack("indicator")
+        .reindex(columns=indicators)
+        .sort_index()
+    )
+    df_wide.columns.name = None
+    return df_wide.reset_index()
@@ -0,0 +1,50 @@
+# ==============================================================================
+# RÉFÉRENTIEL DES DÉPARTEMENTS DU BÉNIN
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Ramener les libellés de région des différentes sources (DHS,
+#            limites administratives...) aux noms de départements utilisés
+#            par geographique/3_filtrage_netoyage.py, afin de pouvoir joindre
+#            les jeux de données sur la colonne `departement`.
+#            La table de correspondance est calculée une fois ; l'application
+#            à une colonne ne porte que sur ses valeurs distinctes.
+# ==============================================================================
+
+import unicodedata
+
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Noms de référence (population_par_departement_benin.csv)
+DEPARTEMENTS = [
+    "Alibori", "Atakora", "Atlantique", "Borgou", "Collines", "Donga",
+    "Kouffo", "Littoral", "Mono", "Ouémé", "Plateau", "Zou",
+]
+# Graphies alternatives rencontrées dans les sources (forme normalisée -> département)
+ALIASES = {
+    "atacora": "Atakora",
+    "couffo": "Kouffo",
+    "cotonou": "Littoral",
+    # Encodage erroné des limites administratives (voir 3_filtrage_netoyage.py)
+    "ouama": "Ouémé",
+}
+
+
+def normalize_label(label):
+    """Forme de comparaison d'un libellé : sans accents, casse ni ponctuation (ex. '..Ouémé ' -> 'oueme')."""
+    ascii_label = unicodedata.normalize("NFKD", str(label)).encode("ascii", "ignore").decode("ascii")
+    return "".join(c for c in ascii_label.lower() if c.isalnum())
+
+
+# Table de correspondance précalculée : forme normalisée -> nom de département
+LOOKUP = {**{normalize_label(d): d for d in DEPARTEMENTS}, **ALIASES}
+
+
+def to_departement(labels):
+    """
+    Convertit une série de libellés de région en noms de départements (NaN si
+    le libellé n'est pas reconnu). Seules les valeurs distinctes sont
+    normalisées ; le résultat est une série catégorielle.
+    """
+    categories = pd.Series(labels, copy=False).astype("category")
+    mapping = {c: LOOKUP.get(normalize_label(c)) for c in categories.cat.categories}
+    return categories.map(mapping).astype(pd.CategoricalDtype(DEPARTEMENTS))
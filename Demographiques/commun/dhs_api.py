@@ -0,0 +1,366 @@
+# ==============================================================================
+# CLIENT DE L'API DU DHS PROGRAM
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Interroger /rest/dhs/data sans perdre de données ni saturer
+#            l'API :
+#            - la pagination est suivie grâce aux métadonnées `TotalPages`,
+#              les pages suivantes étant récupérées en parallèle ;
+#            - un limiteur de débit partagé espace les requêtes ;
+#            - les longues listes d'indicateurs sont découpées en lots dont
+#              le paramètre `indicatorIds` reste de longueur raisonnable ;
+#            - chaque page est analysée au fil de sa réception en colonnes
+#              typées et catégorielles (commun/dhs_stream.py), puis toutes
+#              les pages sont concaténées dans l'ordre ;
+#            - seules les colonnes utiles sont demandées (`returnFields`) et
+#              les réponses sont conservées sur disque pendant une durée
+#              configurable, indexées par la requête normalisée : toutes les
+#              pages d'une requête forment un même instantané, qui expire et
+#              est remplacé d'un bloc.
+# Source : https://api.dhsprogram.com/#/api-data.cfm
+# ==============================================================================
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+
+from . import dhs_stream
+from . import metrics
+
+# --- CONFIGURATION ---
+# URL de base de l'API (surchargeable, par exemple vers un serveur local de rejeu)
+API_BASE_URL = os.environ.get("DHS_API_BASE_URL", "https://api.dhsprogram.com/rest/dhs")
+# Clé d'API facultative (relève les quotas de l'API)
+API_KEY = os.environ.get("DHS_API_KEY")
+PER_PAGE = 1000
+# Longueur maximale (encodée) du paramètre indicatorIds d'une requête
+MAX_INDICATOR_PARAM_LENGTH = 1500
+# Requêtes simultanées et débit maximal (requêtes par seconde, tous threads confondus)
+MAX_WORKERS = 4
+MAX_REQUESTS_PER_SECOND = 4
+REQUEST_TIMEOUT = 120
+# Cache disque des réponses (DEMOGRAPHIQUES_DHS_CACHE_DIR) et durée de validité en heures
+# (DEMOGRAPHIQUES_DHS_CACHE_TTL_HOURS, 0 pour désactiver le cache)
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DEMOGRAPHIQUES_DHS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "dhs")
+)
+DEFAULT_TTL_HOURS = float(os.environ.get("DEMOGRAPHIQUES_DHS_CACHE_TTL_HOURS", "24"))
+# Paramètres dont l'ordre des valeurs (séparées par des virgules) n'influe pas sur la réponse
+LIST_PARAMS = ("countryIds", "indicatorIds", "surveyIds", "returnFields")
+# Paramètres exclus de la clé du cache (la page désigne un fichier de l'instantané de la requête)
+UNCACHED_PARAMS = ("apiKey", "page")
+SNAPSHOT_MANIFEST = "manifest.json"
+
+
+class RateLimiter:
+    """Espace les requêtes d'au moins 1/rate seconde, tous threads confondus."""
+
+    def __init__(self, rate=MAX_REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ResponseCache:
+    """
+    Réponses JSON de l'API stockées par requête : toutes les pages d'une même
+    requête (clé = empreinte de la requête normalisée, sans le numéro de page)
+    forment un instantané `<cache_dir>/<clé>/page-<n>.json.gz`, décrit par
+    `manifest.json`. Un instantané plus ancien que `ttl_hours` est ignoré en
+    entier et remplacé d'un bloc : les pages d'une requête proviennent donc
+    toujours d'un même téléchargement.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_hours=DEFAULT_TTL_HOURS):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize(url, params):
+        """Forme canonique d'une requête : paramètres triés, listes triées et dédoublonnées."""
+        canonical = {}
+        for name, value in params.items():
+            if name in UNCACHED_PARAMS:
+                continue
+            value = str(value)
+            if name in LIST_PARAMS:
+                value = ",".join(sorted({v.strip() for v in value.split(",") if v.strip()}))
+            canonical[name] = value
+        return url.rstrip("/") + "?" + "&".join(f"{k}={canonical[k]}" for k in sorted(canonical))
+
+    def _path(self, url, params):
+        return os.path.join(self.cache_dir, hashlib.sha256(self.normalize(url, params).encode("utf-8")).hexdigest())
+
+    def open(self, url, params):
+        """
+        Fichiers des pages (1 à TotalPages) de l'instantané de la requête, ou
+        None s'il est absent, incomplet ou expiré.
+        """
+        path = self._path(url, params)
+        try:
+            with open(os.path.join(path, SNAPSHOT_MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - manifest["created_at"] > self.ttl_seconds:
+            return None
+        pages = [os.path.join(path, _page_file(page)) for page in range(1, manifest["pages"] + 1)]
+        return pages if all(os.path.exists(p) for p in pages) else None
+
+    def writer(self, url, params):
+        """Écriture (atomique, voir SnapshotWriter) de toutes les pages d'une requête."""
+        return SnapshotWriter(self.cache_dir, self._path(url, params))
+
+
+def _page_file(page):
+    return f"page-{page}.json.gz"
+
+
+class CacheWriter:
+    """
+    Réponse en cours d'écriture dans un fichier temporaire compressé : elle
+    ne remplace l'entrée du cache qu'à l'appel de `commit()`.
+    """
+
+    def __init__(self, cache_dir, path):
+        self.path = path
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+        self._raw = os.fdopen(fd, "wb")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+
+    def write(self, chunk):
+        self._file.write(chunk)
+
+    def _close(self):
+        self._file.close()
+        self._raw.close()
+
+    def commit(self):
+        self._close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._close()
+        os.remove(self._tmp_path)
+
+
+class SnapshotWriter:
+    """
+    Instantané d'une requête en cours de téléchargement, dans un dossier
+    temporaire : il ne remplace l'instantané précédent qu'à l'appel de
+    `commit()`, une fois toutes les pages reçues.
+    """
+
+    def __init__(self, cache_dir, path):
+        self.path = path
+        self.created_at = time.time()
+        self._tmp_dir = tempfile.mkdtemp(dir=cache_dir, suffix=".part")
+
+    def page(self, page):
+        """Écriture d'une page de l'instantané (voir CacheWriter)."""
+        return CacheWriter(self._tmp_dir, os.path.join(self._tmp_dir, _page_file(page)))
+
+    def commit(self, total_pages):
+        with open(os.path.join(self._tmp_dir, SNAPSHOT_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"created_at": self.created_at, "pages": total_pages}, f)
+        # L'ancien instantané n'est supprimé qu'une fois écarté du chemin final
+        old_dir = None
+        if os.path.exists(self.path):
+            old_dir = tempfile.mkdtemp(dir=os.path.dirname(self.path), suffix=".old")
+            os.replace(self.path, os.path.join(old_dir, "snapshot"))
+        os.replace(self._tmp_dir, self.path)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    def abort(self):
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+def batch_indicators(indicator_ids, max_length=MAX_INDICATOR_PARAM_LENGTH):
+    """Découpe la liste d'indicateurs en lots dont le paramètre encodé ne dépasse pas `max_length`."""
+    batches, current = [], []
+    for indicator_id in indicator_ids:
+        if current and len(quote(",".join(current + [indicator_id]))) > max_length:
+            batches.append(current)
+            current = []
+        current.append(indicator_id)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _stream(chunks, writer=None):
+    """Transmet les morceaux d'une réponse en les comptant (et en les copiant dans le cache)."""
+    for chunk in chunks:
+        metrics.add("bytes_downloaded", len(chunk))
+        if writer is not None:
+            writer.write(chunk)
+        yield chunk
+
+
+def _check_frame(meta, frame):
+    if frame is None:
+        message = meta.get("error", meta) if isinstance(meta, dict) else meta
+        raise ValueError(f"Réponse d'erreur de l'API DHS : {message}")
+    return int(meta.get("TotalPages") or 1), frame
+
+
+def _read_cached_page(path):
+    """Relit une page de l'instantané en cache et renvoie (TotalPages, DataFrame de la page)."""
+    with gzip.open(path, "rb") as f:
+        meta, frame = dhs_stream.parse_payload(iter(lambda: f.read(dhs_stream.CHUNK_SIZE), b""))
+    metrics.add("cache_hits")
+    return _check_frame(meta, frame)
+
+
+def _get_page(session, url, params, limiter, writer=None):
+    """
+    Télécharge une page de résultats (copiée dans `writer`, un CacheWriter,
+    si elle est valide) et renvoie (TotalPages, DataFrame de la page). La
+    réponse est analysée au fil de sa réception, sans être chargée
+    entièrement en mémoire.
+    """
+    limiter.wait()
+    start = time.perf_counter()
+    try:
+        with session.get(url, params=params, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            meta, frame = dhs_stream.parse_payload(_stream(response.iter_content(dhs_stream.CHUNK_SIZE), writer))
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    # Durée de réception, analyse comprise (les deux sont simultanées)
+    metrics.add("download_s", time.perf_counter() - start)
+    metrics.add("api_pages")
+    if writer is not None:
+        metrics.add("cache_misses")
+        # Seules les réponses valides sont conservées
+        if frame is not None:
+            writer.commit()
+        else:
+            writer.abort()
+    return _check_frame(meta, frame)
+
+
+def _resolve_cache(cache):
+    """Cache par défaut (sauf si DEFAULT_TTL_HOURS vaut 0), ou None si désactivé (False)."""
+    if cache is None:
+        cache = ResponseCache() if DEFAULT_TTL_HOURS > 0 else False
+    return cache or None
+
+
+def _base_params(params):
+    base = {"f": "json", "perPage": PER_PAGE, **(params or {})}
+    if API_KEY:
+        base["apiKey"] = API_KEY
+    return base
+
+
+def _read_snapshots(executor, url, queries, cache):
+    """
+    Relit les instantanés en cache encore valides des requêtes `queries`.
+    Renvoie {position de la requête: DataFrames de ses pages} ; une requête
+    dont une page est illisible (fichier tronqué) est absente du résultat.
+    """
+    snapshots = {i: cache.open(url, p) for i, p in enumerate(queries)} if cache is not None else {}
+    cached = {}
+    for i, pages in snapshots.items():
+        if pages is None:
+            continue
+        try:
+            cached[i] = [frame for _, frame in executor.map(_read_cached_page, pages)]
+        except (OSError, EOFError, ValueError):
+            metrics.log(f"AVERTISSEMENT: Cache DHS illisible pour {cache.normalize(url, queries[i])}, "
+                        "nouveau téléchargement.")
+    return cached
+
+
+def _fetch_all_pages(http, url, queries, limiter, cache, max_workers):
+    """
+    Récupère toutes les pages de chaque requête de `queries` et renvoie les
+    DataFrames dans l'ordre requête puis page. Les pages d'une requête sont
+    lues ensemble dans le cache ou téléchargées ensemble depuis l'API.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        cached = _read_snapshots(executor, url, queries, cache)
+        missing = [i for i in range(len(queries)) if i not in cached]
+        writers = {i: cache.writer(url, queries[i]) for i in missing} if cache is not None else {}
+        try:
+            # Première page de chaque requête (elle indique le nombre total de pages), puis toutes les suivantes
+            first_pages = dict(zip(missing, executor.map(
+                lambda i: _get_page(http, url, {**queries[i], "page": 1}, limiter,
+                                    writers[i].page(1) if i in writers else None), missing)))
+            tasks = [(i, page) for i in missing for page in range(2, first_pages[i][0] + 1)]
+            other_pages = iter(executor.map(
+                lambda t: _get_page(http, url, {**queries[t[0]], "page": t[1]}, limiter,
+                                    writers[t[0]].page(t[1]) if t[0] in writers else None)[1], tasks))
+            for i in missing:
+                total_pages, first_frame = first_pages[i]
+                cached[i] = [first_frame] + [next(other_pages) for _ in range(total_pages - 1)]
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        for i, writer in writers.items():
+            writer.commit(len(cached[i]))
+    return [frame for i in range(len(queries)) for frame in cached[i]]
+
+
+def fetch_dhs_data(country_ids, indicator_ids=None, params=None, session=None, base_url=API_BASE_URL,
+                   max_workers=MAX_WORKERS, limiter=None, return_fields=None, cache=None):
+    """
+    Interroge /data pour les pays (codes DHS, ex. "BJ") et indicateurs demandés
+    (tous si `indicator_ids` est vide) et renvoie toutes les pages de tous les
+    lots dans un seul DataFrame, dans l'ordre lot puis page. `params` complète
+    la requête (ex. {"breakdown": "subnational"}) ; `return_fields` limite les
+    colonnes renvoyées par l'API. `cache` est un ResponseCache (par défaut celui
+    de DEFAULT_CACHE_DIR, désactivé si DEFAULT_TTL_HOURS vaut 0) ou False.
+    Lève `requests.exceptions.RequestException` ou ValueError en cas d'échec.
+    """
+    http = session if session is not None else requests.Session()
+    limiter = limiter if limiter is not None else RateLimiter()
+    countries = [country_ids] if isinstance(country_ids, str) else list(country_ids)
+    base_params = _base_params({"countryIds": ",".join(countries), **(params or {})})
+    if return_fields:
+        base_params["returnFields"] = ",".join(return_fields)
+    batches = batch_indicators(list(indicator_ids)) if indicator_ids else [None]
+    batch_params = [base_params if batch is None else {**base_params, "indicatorIds": ",".join(batch)}
+                    for batch in batches]
+
+    frames = _fetch_all_pages(http, f"{base_url}/data", batch_params, limiter, _resolve_cache(cache), max_workers)
+    df = dhs_stream.concat_frames(frames)
+    metrics.add("rows_out", len(df))
+    return df
+
+
+def fetch_dhs_endpoint(endpoint, params=None, session=None, base_url=API_BASE_URL,
+                       max_workers=MAX_WORKERS, limiter=None, cache=None):
+    """
+    Interroge un autre point d'accès paginé de l'API (ex. "indicators",
+    "surveys") et renvoie toutes ses pages dans un seul DataFrame.
+    Lève `requests.exceptions.RequestException` ou ValueError en cas d'échec.
+    """
+    http = session if session is not None else requests.Session()
+    limiter = limiter if limiter is not None else RateLimiter()
+    frames = _fetch_all_pages(http, f"{base_url}/{endpoint}", [_base_params(params)], limiter,
+                              _resolve_cache(cache), max_workers)
+    return dhs_stream.concat_frames(frames)
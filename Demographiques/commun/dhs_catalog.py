@@ -0,0 +1,236 @@
+# ==============================================================================
+# CATALOGUE LOCAL DES INDICATEURS DHS (SQLITE + RECHERCHE PLEIN TEXTE)
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Trouver un indicateur DHS sans télécharger de données. Le
+#            catalogue est construit à partir des points d'accès /indicators
+#            (libellés, définitions, thèmes) et /surveys (enquêtes publiées),
+#            avec pour chaque pays la liste des indicateurs disponibles.
+#            La mise à jour est incrémentale :
+#            - seuls les indicateurs nouveaux ou modifiés sont réindexés ;
+#            - la disponibilité d'un pays n'est recalculée que si la liste
+#              de ses enquêtes a changé.
+#            La recherche (FTS5, insensible aux accents) se fait hors ligne.
+# Utilisation : voir DHS/1_main.py
+# ==============================================================================
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from . import dhs_api
+from . import metrics
+
+# --- CONFIGURATION ---
+# Base SQLite du catalogue (surchargeable par DEMOGRAPHIQUES_DHS_CATALOG)
+CATALOG_PATH = os.environ.get(
+    "DEMOGRAPHIQUES_DHS_CATALOG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "dhs_catalog.sqlite")
+)
+# Au-delà de cet âge, la liste des indicateurs est relue même sans nouvelle enquête
+INDICATORS_MAX_AGE_DAYS = 7
+# Colonnes de /indicators conservées dans le catalogue
+INDICATOR_FIELDS = {
+    "IndicatorId": "indicator_id",
+    "Label": "label",
+    "ShortName": "short_name",
+    "Definition": "definition",
+    "Level1": "level1",
+    "Level2": "level2",
+    "Level3": "level3",
+    "MeasurementType": "measurement_type",
+}
+# Colonnes indexées en plein texte
+SEARCH_FIELDS = ["label", "short_name", "definition", "level1", "level2", "level3"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS indicators (
+    {', '.join(f'{c} TEXT' + (' PRIMARY KEY' if c == 'indicator_id' else '') for c in INDICATOR_FIELDS.values())},
+    row_hash TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS indicators_fts USING fts5(
+    indicator_id UNINDEXED, {', '.join(SEARCH_FIELDS)}, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS surveys (
+    survey_id TEXT PRIMARY KEY,
+    country_code TEXT NOT NULL,
+    survey_year INTEGER,
+    survey_type TEXT,
+    release_date TEXT
+);
+CREATE TABLE IF NOT EXISTS availability (
+    country_code TEXT NOT NULL,
+    indicator_id TEXT NOT NULL,
+    PRIMARY KEY (country_code, indicator_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def open_catalog(path=CATALOG_PATH):
+    """Ouvre (et crée au besoin) la base du catalogue."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _row_hash(values):
+    return hashlib.sha256(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _indicator_rows(df):
+    """Lignes (colonnes de INDICATOR_FIELDS, dans l'ordre) d'une réponse /indicators."""
+    df = df.reindex(columns=list(INDICATOR_FIELDS)).astype(object).where(lambda d: d.notna(), None)
+    return [[None if v is None else str(v) for v in row] for row in df.itertuples(index=False, name=None)]
+
+
+def update_indicators(conn, df):
+    """
+    Fusionne une réponse /indicators dans le catalogue : insère les nouveaux
+    indicateurs, réindexe ceux dont le contenu a changé et retire ceux qui ont
+    disparu. Renvoie (ajoutés, modifiés, supprimés).
+    """
+    known = dict(conn.execute("SELECT indicator_id, row_hash FROM indicators"))
+    columns = list(INDICATOR_FIELDS.values())
+    search_positions = [columns.index(c) for c in SEARCH_FIELDS]
+    added = changed = 0
+    seen = set()
+    for row in _indicator_rows(df):
+        indicator_id = row[0]
+        if not indicator_id or indicator_id in seen:
+            continue
+        seen.add(indicator_id)
+        row_hash = _row_hash(row)
+        if known.get(indicator_id) == row_hash:
+            continue
+        if indicator_id in known:
+            changed += 1
+            conn.execute("DELETE FROM indicators_fts WHERE indicator_id = ?", (indicator_id,))
+        else:
+            added += 1
+        conn.execute(f"INSERT OR REPLACE INTO indicators ({', '.join(columns)}, row_hash) "
+                     f"VALUES ({', '.join('?' * (len(columns) + 1))})", row + [row_hash])
+        conn.execute(f"INSERT INTO indicators_fts (indicator_id, {', '.join(SEARCH_FIELDS)}) "
+                     f"VALUES ({', '.join('?' * (len(SEARCH_FIELDS) + 1))})",
+                     [indicator_id] + [row[i] for i in search_positions])
+    removed = [i for i in known if i not in seen]
+    for indicator_id in removed:
+        conn.execute("DELETE FROM indicators WHERE indicator_id = ?", (indicator_id,))
+        conn.execute("DELETE FROM indicators_fts WHERE indicator_id = ?", (indicator_id,))
+        conn.execute("DELETE FROM availability WHERE indicator_id = ?", (indicator_id,))
+    return added, changed, len(removed)
+
+
+def _survey_signature(df_country):
+    return _row_hash(sorted(df_country["SurveyId"].astype(str)))
+
+
+def update_catalog(conn, countries, session=None, base_url=dhs_api.API_BASE_URL, force=False):
+    """
+    Met à jour le catalogue pour les pays demandés (codes DHS, ex. "BJ") et
+    renvoie un résumé des changements. Sans nouvelle enquête, seule la liste
+    des enquêtes est téléchargée (la liste des indicateurs est relue au plus
+    tous les INDICATORS_MAX_AGE_DAYS jours).
+    Lève `requests.exceptions.RequestException` ou ValueError en cas d'échec.
+    """
+    summary = {"indicateurs_ajoutes": 0, "indicateurs_modifies": 0, "indicateurs_supprimes": 0,
+               "enquetes": 0, "pays_actualises": []}
+    # La liste des enquêtes est toujours relue (hors cache) : c'est elle qui signale les nouveautés
+    df_surveys = dhs_api.fetch_dhs_endpoint("surveys", {"countryIds": ",".join(countries)},
+                                            session=session, base_url=base_url, cache=False)
+    if df_surveys.empty:
+        return summary
+    df_surveys = df_surveys[df_surveys["DHS_CountryCode"].isin(countries)]
+    summary["enquetes"] = len(df_surveys)
+
+    # Pays dont la liste d'enquêtes a changé depuis la dernière mise à jour
+    stale = [c for c in countries
+             if force or _get_meta(conn, f"enquetes:{c}") != _survey_signature(df_surveys[df_surveys["DHS_CountryCode"] == c])]
+
+    last_update = float(_get_meta(conn, "indicateurs:maj") or 0)
+    with conn:
+        if force or stale or time.time() - last_update > INDICATORS_MAX_AGE_DAYS * 86400:
+            df_indicators = dhs_api.fetch_dhs_endpoint("indicators", session=session, base_url=base_url, cache=False)
+            added, changed, removed = update_indicators(conn, df_indicators)
+            summary.update(indicateurs_ajoutes=added, indicateurs_modifies=changed, indicateurs_supprimes=removed)
+            _set_meta(conn, "indicateurs:maj", str(time.time()))
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO surveys (survey_id, country_code, survey_year, survey_type, release_date) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(str(r.SurveyId), str(r.DHS_CountryCode), int(r.SurveyYear), str(r.SurveyType), str(r.ReleaseDate))
+             for r in df_surveys.reindex(columns=["SurveyId", "DHS_CountryCode", "SurveyYear", "SurveyType",
+                                                  "ReleaseDate"]).itertuples(index=False)]
+        )
+
+        for country in stale:
+            # Indicateurs disponibles pour ce pays : seuls les identifiants sont demandés
+            df_available = dhs_api.fetch_dhs_endpoint(
+                "indicators", {"countryIds": country, "returnFields": "IndicatorId"},
+                session=session, base_url=base_url, cache=False
+            )
+            conn.execute("DELETE FROM availability WHERE country_code = ?", (country,))
+            if not df_available.empty:
+                conn.executemany("INSERT OR IGNORE INTO availability (country_code, indicator_id) VALUES (?, ?)",
+                                 [(country, i) for i in df_available["IndicatorId"].dropna().astype(str).unique()])
+            _set_meta(conn, f"enquetes:{country}",
+                      _survey_signature(df_surveys[df_surveys["DHS_CountryCode"] == country]))
+            summary["pays_actualises"].append(country)
+    return summary
+
+
+def _fts_query(text):
+    """Requête FTS5 : chaque mot doit apparaître (préfixe accepté), caractères spéciaux ignorés."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search(conn, text="", country=None, limit=20):
+    """
+    Recherche plein texte dans les libellés, définitions et thèmes des
+    indicateurs (tous si `text` est vide), éventuellement restreinte aux
+    indicateurs disponibles pour `country`. Résultats triés par pertinence.
+    """
+    columns = ", ".join(f"i.{c}" for c in INDICATOR_FIELDS.values())
+    query = _fts_query(text)
+    if query:
+        sql = (f"SELECT {columns} FROM indicators_fts f JOIN indicators i ON i.indicator_id = f.indicator_id "
+               f"WHERE indicators_fts MATCH ?")
+        params = [query]
+    else:
+        sql = f"SELECT {columns} FROM indicators i WHERE 1 = 1"
+        params = []
+    if country:
+        sql += " AND i.indicator_id IN (SELECT indicator_id FROM availability WHERE country_code = ?)"
+        params.append(country)
+    sql += " ORDER BY bm25(indicators_fts)" if query else " ORDER BY i.label"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    start = time.perf_counter()
+    df = pd.read_sql_query(sql, conn, params=params)
+    metrics.timing("recherche_catalogue", time.perf_counter() - start, requete=text, pays=country)
+    return df
+
+
+def available_countries(conn, indicator_id):
+    """Codes des pays pour lesquels l'indicateur est disponible."""
+    return [r[0] for r in conn.execute(
+        "SELECT country_code FROM availability WHERE indicator_id = ? ORDER BY country_code", (indicator_id,))]
@@ -0,0 +1,297 @@
+# ==============================================================================
+# ANALYSE INCRÉMENTALE DES RÉPONSES JSON DE L'API DHS
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Convertir une réponse de l'API DHS en DataFrame sans jamais la
+#            garder entière en mémoire sous forme d'octets, d'arbre de
+#            dictionnaires et de colonnes d'objets :
+#            - les octets sont lus par morceaux et les enregistrements de
+#              "Data" décodés un à un (json.JSONDecoder.raw_decode) ;
+#            - chaque valeur est aussitôt rangée dans une colonne typée :
+#              codes entiers + dictionnaire pour les libellés répétés
+#              (Indicator, CharacteristicLabel, SurveyId...), tableau de
+#              flottants pour les nombres ;
+#            - les colonnes deviennent des catégories et des entiers compacts.
+#            La mémoire de pointe est donc celle des colonnes finales plus un
+#            morceau de réponse.
+# ==============================================================================
+
+import codecs
+import json
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Taille des morceaux lus sur le réseau ou dans le cache
+CHUNK_SIZE = 64 * 1024
+# Nombre d'enregistrements décodés avant d'être rangés dans les colonnes
+BATCH_SIZE = 4096
+
+NAN = float("nan")
+TEXT_TYPES = {str, type(None)}
+NUMBER_TYPES = {int, float, bool, type(None)}
+# Nombres écrits sans partie décimale dans le JSON (seules colonnes converties en entiers)
+INTEGER_TYPES = {int, bool, type(None)}
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class _Column:
+    """
+    Colonne en construction. Son type est fixé par la première valeur non
+    nulle : texte -> codes de dictionnaire, nombre -> flottants ; une valeur
+    d'un autre type la convertit en colonne d'objets. Une colonne de nombres
+    n'est rendue en entiers que si toutes ses valeurs étaient des entiers JSON.
+    """
+
+    def __init__(self, leading_missing=0):
+        self.kind = None
+        self.pending = leading_missing
+        self.values = None
+        self.labels = None
+        self.integral = True
+
+    def _start(self, value):
+        if isinstance(value, str):
+            self.kind, self.labels = "cat", {}
+            self.values = array("i", [-1]) * self.pending
+        elif type(value) in NUMBER_TYPES:
+            self.kind = "num"
+            self.values = array("d", [NAN]) * self.pending
+        else:
+            self.kind = "obj"
+            self.values = [None] * self.pending
+
+    def _to_object(self):
+        if self.kind == "cat":
+            labels = list(self.labels)
+            self.values = [labels[c] if c >= 0 else None for c in self.values]
+        elif self.kind == "num":
+            self.values = [None if v != v else v for v in self.values]
+        self.kind, self.labels = "obj", None
+
+    def extend(self, values):
+        """Ajoute un lot de valeurs (None pour une valeur manquante)."""
+        if self.kind is None:
+            first = next((v for v in values if v is not None), None)
+            if first is None:
+                self.pending += len(values)
+                return
+            self._start(first)
+        types = set(map(type, values))
+        if self.kind == "cat" and types <= TEXT_TYPES:
+            labels = self.labels
+            # setdefault attribue le code suivant aux nouveaux libellés
+            self.values.extend([-1 if v is None else labels.setdefault(v, len(labels)) for v in values])
+            return
+        if self.kind == "num" and types <= NUMBER_TYPES:
+            # 12.0 reste un flottant même si toutes les valeurs de la page sont entières
+            self.integral = self.integral and types <= INTEGER_TYPES
+            self.values.extend([NAN if v is None else v for v in values])
+            return
+        if self.kind != "obj":
+            self._to_object()
+        self.values.extend(values)
+
+    def to_series(self, name):
+        if self.kind is None:
+            return pd.Series([None] * self.pending, dtype=object, name=name)
+        if self.kind == "cat":
+            codes = np.frombuffer(self.values, dtype=np.int32).copy()
+            # Catégories triées : regroupements et pivots donnent le même ordre qu'avec du texte
+            categorical = pd.Categorical.from_codes(codes, categories=list(self.labels))
+            return pd.Series(categorical.reorder_categories(sorted(self.labels)), name=name)
+        if self.kind == "num":
+            values = np.frombuffer(self.values, dtype=np.float64).copy()
+            # Colonnes entières (années, identifiants, indicateurs booléens) : entiers compacts
+            if self.integral and not np.isnan(values).any():
+                return pd.Series(pd.to_numeric(values.astype(np.int64), downcast="integer"), name=name)
+            return pd.Series(values, name=name)
+        return pd.Series(self.values, dtype=object, name=name)
+
+
+class ColumnBuilder:
+    """
+    Accumule des enregistrements (dictionnaires) en colonnes typées. Les
+    enregistrements sont rangés par lots de BATCH_SIZE, colonne par colonne.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+        self._batch = []
+
+    def append(self, record):
+        self._batch.append(record)
+        if len(self._batch) >= BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        # Champs du lot : ceux du premier enregistrement, puis les éventuels champs supplémentaires
+        keys = list(batch[0])
+        extra = set().union(*batch).difference(keys)
+        for key in keys + sorted(extra):
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = _Column(leading_missing=self.rows)
+            column.extend([r.get(key) for r in batch])
+        # Champs absents de tout le lot
+        for key, column in self.columns.items():
+            if key not in batch[0] and key not in extra:
+                column.extend([None] * len(batch))
+        self.rows += len(batch)
+
+    def to_frame(self):
+        self._flush()
+        return pd.DataFrame({name: column.to_series(name) for name, column in self.columns.items()})
+
+
+class _Buffer:
+    """Texte décodé d'un flux d'octets, complété à la demande."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Ajoute le morceau suivant au tampon, dont la partie déjà consommée est
+        abandonnée ; renvoie False à la fin du flux.
+        """
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if chunk:
+                self.text, self.pos = self.text[self.pos:] + self._decoder.decode(chunk), 0
+                return True
+        self.text, self.pos = self.text[self.pos:] + self._decoder.decode(b"", final=True), 0
+        self.eof = True
+        return True
+
+    def peek(self):
+        """Prochain caractère significatif, sans le consommer."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise ValueError("Réponse JSON de l'API DHS tronquée.")
+
+    def take(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Réponse JSON de l'API DHS invalide : '{char}' inattendu (position {self.pos}).")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Décode la valeur JSON suivante (complétant le tampon si elle est coupée)."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # Un nombre en fin de tampon peut être incomplet : on attend le séparateur suivant
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Réponse JSON de l'API DHS invalide : {e}") from None
+            self.fill()
+
+    def read_array(self, callback):
+        """
+        Décode un à un les éléments du tableau dont '[' vient d'être lu et les
+        passe à `callback`. Boucle critique : le décodeur C est appelé directement.
+        """
+        scan = _DECODER.scan_once
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            text, pos = self.text, self.pos
+            n = len(text)
+            try:
+                while True:
+                    while pos < n and text[pos] in _WHITESPACE:
+                        pos += 1
+                    value, end = scan(text, pos)
+                    while end < n and text[end] in _WHITESPACE:
+                        end += 1
+                    # Séparateur pas encore reçu : l'élément sera relu après le morceau suivant
+                    if end >= n:
+                        raise StopIteration
+                    callback(value)
+                    separator, pos = text[end], end + 1
+                    if separator == "]":
+                        self.pos = pos
+                        return
+                    if separator != ",":
+                        raise ValueError(f"Réponse JSON de l'API DHS invalide : '{separator}' inattendu (position {end}).")
+            except (StopIteration, json.JSONDecodeError):
+                self.pos = pos
+                if not self.fill():
+                    raise ValueError("Réponse JSON de l'API DHS tronquée ou invalide.") from None
+
+
+def parse_payload(chunks):
+    """
+    Analyse une réponse de l'API reçue par morceaux d'octets. Renvoie
+    (métadonnées, DataFrame des enregistrements de "Data") ; le DataFrame vaut
+    None si la réponse n'a pas de champ "Data" (réponse d'erreur), et les
+    métadonnées sont alors la réponse entière.
+    """
+    buf = _Buffer(chunks)
+    if buf.peek() != "{":
+        return buf.value(), None
+    buf.take("{")
+    meta, frame = {}, None
+    if buf.peek() == "}":
+        return meta, frame
+    while True:
+        key = buf.value()
+        buf.take(":")
+        if key == "Data" and buf.peek() == "[":
+            buf.take("[")
+            builder = ColumnBuilder()
+            buf.read_array(builder.append)
+            frame = builder.to_frame()
+        else:
+            meta[key] = buf.value()
+        if buf.take(",}") == "}":
+            return meta, frame
+
+
+def concat_frames(frames):
+    """
+    Concatène des DataFrames issus de parse_payload en conservant les
+    catégories (leurs dictionnaires sont fusionnés au lieu de repasser en objets).
+    """
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return pd.DataFrame()
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    frames = [f.reindex(columns=columns) if list(f.columns) != columns else f for f in frames]
+    for column in columns:
+        series = [f[column] for f in frames]
+        is_categorical = [isinstance(c.dtype, pd.CategoricalDtype) for c in series]
+        # Une page où le champ est toujours vide ne doit pas faire perdre les catégories
+        if any(is_categorical) and all(cat or c.isna().all() for cat, c in zip(is_categorical, series)):
+            categories = pd.Index([])
+            for c, cat in zip(series, is_categorical):
+                if cat:
+                    new = c.cat.categories
+                    categories = new if categories.empty else categories.append(new[~new.isin(categories)])
+            dtype = pd.CategoricalDtype(categories.sort_values())
+            for f in frames:
+                f[column] = f[column].astype(dtype)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,280 @@
+# ==============================================================================
+# TÉLÉCHARGEMENT PARALLÈLE ET REPRENABLE DE GROS FICHIERS
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Télécharger des fichiers volumineux (rasters GeoTIFF WorldPop)
+#            de façon fiable sur une liaison lente ou instable :
+#            - plusieurs fichiers en parallèle (pool borné de threads) ;
+#            - gros blocs de lecture (taille configurable) ;
+#            - un fichier interrompu (`<nom>.part`) est repris là où il
+#              s'était arrêté grâce aux requêtes HTTP `Range` ;
+#            - la taille (et l'empreinte MD5 si le serveur en fournit une,
+#              y compris après une reprise) est vérifiée avant le renommage
+#              atomique vers le nom final.
+#            Un manifeste (`.manifest.json`) garde la taille et le SHA-256 de
+#            chaque fichier terminé, pour reconnaître sans réseau les fichiers
+#            complets et contrôler leur intégrité à la demande.
+# ==============================================================================
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from . import metrics
+
+# --- CONFIGURATION ---
+# Taille des blocs lus sur le réseau (surchargeable par DEMOGRAPHIQUES_DOWNLOAD_CHUNK_MB)
+CHUNK_SIZE = int(float(os.environ.get("DEMOGRAPHIQUES_DOWNLOAD_CHUNK_MB", "4")) * 1024 * 1024)
+MAX_DOWNLOAD_WORKERS = 4
+# Tentatives par fichier ; chacune reprend là où la précédente s'est arrêtée
+MAX_ATTEMPTS = 5
+RETRY_DELAY_S = 2
+REQUEST_TIMEOUT = 120
+PART_SUFFIX = ".part"
+MANIFEST_FILE = ".manifest.json"
+
+# Statuts renvoyés par download_file
+DOWNLOADED, RESUMED, UP_TO_DATE = "téléchargé", "repris", "à jour"
+
+
+class Manifest:
+    """
+    Manifeste d'un dossier de téléchargement :
+    {nom de fichier: {"url", "size", "sha256", "etag", "last_modified", "content_md5"}}.
+    Utilisable depuis plusieurs threads ; chaque mise à jour est écrite de façon atomique.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def get(self, name):
+        with self._lock:
+            return self._entries.get(name)
+
+    def update(self, name, entry, remove=()):
+        """Enregistre `entry` pour `name` (et retire les entrées `remove`)."""
+        with self._lock:
+            self._entries[name] = entry
+            for key in remove:
+                self._entries.pop(key, None)
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".json")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def file_sha256(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 du contenu d'un fichier."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _hash_existing(path, hashers, chunk_size):
+    """Met à jour les empreintes avec le contenu déjà reçu d'un fichier partiel."""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            for h in hashers:
+                h.update(chunk)
+
+
+def _total_size(response, offset):
+    """Taille totale annoncée par le serveur (Content-Range pour une reprise, sinon Content-Length)."""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = response.headers.get("Content-Length")
+    return offset + int(length) if length is not None else None
+
+
+def _remote_size(session, url):
+    """Taille annoncée par une requête HEAD (None si inconnue)."""
+    response = session.head(url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def _fetch_to_part(session, url, part_path, manifest, chunk_size):
+    """
+    Télécharge `url` dans `part_path`, en reprenant à la fin du fichier partiel
+    existant si le serveur accepte les requêtes Range pour le même contenu
+    (validateurs ETag / Last-Modified mémorisés dans le manifeste).
+    Renvoie (taille attendue, sha256, en-têtes utiles, repris).
+    Lève ValueError si le fichier dépasse la taille annoncée ou si l'empreinte
+    MD5 du fichier complet ne correspond pas à celle (Content-MD5) annoncée par
+    la première réponse, mémorisée dans le manifeste pour les reprises.
+    """
+    part_name = os.path.basename(part_path)
+    entry = manifest.get(part_name) or {}
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        # La reprise n'a lieu que si le fichier distant n'a pas changé depuis le début du téléchargement
+        validator = entry.get("etag") or entry.get("last_modified")
+        if validator:
+            headers["If-Range"] = validator
+
+    with session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        if response.status_code == 416 and offset:
+            # Fichier partiel déjà complet (ou plus long que le fichier distant) : vérifié ci-dessous
+            total, resumed = _remote_size(session, url), True
+        else:
+            response.raise_for_status()
+            resumed = response.status_code == 206
+            if not resumed:
+                offset = 0  # Range ignorée ou contenu modifié : on repart de zéro
+            total = _total_size(response, offset)
+        if resumed:
+            # Réponse partielle : validateurs et empreinte sont ceux du premier téléchargement
+            info = {key: entry.get(key) for key in ("etag", "last_modified", "content_md5")}
+        else:
+            info = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+                    "content_md5": response.headers.get("Content-MD5")}
+        content_md5 = info["content_md5"]
+
+        sha = hashlib.sha256()
+        md5 = hashlib.md5() if content_md5 else None
+        hashers = [h for h in (sha, md5) if h is not None]
+        if offset:
+            _hash_existing(part_path, hashers, chunk_size)
+        if response.status_code != 416:
+            # Validateurs et empreinte mémorisés dès le début, pour une éventuelle reprise ultérieure
+            manifest.update(part_name, {"url": url, **info})
+            start = time.perf_counter()
+            received = 0
+            try:
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        for h in hashers:
+                            h.update(chunk)
+                        received += len(chunk)
+            finally:
+                # Octets conservés même en cas de coupure : ils ne seront pas redemandés
+                metrics.add("bytes_downloaded", received)
+                metrics.add("download_s", time.perf_counter() - start)
+
+    size = os.path.getsize(part_path)
+    if total is not None and size < total:
+        # Connexion fermée avant la fin : traité comme une coupure (nouvelle tentative avec reprise)
+        raise requests.exceptions.ConnectionError(f"Téléchargement incomplet : {size}/{total} octets reçus.")
+    if total is not None and size != total:
+        raise ValueError(f"Taille incorrecte pour '{url}' : {size} octets reçus, {total} attendus.")
+    if content_md5 and base64.b64encode(md5.digest()).decode("ascii") != content_md5:
+        raise ValueError(f"Empreinte MD5 incorrecte pour '{url}'.")
+    return size, sha.hexdigest(), info, resumed and offset > 0
+
+
+def download_file(url, dest_path, session=None, chunk_size=CHUNK_SIZE, verify=False, manifest=None,
+                  max_attempts=MAX_ATTEMPTS):
+    """
+    Télécharge `url` vers `dest_path` de façon reprenable. Un fichier déjà
+    présent et conforme au manifeste n'est pas retéléchargé (avec `verify`,
+    son SHA-256 est recalculé) ; un fichier tronqué est complété.
+    Renvoie DOWNLOADED, RESUMED ou UP_TO_DATE.
+    Lève `requests.exceptions.RequestException` ou ValueError après `max_attempts` échecs.
+    """
+    http = session if session is not None else requests.Session()
+    directory = os.path.dirname(dest_path) or "."
+    name = os.path.basename(dest_path)
+    part_path = dest_path + PART_SUFFIX
+    manifest = manifest if manifest is not None else Manifest(directory)
+    entry = manifest.get(name)
+
+    if os.path.exists(dest_path):
+        size = os.path.getsize(dest_path)
+        if entry and entry.get("size") == size and (not verify or file_sha256(dest_path, chunk_size) == entry["sha256"]):
+            return UP_TO_DATE
+        if not entry:
+            # Fichier d'une version précédente du script (sans manifeste) : comparé à la taille distante
+            remote = _remote_size(http, url)
+            if remote == size:
+                manifest.update(name, {"url": url, "size": size, "sha256": file_sha256(dest_path, chunk_size),
+                                       "etag": None, "last_modified": None, "content_md5": None})
+                return UP_TO_DATE
+            if remote is not None and size < remote:
+                metrics.log(f"AVERTISSEMENT: '{name}' est tronqué ({size}/{remote} octets), reprise du téléchargement.")
+                os.replace(dest_path, part_path)
+            else:
+                os.remove(dest_path)
+        else:
+            metrics.log(f"AVERTISSEMENT: '{name}' ne correspond pas au manifeste, nouveau téléchargement.")
+            os.remove(dest_path)
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            size, sha256, info, resumed = _fetch_to_part(http, url, part_path, manifest, chunk_size)
+            break
+        except ValueError as e:
+            # Contenu incohérent : le fichier partiel est abandonné
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            if attempt == max_attempts:
+                raise
+            metrics.log(f"AVERTISSEMENT: {e} Nouveau téléchargement de '{name}' ({attempt}/{max_attempts - 1})...")
+        except requests.exceptions.RequestException as e:
+            if attempt == max_attempts:
+                raise
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                raise
+            metrics.log(f"AVERTISSEMENT: Téléchargement de '{name}' interrompu ({e}), reprise {attempt}/{max_attempts - 1}...")
+        metrics.add("retries")
+        time.sleep(RETRY_DELAY_S * attempt)
+
+    # Renommage atomique : le nom final ne désigne jamais un fichier incomplet
+    os.replace(part_path, dest_path)
+    manifest.update(name, {"url": url, "size": size, "sha256": sha256, **info}, remove=[name + PART_SUFFIX])
+    # Une nouvelle tentative repartie de zéro (contenu incohérent) n'est pas une reprise
+    return RESUMED if resumed else DOWNLOADED
+
+
+def download_files(jobs, max_workers=MAX_DOWNLOAD_WORKERS, session=None, chunk_size=CHUNK_SIZE, verify=False,
+                   on_done=None):
+    """
+    Télécharge en parallèle une liste de (url, chemin de destination).
+    Renvoie {chemin: statut ou exception}. `on_done(chemin, résultat)` est
+    appelé à la fin de chaque fichier (ex. barre de progression).
+    """
+    http = session if session is not None else requests.Session()
+    manifests = {}
+    for _, dest_path in jobs:
+        directory = os.path.dirname(dest_path) or "."
+        if directory not in manifests:
+            os.makedirs(directory, exist_ok=True)
+            manifests[directory] = Manifest(directory)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(download_file, url, dest_path, http, chunk_size, verify,
+                        manifests[os.path.dirname(dest_path) or "."]): dest_path
+            for url, dest_path in jobs
+        }
+        for future in as_completed(futures):
+            dest_path = futures[future]
+            try:
+                results[dest_path] = future.result()
+            except (requests.exceptions.RequestException, ValueError, OSError) as e:
+                results[dest_path] = e
+            if on_done:
+                on_done(dest_path, results[dest_path])
+    return results
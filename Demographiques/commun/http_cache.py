@@ -0,0 +1,262 @@
+# ==============================================================================
+# CACHE HTTP PARTAGÉ POUR LES TÉLÉCHARGEMENTS DE LA BANQUE MONDIALE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Éviter de retélécharger les fichiers ZIP inchangés. Les contenus
+#            sont stockés une seule fois sur disque, indexés par leur empreinte
+#            SHA-256, et revalidés par requête conditionnelle (ETag /
+#            Last-Modified -> 304). La taille totale est bornée par une
+#            éviction LRU. Plusieurs processus (étapes parallèles du
+#            pipeline) peuvent partager le même cache : l'index est relu,
+#            modifié et réécrit sous un verrou de fichier.
+# ==============================================================================
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité aux threads du processus
+    fcntl = None
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+# --- CONFIGURATION ---
+# Dossier du cache (surchargeable par la variable d'environnement DEMOGRAPHIQUES_CACHE_DIR)
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DEMOGRAPHIQUES_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "http")
+)
+# Taille maximale du cache en octets (DEMOGRAPHIQUES_CACHE_MAX_MB, 2 Go par défaut)
+DEFAULT_MAX_BYTES = int(os.environ.get("DEMOGRAPHIQUES_CACHE_MAX_MB", "2048")) * 1024 * 1024
+REQUEST_TIMEOUT = 120
+CHUNK_SIZE = 1024 * 1024
+# Un blob utilisé depuis moins de ce délai (en secondes) n'est jamais évincé : un autre
+# processus peut être en train de le lire
+EVICTION_GRACE_S = 3600
+
+
+def create_session(pool_size=8):
+    """
+    Crée une session HTTP réutilisable (keep-alive) dont le pool de connexions
+    est dimensionné pour le nombre de workers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HttpCache:
+    """
+    Cache disque adressé par contenu.
+
+    - `index.json` associe chaque URL à l'empreinte de sa dernière réponse et
+      à ses validateurs HTTP (ETag, Last-Modified) ;
+    - `blobs/<sha256>` contient chaque contenu distinct une seule fois, même
+      s'il est servi par plusieurs URLs ou copié dans plusieurs dossiers ;
+    - `.lock` sérialise les modifications de l'index et les évictions entre
+      processus (fcntl.flock).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, session=None):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, ".lock")
+        self.max_bytes = max_bytes
+        self.session = session if session is not None else requests.Session()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.blob_dir, exist_ok=True)
+        with self._locked():
+            self._index = self._load_index()
+
+    # --- Index ---
+    @contextmanager
+    def _locked(self):
+        """Verrou exclusif sur le cache, entre threads et entre processus."""
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("blobs", {})
+        # Oublier les blobs supprimés manuellement du disque
+        for digest in list(index["blobs"]):
+            if not os.path.exists(self._blob_path(digest)):
+                self._drop_blob(index, digest)
+        return index
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest)
+
+    @staticmethod
+    def _drop_blob(index, digest):
+        index["blobs"].pop(digest, None)
+        for url in [u for u, e in index["entries"].items() if e["sha256"] == digest]:
+            del index["entries"][url]
+
+    # --- Téléchargement ---
+    def fetch(self, url):
+        """
+        Renvoie le chemin local du contenu de `url`, en le téléchargeant
+        uniquement si le serveur indique qu'il a changé.
+        Lève `requests.exceptions.RequestException` en cas d'erreur HTTP.
+        """
+        return self._fetch(url)
+
+    def _fetch(self, url, on_stored=None):
+        """
+        fetch ; `on_stored(chemin du blob)` est appelé sous le verrou, avant
+        qu'un autre processus ne puisse évincer le blob.
+        """
+        # Second passage sans requête conditionnelle si l'entrée a disparu entre-temps
+        for conditional in (True, False):
+            with self._locked():
+                self._index = self._load_index()
+                entry = self._index["entries"].get(url) if conditional else None
+
+            headers = {}
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            start = time.perf_counter()
+            with self.session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                if response.status_code == 304:
+                    if entry is None:
+                        # 304 sans contenu connu : ne jamais enregistrer un corps vide
+                        continue
+                    digest = entry["sha256"]
+                    hit = True
+                else:
+                    response.raise_for_status()
+                    digest, size = self._store(response)
+                    metrics.add("bytes_downloaded", size)
+                    entry = {
+                        "sha256": digest,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                    hit = False
+            metrics.add("download_s", time.perf_counter() - start)
+
+            with self._locked():
+                # Index relu : un autre processus a pu le modifier (ou évincer ce blob) pendant le téléchargement
+                self._index = self._load_index()
+                blob_path = self._blob_path(digest)
+                if not os.path.exists(blob_path):
+                    continue
+                metrics.add("cache_hits" if hit else "cache_misses")
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                self._index["entries"][url] = entry
+                self._index["blobs"][digest] = {
+                    "size": os.path.getsize(blob_path),
+                    "last_access": time.time(),
+                }
+                self._evict(keep=digest)
+                self._save_index()
+                if on_stored is not None:
+                    on_stored(blob_path)
+            return blob_path
+        raise requests.exceptions.RetryError(f"Contenu de '{url}' indisponible dans le cache malgré une réponse 304.")
+
+    def _store(self, response):
+        """
+        Écrit la réponse dans un fichier temporaire puis la range sous son
+        empreinte. Renvoie (empreinte, nombre d'octets reçus).
+        """
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    sha.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            digest = sha.hexdigest()
+            blob_path = self._blob_path(digest)
+            if os.path.exists(blob_path):
+                os.remove(tmp_path)  # Contenu déjà connu : déduplication
+            else:
+                os.replace(tmp_path, blob_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest, size
+
+    def _evict(self, keep=None):
+        """
+        Supprime les blobs les moins récemment utilisés au-delà de `max_bytes`
+        (sauf ceux utilisés depuis moins de EVICTION_GRACE_S). À appeler sous le verrou.
+        """
+        blobs = self._index["blobs"]
+        total = sum(b["size"] for b in blobs.values())
+        recent = time.time() - EVICTION_GRACE_S
+        for digest in sorted(blobs, key=lambda d: blobs[d]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep or blobs[digest]["last_access"] > recent:
+                continue
+            total -= blobs[digest]["size"]
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            self._drop_blob(self._index, digest)
+
+    def materialize(self, url, dest_path):
+        """
+        Place le contenu de `url` à `dest_path` via un lien physique vers le
+        blob (copie si le système de fichiers ne le permet pas), de sorte que
+        les fichiers identiques de plusieurs dossiers n'occupent qu'un seul
+        emplacement sur disque.
+        """
+        def place(blob_path):
+            if os.path.exists(dest_path):
+                if os.path.samefile(blob_path, dest_path):
+                    return
+                os.remove(dest_path)
+            try:
+                os.link(blob_path, dest_path)
+            except OSError:
+                shutil.copyfile(blob_path, dest_path)
+
+        # Lien créé sous le verrou : le blob ne peut pas être évincé entre-temps
+        self._fetch(url, on_stored=place)
+        return dest_path
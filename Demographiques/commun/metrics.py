@@ -0,0 +1,232 @@
+# ==============================================================================
+# RAPPORT D'EXÉCUTION STRUCTURÉ : MÉTRIQUES PAR ÉTAPE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Point unique auquel chaque étape rapporte ses mesures (octets
+#            téléchargés et débit, temps d'analyse, lignes lues et
+#            conservées, succès/échecs du cache, durées détaillées) afin de
+#            savoir où une exécution a passé son temps. Le rapport est écrit
+#            en JSON à la fin du script ; la console n'en est qu'un rendu
+#            (`log` affiche et enregistre chaque message).
+# Utilisation : metrics.start_run("C_7") en début de script, puis
+#               `with metrics.stage("..."):`, metrics.add(...), metrics.log(...).
+#               Sans exécution démarrée, les mesures sont ignorées.
+# ==============================================================================
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# --- CONFIGURATION ---
+# Dossier des rapports JSON (surchargeable par DEMOGRAPHIQUES_REPORT_DIR)
+REPORT_DIR = os.environ.get(
+    "DEMOGRAPHIQUES_REPORT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "reports")
+)
+# Étape à laquelle sont rattachées les mesures prises hors de tout bloc `stage`
+DEFAULT_STAGE = "principal"
+# Compteurs calculés par to_dict, non additionnés lors d'une fusion
+DERIVED_COUNTERS = ("throughput_mb_s",)
+
+_RUN = None
+_REPORT_DIR = REPORT_DIR
+# Le rapport de l'exécution en cours est écrit à la sortie par un seul gestionnaire atexit,
+# même si plusieurs scripts démarrent une exécution dans le même processus (interface unifiée)
+_EXIT_HOOK_REGISTERED = False
+
+
+class RunReport:
+    """
+    Mesures d'une exécution, regroupées par étape :
+    {"wall_s", "calls", "counters": {nom: valeur}, "timings": [{"label", "seconds", ...}]}.
+    Utilisable depuis plusieurs threads ; l'étape courante est propre à chaque thread.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._t0 = time.perf_counter()
+        self.stages = {}
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stage_entry(self, name):
+        return self.stages.setdefault(name, {"wall_s": 0.0, "calls": 0, "counters": {}, "timings": []})
+
+    def current_stage(self):
+        return getattr(self._local, "stage", DEFAULT_STAGE)
+
+    @contextmanager
+    def stage(self, name):
+        """Mesure la durée d'un bloc et y rattache les mesures prises dans ce thread."""
+        previous = self.current_stage()
+        self._local.stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.stage = previous
+            with self._lock:
+                entry = self._stage_entry(name)
+                entry["wall_s"] += elapsed
+                entry["calls"] += 1
+
+    def add(self, counter, value=1):
+        with self._lock:
+            counters = self._stage_entry(self.current_stage())["counters"]
+            counters[counter] = counters.get(counter, 0) + value
+
+    def timing(self, label, seconds, **dimensions):
+        with self._lock:
+            self._stage_entry(self.current_stage())["timings"].append(
+                {"label": label, "seconds": round(seconds, 6), **dimensions}
+            )
+
+    def merge(self, report):
+        """
+        Rattache à l'étape courante les compteurs, durées et messages d'un
+        rapport (RunReport.to_dict) produit dans un autre processus.
+        """
+        with self._lock:
+            entry = self._stage_entry(self.current_stage())
+            for stage_entry in report["stages"].values():
+                for counter, value in stage_entry["counters"].items():
+                    if counter not in DERIVED_COUNTERS:
+                        entry["counters"][counter] = entry["counters"].get(counter, 0) + value
+                entry["timings"].extend(stage_entry["timings"])
+            t = round(time.perf_counter() - self._t0, 3)
+            self.events.extend({"t": t, "stage": self.current_stage(), "message": event["message"]}
+                               for event in report["events"])
+
+    def log(self, message):
+        with self._lock:
+            self.events.append({
+                "t": round(time.perf_counter() - self._t0, 3),
+                "stage": self.current_stage(),
+                "message": message,
+            })
+        print(message)
+
+    def to_dict(self):
+        with self._lock:
+            stages = {}
+            for name, entry in self.stages.items():
+                counters = dict(entry["counters"])
+                # Débit calculé à partir des octets et du temps de téléchargement cumulés
+                if counters.get("download_s"):
+                    counters["throughput_mb_s"] = round(counters.get("bytes_downloaded", 0) / 2**20 / counters["download_s"], 3)
+                # Hors de tout bloc `stage`, l'étape par défaut couvre toute l'exécution
+                wall_s = time.perf_counter() - self._t0 if name == DEFAULT_STAGE and not entry["calls"] else entry["wall_s"]
+                stages[name] = {**entry, "wall_s": round(wall_s, 6), "counters": counters,
+                                "timings": list(entry["timings"])}
+            return {
+                "run": self.name,
+                "started_at": self.started_at,
+                "wall_s": round(time.perf_counter() - self._t0, 6),
+                "stages": stages,
+                "events": list(self.events),
+            }
+
+    def save(self, report_dir=REPORT_DIR):
+        """Écrit le rapport JSON (écriture atomique) et renvoie son chemin."""
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"{self.name}_{self.started_at.replace(':', '').replace('-', '')}.json")
+        fd, tmp_path = tempfile.mkstemp(dir=report_dir, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+def start_run(name, report_dir=REPORT_DIR):
+    """
+    Démarre l'exécution courante ; son rapport est écrit automatiquement à la
+    sortie du script. Une exécution encore ouverte dans le même processus est
+    d'abord clôturée (voir finish_run).
+    """
+    global _RUN, _REPORT_DIR, _EXIT_HOOK_REGISTERED
+    finish_run()
+    _RUN, _REPORT_DIR = RunReport(name), report_dir
+    if not _EXIT_HOOK_REGISTERED:
+        atexit.register(finish_run)
+        _EXIT_HOOK_REGISTERED = True
+    return _RUN
+
+
+def finish_run():
+    """Affiche et écrit le rapport de l'exécution courante, puis la clôt (sans effet s'il n'y en a pas)."""
+    global _RUN
+    run, _RUN = _RUN, None
+    if run is not None:
+        _write_report(run, _REPORT_DIR)
+
+
+def render_summary(report):
+    """Rendu console du rapport : une ligne par étape avec ses principaux compteurs."""
+    print(f"\n--- Métriques de l'exécution '{report['run']}' ({report['wall_s']:.2f} s) ---")
+    print(f"{'étape':<28} {'durée (s)':>9} {'lignes lues':>11} {'conservées':>10} "
+          f"{'Mo reçus':>9} {'Mo/s':>7} {'cache':>7}")
+    for name, entry in report["stages"].items():
+        c = entry["counters"]
+        cache = f"{c.get('cache_hits', 0)}/{c.get('cache_hits', 0) + c.get('cache_misses', 0)}"
+        print(f"{name[:28]:<28} {entry['wall_s']:>9.2f} {c.get('rows_in', 0):>11} {c.get('rows_out', 0):>10} "
+              f"{c.get('bytes_downloaded', 0) / 2**20:>9.2f} {c.get('throughput_mb_s', 0):>7.2f} {cache:>7}")
+
+
+def _write_report(run, report_dir):
+    render_summary(run.to_dict())
+    try:
+        print(f"Rapport d'exécution : '{run.save(report_dir)}'")
+    except OSError as e:
+        print(f"AVERTISSEMENT: Rapport d'exécution non écrit. Détails: {e}")
+
+
+@contextmanager
+def isolated_run(name):
+    """
+    Remplace, le temps d'un bloc, l'exécution courante par une exécution vide
+    dont le rapport n'est pas écrit : dans un processus de travail, les mesures
+    sont ainsi recueillies pour être renvoyées au processus principal (voir merge).
+    """
+    global _RUN
+    previous, _RUN = _RUN, RunReport(name)
+    try:
+        yield _RUN
+    finally:
+        _RUN = previous
+
+
+def merge(report):
+    if _RUN is not None:
+        _RUN.merge(report)
+
+
+def current_run():
+    return _RUN
+
+
+def stage(name):
+    return _RUN.stage(name) if _RUN is not None else nullcontext()
+
+
+def add(counter, value=1):
+    if _RUN is not None:
+        _RUN.add(counter, value)
+
+
+def timing(label, seconds, **dimensions):
+    if _RUN is not None:
+        _RUN.timing(label, seconds, **dimensions)
+
+
+def log(message):
+    """Affiche un message et l'enregistre dans le rapport de l'exécution courante."""
+    if _RUN is not None:
+        _RUN.log(message)
+    else:
+        print(message)
@@ -0,0 +1,40 @@
+# ==============================================================================
+# GROUPES DE PAYS POUR LES COLLECTES MULTI-PAYS
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Centraliser les listes de codes ISO3 utilisées par les modes
+#            « batch » des scripts de collecte.
+# ==============================================================================
+
+# États membres de la CEDEAO (après le retrait du Burkina Faso, du Mali et du
+# Niger, effectif en janvier 2025)
+CEDEAO = [
+    "BEN", "CIV", "CPV", "GHA", "GIN", "GMB",
+    "GNB", "LBR", "NGA", "SEN", "SLE", "TGO",
+]
+
+# Afrique subsaharienne, selon la classification régionale de la Banque Mondiale (SSF)
+AFRIQUE_SUBSAHARIENNE = [
+    "AGO", "BDI", "BEN", "BFA", "BWA", "CAF", "CIV", "CMR", "COD", "COG",
+    "COM", "CPV", "ERI", "ETH", "GAB", "GHA", "GIN", "GMB", "GNB", "GNQ",
+    "KEN", "LBR", "LSO", "MDG", "MLI", "MOZ", "MRT", "MUS", "MWI", "NAM",
+    "NER", "NGA", "RWA", "SDN", "SEN", "SLE", "SOM", "SSD", "STP", "SWZ",
+    "SYC", "TCD", "TGO", "TZA", "UGA", "ZAF", "ZMB", "ZWE",
+]
+
+COUNTRY_GROUPS = {
+    "cedeao": CEDEAO,
+    "afrique_subsaharienne": AFRIQUE_SUBSAHARIENNE,
+}
+
+
+def resolve_countries(items):
+    """
+    Développe une liste mêlant codes ISO3 et noms de groupes (`cedeao`,
+    `afrique_subsaharienne`) en une liste de codes sans doublons, dans l'ordre.
+    """
+    codes = []
+    for item in items:
+        for code in COUNTRY_GROUPS.get(item.lower(), [item.upper()]):
+            if code not in codes:
+                codes.append(code)
+    return codes
@@ -0,0 +1,104 @@
+# ==============================================================================
+# RAFRAÎCHISSEMENT INCRÉMENTAL : FILIGRANES PAR INDICATEUR
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Mémoriser, pour chaque indicateur d'un fichier de sortie, la
+#            dernière année vue et une empreinte de sa source, afin de ne
+#            retraiter que les indicateurs dont la source a changé et de
+#            ne remplacer que les colonnes de ces indicateurs.
+# ==============================================================================
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+def file_fingerprint(*paths):
+    """Empreinte SHA-256 du contenu concaténé des fichiers `paths`."""
+    sha = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+def frame_fingerprint(df):
+    """Empreinte SHA-256 du contenu d'un DataFrame (indépendante de son index)."""
+    # Import différé : l'orchestrateur (pipeline.py) utilise ce module sans charger pandas
+    import pandas as pd
+
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+
+class Watermarks:
+    """
+    Filigranes stockés dans un fichier JSON :
+    {clé: {"fingerprint": ..., "last_year": ..., "updated_at": ...}}.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def fingerprint(self, key):
+        entry = self._entries.get(key)
+        return entry["fingerprint"] if entry else None
+
+    def is_current(self, key, fingerprint):
+        """Vrai si la source de `key` n'a pas changé depuis le dernier traitement."""
+        return self.fingerprint(key) == fingerprint
+
+    def update(self, key, fingerprint, last_year):
+        self._entries[key] = {
+            "fingerprint": fingerprint,
+            "last_year": None if last_year is None else int(last_year),
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def clear(self):
+        self._entries = {}
+
+    def save(self):
+        """Écriture atomique du fichier de filigranes."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def upsert(df_existing, df_new, on="annee"):
+    """
+    Remplace dans `df_existing` les colonnes rafraîchies de `df_new` (même clé
+    `on`) : leurs valeurs sont reprises entièrement de `df_new`, de sorte
+    qu'une année retirée ou vidée à la source disparaît aussi du fichier. Les
+    autres colonnes sont conservées telles quelles ; les années qui n'ont plus
+    aucune valeur sont supprimées, comme lors d'une consolidation complète.
+    Les colonnes gardent leur ordre existant, les nouvelles colonnes sont
+    ajoutées à la fin.
+    Renvoie (DataFrame fusionné trié par `on`, nombre de valeurs insérées, révisées ou retirées).
+    """
+    existing = df_existing.set_index(on)
+    new = df_new.set_index(on)
+    columns = list(existing.columns) + [c for c in new.columns if c not in existing.columns]
+
+    index = existing.index.union(new.index)
+    before = existing.reindex(index=index, columns=new.columns)
+    after = new.reindex(index=index)
+    changed = (before.notna() | after.notna()) & before.ne(after)
+    n_changed = int(changed.to_numpy().sum())
+
+    merged = existing.reindex(index=index, columns=columns)
+    merged[list(new.columns)] = after
+    merged = merged.dropna(how="all").sort_index()
+    return merged.reset_index(), n_changed
@@ -0,0 +1,81 @@
+# ==============================================================================
+# CLIENT JSON DE L'API V2 DE LA BANQUE MONDIALE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Alternative aux téléchargements ZIP (?downloadformat=csv) qui
+#            contiennent tous les pays : interroger
+#            /v2/country/{pays}/indicator/{indicateurs}?format=json
+#            pour que seuls les pays et années demandés transitent sur le
+#            réseau. La pagination est gérée automatiquement.
+# Source : https://datahelpdesk.worldbank.org/knowledgebase/articles/889392
+# ==============================================================================
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from . import metrics
+
+# --- CONFIGURATION ---
+# URL de base de l'API (surchargeable, par exemple vers un serveur local de rejeu)
+API_BASE_URL = os.environ.get("WB_API_BASE_URL", "https://api.worldbank.org/v2")
+# Nombre d'observations par page (l'API accepte jusqu'à plusieurs milliers)
+PER_PAGE = 1000
+# Source « World Development Indicators », requise pour interroger plusieurs indicateurs à la fois
+WDI_SOURCE_ID = 2
+REQUEST_TIMEOUT = 120
+
+
+def _get_page(session, url, params):
+    """Récupère une page de résultats et renvoie (métadonnées, observations)."""
+    start = time.perf_counter()
+    response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    metrics.add("download_s", time.perf_counter() - start)
+    metrics.add("bytes_downloaded", len(response.content))
+    metrics.add("api_pages")
+    payload = response.json()
+    # En cas d'erreur, l'API répond 200 avec [{"message": [...]}]
+    if not isinstance(payload, list) or not payload or "message" in payload[0]:
+        message = payload[0].get("message") if isinstance(payload, list) and payload else payload
+        raise ValueError(f"Réponse d'erreur de l'API de la Banque Mondiale : {message}")
+    return payload[0], payload[1] if len(payload) > 1 and payload[1] else []
+
+
+def fetch_api_panel(indicator_codes, countries, date_range=None, session=None, base_url=API_BASE_URL):
+    """
+    Interroge l'API JSON pour les indicateurs et pays (codes ISO2/ISO3)
+    demandés et renvoie un panel long (country_code, annee, indicator, valeur)
+    trié par pays puis année, sans valeurs manquantes — le même format que
+    `wb_reader.to_long_panel`. `date_range` est un couple (première, dernière année).
+    Lève `requests.exceptions.RequestException` ou ValueError en cas d'échec.
+    """
+    http = session if session is not None else requests.Session()
+    url = f"{base_url}/country/{';'.join(countries)}/indicator/{';'.join(indicator_codes)}"
+    params = {"format": "json", "per_page": PER_PAGE}
+    if len(indicator_codes) > 1:
+        params["source"] = WDI_SOURCE_ID
+    if date_range is not None:
+        params["date"] = f"{date_range[0]}:{date_range[1]}"
+
+    meta, records = _get_page(http, url, {**params, "page": 1})
+    for page in range(2, int(meta.get("pages", 1)) + 1):
+        records.extend(_get_page(http, url, {**params, "page": page})[1])
+
+    start = time.perf_counter()
+    df = pd.DataFrame({
+        "country_code": [r.get("countryiso3code") or r["country"]["id"] for r in records],
+        "annee": [r["date"] for r in records],
+        "indicator": [r["indicator"]["id"] for r in records],
+        "valeur": [r["value"] for r in records],
+    })
+    df["annee"] = pd.to_numeric(df["annee"], errors="coerce")
+    df["valeur"] = df["valeur"].astype("float64")
+    df = df.dropna(subset=["annee", "valeur"])
+    df["annee"] = df["annee"].astype(np.int64)
+    metrics.add("parse_s", time.perf_counter() - start)
+    metrics.add("rows_in", len(records))
+    metrics.add("rows_out", len(df))
+    return df.sort_values(["indicator", "country_code", "annee"], kind="stable").reset_index(drop=True)
@@ -0,0 +1,113 @@
+# ==============================================================================
+# LECTURE EN FLUX DES FICHIERS CSV DE LA BANQUE MONDIALE
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Lire le CSV de données directement depuis le ZIP téléchargé, ligne
+#            par ligne, en ne conservant que les pays et les années demandés.
+#            Aucun fichier n'est extrait sur disque et seules les lignes
+#            retenues sont chargées en mémoire.
+# ==============================================================================
+
+import csv
+import io
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+
+# Colonnes d'identification présentes dans tous les fichiers de la Banque Mondiale
+ID_COLUMNS = ["Country Name", "Country Code", "Indicator Name", "Indicator Code"]
+
+
+def find_data_member(zip_path, indicator_code):
+    """
+    Renvoie le nom du fichier de données principal (hors métadonnées) de
+    l'indicateur dans le ZIP. Lève FileNotFoundError s'il est absent.
+    """
+    with zipfile.ZipFile(zip_path, "r") as z:
+        for filename in z.namelist():
+            if filename.startswith(f"API_{indicator_code}_") and filename.endswith(".csv"):
+                return filename
+    raise FileNotFoundError(
+        f"Aucun fichier de données principal (CSV) trouvé dans le ZIP pour l'indicateur {indicator_code}."
+    )
+
+
+def iter_wb_rows(zip_path, member):
+    """
+    Parcourt le CSV `member` du ZIP sans l'extraire et renvoie d'abord
+    l'en-tête, puis chaque ligne de données. Les lignes de métadonnées
+    précédant l'en-tête ("Data Source", "Last Updated Date") sont ignorées.
+    """
+    with zipfile.ZipFile(zip_path, "r") as z, z.open(member) as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+        for row in reader:
+            if row and row[0] == "Country Name":
+                yield row
+                break
+        else:
+            raise ValueError(f"En-tête 'Country Name' introuvable dans {member}.")
+        yield from reader
+
+
+def read_wb_csv(zip_path, member, countries=None, years=None):
+    """
+    Charge le CSV `member` du ZIP en ne conservant que :
+    - les pays de `countries` (noms ou codes ISO3 ; tous si None) ;
+    - les colonnes d'années de `years` présentes dans le fichier (toutes si None).
+    Les valeurs annuelles sont converties en float (NaN si vides), comme le
+    ferait `pd.read_csv`.
+    """
+    start = time.perf_counter()
+    rows = iter_wb_rows(zip_path, member)
+    header = next(rows)
+
+    wanted_years = None if years is None else {str(y) for y in years}
+    year_idx = [
+        i for i, col in enumerate(header)
+        if col.isdigit() and (wanted_years is None or col in wanted_years)
+    ]
+    id_idx = [header.index(col) for col in ID_COLUMNS]
+    wanted = None if countries is None else set(countries)
+
+    ids, values = [], []
+    n_rows = 0
+    for row in rows:
+        n_rows += 1
+        if wanted is not None and row[0] not in wanted and row[1] not in wanted:
+            continue
+        ids.append([row[i] for i in id_idx])
+        values.append([float(row[i]) if row[i] else np.nan for i in year_idx])
+
+    df = pd.DataFrame(ids, columns=ID_COLUMNS)
+    year_cols = [header[i] for i in year_idx]
+    df_values = pd.DataFrame(np.array(values, dtype="float64").reshape(len(values), len(year_idx)),
+                             columns=year_cols)
+    df = pd.concat([df, df_values], axis=1)
+
+    metrics.add("parse_s", time.perf_counter() - start)
+    metrics.add("rows_in", n_rows)
+    metrics.add("rows_out", len(df))
+    return df
+
+
+def to_long_panel(df_wide, indicator):
+    """
+    Transforme un tableau large (une ligne par pays, une colonne par année)
+    en panel long (country_code, annee, indicator, valeur), en une seule
+    opération vectorisée pour tous les pays. Les valeurs manquantes sont
+    supprimées ; l'ordre est pays puis année, comme celui du fichier source.
+    """
+    year_cols = [col for col in df_wide.columns if col.isdigit()]
+    values = df_wide[year_cols].to_numpy(dtype="float64")
+    n_countries, n_years = values.shape
+    keep = ~np.isnan(values.ravel())
+
+    return pd.DataFrame({
+        "country_code": np.repeat(df_wide["Country Code"].to_numpy(), n_years)[keep],
+        "annee": np.tile(np.array(year_cols, dtype="int64"), n_countries)[keep],
+        "indicator": indicator,
+        "valeur": values.ravel()[keep],
+    })
@@ -0,0 +1,534 @@
+# ==============================================================================
+# LECTURE DU CLASSEUR WPP 2024 DES NATIONS UNIES
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Ne payer qu'une seule fois l'analyse du classeur Excel par
+#            openpyxl (dizaines de milliers de lignes x ~65 colonnes) :
+#            chaque feuille est convertie au format Parquet dans un cache
+#            indexé par l'empreinte SHA-256 du classeur. Les chargements
+#            suivants ne lisent que les colonnes et les lignes demandées.
+#            Une nouvelle édition du classeur (contenu différent) produit
+#            automatiquement une nouvelle conversion.
+#            Pour un premier chargement ciblé (un pays, quelques colonnes),
+#            les lignes de la feuille peuvent aussi être parcourues une à une
+#            (openpyxl en lecture seule) : seules les lignes retenues sont
+#            gardées en mémoire, puis mises en cache pour les appels suivants.
+#            Les estimations (1950-2023) et les projections (variantes moyenne,
+#            haute et basse, 2024-2100) sont dans des feuilles distinctes :
+#            elles sont lues en parallèle (un processus par feuille) puis
+#            raccordées en une série continue par scénario.
+#            Pour interroger n'importe quel pays sans relire le classeur, les
+#            feuilles peuvent être découpées une fois pour toutes en un magasin
+#            partitionné par lieu (code ISO3, ou code de lieu ONU pour les
+#            agrégats), avec un index JSON :
+#                <WPP_STORE_DIR>/location=<clé>/data.parquet
+#                <WPP_STORE_DIR>/index.json
+# Dépendances optionnelles : pyarrow (sans elle, le classeur est relu à chaque
+#                            fois), openpyxl (lecture en flux)
+# ==============================================================================
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from . import metrics
+from .columnar import FILTER_OPERATORS, _import_pyarrow
+from .watermarks import file_fingerprint
+
+# --- CONFIGURATION ---
+# Cache des feuilles converties (surchargeable par DEMOGRAPHIQUES_WPP_CACHE_DIR)
+WPP_CACHE_DIR = os.environ.get(
+    "DEMOGRAPHIQUES_WPP_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "wpp")
+)
+# Magasin partitionné par lieu (surchargeable par DEMOGRAPHIQUES_WPP_STORE_DIR)
+WPP_STORE_DIR = os.environ.get(
+    "DEMOGRAPHIQUES_WPP_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "wpp_locations")
+)
+STORE_INDEX_FILE = "index.json"
+# Version du format du magasin : un magasin d'une version antérieure est reconstruit
+STORE_FORMAT_VERSION = 2
+PARQUET_FILE_NAME = "data.parquet"
+# Colonnes d'identification des lieux dans les feuilles du classeur
+LOCATION_NAME_COLUMN = "Region, subregion, country or area *"
+LOCATION_CODE_COLUMN = "Location code"
+ISO3_COLUMN = "ISO3 Alpha-code"
+LOCATION_TYPE_COLUMN = "Type"
+YEAR_COLUMN = "Year"
+# Lignes de titre des groupes de lieux (sans année ni données), exclues du magasin par lieu
+SEPARATOR_TYPE = "Label/Separator"
+# Empreintes déjà calculées, indexées par chemin, taille et date de modification du classeur
+DIGESTS_FILE = "digests.json"
+# Sous-dossier des sélections (lignes filtrées et colonnes choisies) lues en flux
+SELECTIONS_DIR = "selections"
+# Version du format des fichiers mis en cache : l'incrémenter invalide les conversions existantes
+CACHE_FORMAT_VERSION = 2
+# Valeurs du classeur signifiant « donnée non disponible » (ex. lignes de titre des régions)
+MISSING_PLACEHOLDERS = {"...", "…", ""}
+# Feuilles du classeur et étiquette de variante de leurs lignes
+ESTIMATES_SHEET = "Estimates"
+VARIANT_SHEETS = {
+    ESTIMATES_SHEET: "estimations",
+    "Medium variant": "moyenne",
+    "High variant": "haute",
+    "Low variant": "basse",
+}
+# Nombre maximal de feuilles analysées simultanément (un processus chacune)
+MAX_SHEET_WORKERS = 4
+
+
+def workbook_digest(path, cache_dir=WPP_CACHE_DIR):
+    """
+    Empreinte SHA-256 du classeur. Elle n'est recalculée que si la taille ou
+    la date de modification du fichier ont changé depuis le dernier calcul.
+    """
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    index_path = os.path.join(cache_dir, DIGESTS_FILE)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    entry = index.get(key)
+    if entry and entry["signature"] == signature:
+        return entry["sha256"]
+
+    digest = file_fingerprint(path)
+    index[key] = {"signature": signature, "sha256": digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, index_path)
+    return digest
+
+
+def sheet_cache_path(digest, sheet_name, header, cache_dir=WPP_CACHE_DIR):
+    """Fichier Parquet de la feuille `sheet_name` (en-tête à la ligne `header`) du classeur `digest`."""
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", sheet_name).strip("_")
+    return os.path.join(cache_dir, digest, f"{slug}__header{header}__v{CACHE_FORMAT_VERSION}.parquet")
+
+
+def selection_cache_path(digest, sheet_name, header, columns, filters, cache_dir=WPP_CACHE_DIR):
+    """Fichier Parquet d'une sélection (colonnes et filtres) d'une feuille du classeur `digest`."""
+    query = json.dumps([CACHE_FORMAT_VERSION, sheet_name, header, list(columns or []),
+                        [list(f) for f in filters or []]],
+                       ensure_ascii=False, default=list)
+    key = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, digest, SELECTIONS_DIR, f"{key}.parquet")
+
+
+def _to_arrow_compatible(df):
+    """
+    Colonnes de types mélangés rendues compatibles avec Parquet : une colonne
+    de nombres dont le seul texte est un marqueur de donnée manquante (ex.
+    '...') devient numérique (marqueurs -> NaN) ; une colonne mêlant nombres
+    et vrai texte est convertie en texte.
+    """
+    for column in df.columns[df.dtypes == object]:
+        values = df[column].dropna()
+        is_text = values.map(lambda v: isinstance(v, str))
+        if is_text.all():
+            continue
+        if values[is_text].map(str.strip).isin(MISSING_PLACEHOLDERS).all():
+            df[column] = pd.to_numeric(df[column].map(lambda v: None if isinstance(v, str) else v), errors="coerce")
+        else:
+            df[column] = df[column].map(lambda v: v if v is None or v != v else str(v))
+    return df
+
+
+def convert_sheet(path, sheet_name, header, dest):
+    """Analyse une feuille du classeur (openpyxl) et l'écrit au format Parquet (écriture atomique)."""
+    start = time.perf_counter()
+    df = pd.read_excel(path, sheet_name=sheet_name, header=header)
+    metrics.add("parse_s", time.perf_counter() - start)
+    metrics.add("rows_in", len(df))
+    _write_cache(df, dest)
+    return dest
+
+
+def _write_cache(df, dest):
+    """Écrit un DataFrame au format Parquet dans le cache (écriture atomique)."""
+    pa, pq = _import_pyarrow()
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest), suffix=".parquet.tmp")
+    os.close(fd)
+    pq.write_table(pa.Table.from_pandas(_to_arrow_compatible(df), preserve_index=False), tmp_path)
+    os.replace(tmp_path, dest)
+
+
+def iter_sheet_rows(path, sheet_name, header):
+    """
+    Parcourt une feuille en lecture seule (openpyxl, sans charger le classeur
+    en mémoire) : génère d'abord les noms de colonnes lus à la ligne `header`
+    (numérotée à partir de 0, comme pour pandas.read_excel), puis chaque ligne
+    de données sous forme de tuple. Les lignes entièrement vides sont ignorées.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        for _ in range(header):
+            next(rows, None)
+        names = next(rows, None)
+        if names is None:
+            raise ValueError(f"La feuille '{sheet_name}' compte moins de {header + 1} lignes.")
+        # Même convention que pandas pour les en-têtes vides
+        names = tuple(f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(names))
+        yield names
+        width = len(names)
+        for row in rows:
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            if any(value is not None for value in row):
+                yield row
+    finally:
+        workbook.close()
+
+
+def _cell_value(value):
+    # Comme pandas : les nombres entiers stockés en flottants redeviennent des entiers
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def stream_sheet(path, sheet_name, header, columns=None, filters=None):
+    """
+    Lit une feuille ligne par ligne et ne conserve que les lignes satisfaisant
+    `filters`, réduites à `columns` (toutes si None) : la mémoire occupée est
+    proportionnelle à la sélection, pas à la feuille.
+    Lève KeyError si une colonne demandée n'existe pas.
+    """
+    rows = iter_sheet_rows(path, sheet_name, header)
+    names = next(rows)
+    positions = {name: i for i, name in reversed(list(enumerate(names)))}
+    columns = list(columns) if columns else list(names)
+    missing = [c for c in dict.fromkeys(columns + [name for name, _, _ in filters or []]) if c not in positions]
+    if missing:
+        rows.close()
+        raise KeyError(", ".join(missing))
+
+    tests = []
+    for name, op, value in filters or []:
+        if op == "in":
+            allowed = set(value)
+            tests.append((positions[name], allowed.__contains__))
+        else:
+            tests.append((positions[name], lambda v, f=FILTER_OPERATORS[op], ref=value: v is not None and f(v, ref)))
+    projection = [positions[c] for c in columns]
+
+    start = time.perf_counter()
+    selected = []
+    rows_in = 0
+    for row in rows:
+        rows_in += 1
+        if all(test(_cell_value(row[i])) for i, test in tests):
+            selected.append([_cell_value(row[i]) for i in projection])
+    metrics.add("parse_s", time.perf_counter() - start)
+    metrics.add("rows_in", rows_in)
+    return pd.DataFrame.from_records(selected, columns=columns)
+
+
+def _apply_filters(df, filters):
+    """Applique des filtres (colonne, opérateur, valeur) au format de pyarrow à un DataFrame."""
+    for name, op, value in filters or []:
+        df = df[df[name].isin(list(value)) if op == "in" else FILTER_OPERATORS[op](df[name], value)]
+    return df
+
+
+def load_sheet(path, sheet_name, header, columns=None, filters=None, stream=False, cache_dir=WPP_CACHE_DIR):
+    """
+    Charge une feuille du classeur en ne gardant que `columns` (toutes si None)
+    et les lignes satisfaisant `filters` (ex. [("Year", ">=", 2000)]).
+    La feuille est convertie en Parquet au premier appel pour ce classeur ;
+    les appels suivants ne relisent que le cache. Avec `stream=True`, si la
+    feuille n'a pas encore été convertie, seule la sélection est lue (en flux)
+    et mise en cache. Sans pyarrow, le classeur est analysé directement.
+    Lève KeyError si une colonne demandée n'existe pas.
+    """
+    needed = list(dict.fromkeys(list(columns or []) + [name for name, _, _ in filters or []]))
+    pa, pq = _import_pyarrow()
+    if pa is None:
+        metrics.log("AVERTISSEMENT: pyarrow absent, lecture directe du classeur Excel (sans cache).")
+        if stream:
+            return _to_arrow_compatible(stream_sheet(path, sheet_name, header, columns, filters))
+        df = _to_arrow_compatible(pd.read_excel(path, sheet_name=sheet_name, header=header))
+        missing = [c for c in needed if c not in df.columns]
+        if missing:
+            raise KeyError(", ".join(missing))
+        df = _apply_filters(df, filters)
+        return df[list(columns)] if columns else df
+
+    digest = workbook_digest(path, cache_dir)
+    cached = sheet_cache_path(digest, sheet_name, header, cache_dir)
+    if os.path.exists(cached):
+        metrics.add("cache_hits")
+    elif stream:
+        selection = selection_cache_path(digest, sheet_name, header, columns, filters, cache_dir)
+        if os.path.exists(selection):
+            metrics.add("cache_hits")
+            df = pq.read_table(selection).to_pandas()
+        else:
+            metrics.add("cache_misses")
+            metrics.log(f"Lecture en flux de la feuille '{sheet_name}' (lignes et colonnes sélectionnées)...")
+            df = _to_arrow_compatible(stream_sheet(path, sheet_name, header, columns, filters))
+            _write_cache(df, selection)
+        metrics.add("rows_out", len(df))
+        return df
+    else:
+        metrics.add("cache_misses")
+        metrics.log(f"Conversion unique de la feuille '{sheet_name}' au format Parquet...")
+        convert_sheet(path, sheet_name, header, cached)
+
+    missing = [c for c in needed if c not in pq.read_schema(cached).names]
+    if missing:
+        raise KeyError(", ".join(missing))
+    start = time.perf_counter()
+    table = pq.read_table(cached, columns=list(columns) if columns else None,
+                          filters=[(name, op, list(value) if op == "in" else value) for name, op, value in filters]
+                          if filters else None)
+    df = table.to_pandas()
+    metrics.add("read_s", time.perf_counter() - start)
+    metrics.add("rows_out", len(df))
+    return df
+
+
+def _load_sheet_task(path, sheet_name, header, columns, filters, stream, cache_dir):
+    """
+    Tâche exécutée dans un processus du pool : charge une feuille et mesure sa
+    durée. Les mesures prises dans le processus sont renvoyées avec la feuille.
+    """
+    with metrics.isolated_run(sheet_name) as run:
+        start = time.perf_counter()
+        df = load_sheet(path, sheet_name, header, columns, filters, stream=stream, cache_dir=cache_dir)
+        elapsed = time.perf_counter() - start
+    return df, elapsed, run.to_dict()
+
+
+def load_variants(path, sheets, header, columns=None, filters=None, stream=True, max_workers=MAX_SHEET_WORKERS,
+                  cache_dir=WPP_CACHE_DIR):
+    """
+    Charge plusieurs feuilles du classeur en parallèle (un processus par
+    feuille, l'analyse openpyxl étant limitée par le processeur) et les
+    concatène dans l'ordre de `sheets`. Chaque ligne est étiquetée par sa
+    variante (colonne `variante`, voir VARIANT_SHEETS). `stream` est transmis
+    à load_sheet.
+    Lève KeyError si une colonne demandée manque dans l'une des feuilles.
+    """
+    # Empreinte calculée une seule fois, avant de répartir les feuilles entre les processus
+    workbook_digest(path, cache_dir)
+    frames = []
+    workers = max(1, min(max_workers, len(sheets), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_load_sheet_task, path, sheet, header, columns, filters, stream, cache_dir)
+                   for sheet in sheets]
+        for sheet, future in zip(sheets, futures):
+            df, elapsed, report = future.result()
+            # Compteurs du processus de travail (cache, lignes lues et conservées, temps d'analyse)
+            metrics.merge(report)
+            metrics.timing("feuille", elapsed, feuille=sheet, lignes=len(df))
+            frames.append(df.assign(variante=VARIANT_SHEETS.get(sheet, sheet)))
+    df = pd.concat(frames, ignore_index=True)
+    df["variante"] = df["variante"].astype(pd.CategoricalDtype(list(dict.fromkeys(
+        VARIANT_SHEETS.get(sheet, sheet) for sheet in sheets))))
+    return df
+
+
+def stitch_series(df, year_column, group_columns=(), estimates=VARIANT_SHEETS[ESTIMATES_SHEET]):
+    """
+    Raccorde les estimations à chaque variante de projection : renvoie, pour
+    chaque scénario (colonne `scenario`), la série continue des estimations
+    suivies des projections de cette variante, triée par `group_columns` puis
+    par année. Le raccord est fait par groupe (ex. par pays) : les années
+    projetées déjà couvertes par les estimations du groupe sont écartées, et
+    un trou entre les deux parties est signalé pour chaque groupe concerné.
+    """
+    keys = list(group_columns)
+    df_estimates = df[df["variante"] == estimates]
+    if keys:
+        last_years = df_estimates.groupby(keys, observed=True)[year_column].max()
+    projections = [v for v in df["variante"].unique() if v != estimates]
+    scenarios = []
+    for variant in projections:
+        df_variant = df[df["variante"] == variant]
+        if keys:
+            # Dernière année estimée du groupe de chaque ligne (NaN si le groupe n'a pas d'estimations)
+            last_year = df_variant.join(last_years.rename("_derniere_estimation"), on=keys)["_derniere_estimation"]
+        else:
+            last_year = df_estimates[year_column].max()
+        df_projection = df_variant[~(df_variant[year_column] <= last_year)]
+        if keys:
+            first_years = df_projection.groupby(keys, observed=True)[year_column].min()
+            expected = last_years.reindex(first_years.index) + 1
+            gaps = first_years[expected.notna() & (first_years != expected)]
+            for group, first_year in gaps.items():
+                label = "/".join(map(str, group)) if isinstance(group, tuple) else group
+                metrics.log(f"AVERTISSEMENT: Années manquantes pour '{label}' entre les estimations "
+                            f"({last_years[group]}) et la variante '{variant}' ({first_year}).")
+        elif not df_projection.empty and df_projection[year_column].min() != last_year + 1:
+            metrics.log(f"AVERTISSEMENT: Années manquantes entre les estimations ({last_year}) et la variante "
+                        f"'{variant}' ({df_projection[year_column].min()}).")
+        scenarios.append(pd.concat([df_estimates, df_projection]).assign(scenario=variant))
+    if not scenarios:
+        return df_estimates.assign(scenario=estimates)
+    df_stitched = pd.concat(scenarios, ignore_index=True)
+    df_stitched["scenario"] = df_stitched["scenario"].astype(pd.CategoricalDtype(projections))
+    return df_stitched.sort_values(keys + ["scenario", year_column], ignore_index=True)
+
+
+def _location_keys(df):
+    """Clé de partition de chaque ligne : code ISO3 du pays, sinon code de lieu ONU (agrégats)."""
+    codes = pd.to_numeric(df[LOCATION_CODE_COLUMN], errors="coerce").astype("Int64").astype(str)
+    if ISO3_COLUMN not in df.columns:
+        return codes
+    iso3 = df[ISO3_COLUMN].astype(object).where(df[ISO3_COLUMN].notna(), None)
+    return iso3.fillna(codes).astype(str)
+
+
+def _alias(value):
+    return str(value).strip().casefold()
+
+
+def read_location_index(store_dir=WPP_STORE_DIR):
+    """Index du magasin par lieu (None s'il n'a pas encore été construit)."""
+    try:
+        with open(os.path.join(store_dir, STORE_INDEX_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_location_store(path, header, sheets, store_dir=WPP_STORE_DIR, force=False,
+                         max_workers=MAX_SHEET_WORKERS, cache_dir=WPP_CACHE_DIR):
+    """
+    Découpe les feuilles `sheets` du classeur en un fichier Parquet par lieu
+    (toutes variantes confondues, colonne `variante`) et écrit l'index :
+    {"version", "workbook_sha256", "sheets", "columns", "locations": {clé: {...}}, "aliases": {...}}.
+    Les lignes de titre (Label/Separator, sans année) sont écartées.
+    Le magasin n'est reconstruit que si le classeur ou la liste des feuilles
+    a changé (ou avec `force`) ; il est remplacé d'un bloc. Renvoie (index, reconstruit).
+    """
+    pa, pq = _import_pyarrow()
+    if pa is None:
+        raise ImportError("Le module 'pyarrow' est requis pour construire le magasin par lieu (pip install pyarrow).")
+    digest = workbook_digest(path, cache_dir)
+    index = read_location_index(store_dir)
+    if (not force and index and index.get("version") == STORE_FORMAT_VERSION
+            and index["workbook_sha256"] == digest and index["sheets"] == list(sheets)):
+        return index, False
+
+    # Feuilles complètes (converties en Parquet au passage), lues en parallèle
+    df = load_variants(path, sheets, header, stream=False, max_workers=max_workers, cache_dir=cache_dir)
+    missing = [c for c in (LOCATION_NAME_COLUMN, LOCATION_CODE_COLUMN) if c not in df.columns]
+    if missing:
+        raise KeyError(", ".join(missing))
+    start = time.perf_counter()
+    # Les lignes de titre (Label/Separator, sans année) ne sont pas des lieux
+    separators = pd.Series(False, index=df.index)
+    if LOCATION_TYPE_COLUMN in df.columns:
+        separators |= df[LOCATION_TYPE_COLUMN].astype(str).str.strip() == SEPARATOR_TYPE
+    if YEAR_COLUMN in df.columns:
+        separators |= pd.to_numeric(df[YEAR_COLUMN], errors="coerce").isna()
+    df = _to_arrow_compatible(df[~separators].reset_index(drop=True))
+    metrics.add("rows_dropped", int(separators.sum()))
+    keys = _location_keys(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    parent = os.path.dirname(os.path.abspath(store_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".wpp_locations-")
+    locations, aliases = {}, {}
+    for key, positions in keys.groupby(keys, sort=True).indices.items():
+        first = df.iloc[positions[0]]
+        relative = os.path.join(f"location={key}", PARQUET_FILE_NAME)
+        os.makedirs(os.path.join(tmp_dir, f"location={key}"))
+        pq.write_table(table.take(positions), os.path.join(tmp_dir, relative))
+        iso3 = first.get(ISO3_COLUMN)
+        locations[key] = {
+            "nom": str(first[LOCATION_NAME_COLUMN]),
+            "code": int(first[LOCATION_CODE_COLUMN]),
+            "iso3": iso3 if isinstance(iso3, str) else None,
+            "type": str(first.get(LOCATION_TYPE_COLUMN, "")),
+            "lignes": len(positions),
+            "fichier": relative,
+        }
+        for alias in (key, locations[key]["nom"], locations[key]["code"]):
+            aliases.setdefault(_alias(alias), key)
+
+    index = {"version": STORE_FORMAT_VERSION, "workbook_sha256": digest, "sheets": list(sheets),
+             "columns": list(df.columns),
+             "locations": locations, "aliases": aliases}
+    with open(os.path.join(tmp_dir, STORE_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+
+    # Remplacement d'un bloc : l'ancien magasin n'est supprimé qu'une fois le nouveau en place
+    old_dir = None
+    if os.path.exists(store_dir):
+        old_dir = tempfile.mkdtemp(dir=parent, prefix=".wpp_locations-old-")
+        os.replace(store_dir, os.path.join(old_dir, "store"))
+    os.replace(tmp_dir, store_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    metrics.add("write_s", time.perf_counter() - start)
+    metrics.add("partitions", len(locations))
+    return index, True
+
+
+def resolve_locations(index, queries):
+    """
+    Clés de partition des lieux demandés, désignés par code ISO3, code de lieu
+    ONU ou nom exact (sans tenir compte de la casse). Lève KeyError pour un lieu inconnu.
+    """
+    keys, unknown = [], []
+    for query in queries:
+        key = index["aliases"].get(_alias(query))
+        if key is None:
+            unknown.append(str(query))
+        elif key not in keys:
+            keys.append(key)
+    if unknown:
+        raise KeyError(", ".join(unknown))
+    return keys
+
+
+def read_locations(queries, columns=None, variants=None, store_dir=WPP_STORE_DIR):
+    """
+    Lit dans le magasin par lieu les lignes des lieux `queries` (voir
+    resolve_locations), réduites à `columns` (toutes si None) et, si
+    `variants` est donné, aux variantes indiquées (ex. ["estimations"]).
+    Seuls les fichiers des lieux demandés sont ouverts.
+    Lève FileNotFoundError si le magasin n'a pas été construit, KeyError pour
+    un lieu ou une colonne inconnus.
+    """
+    pa, pq = _import_pyarrow()
+    index = read_location_index(store_dir)
+    if index is None:
+        raise FileNotFoundError(f"Magasin par lieu introuvable : '{store_dir}'.")
+    if columns:
+        missing = [c for c in columns if c not in index["columns"]]
+        if missing:
+            raise KeyError(", ".join(missing))
+    start = time.perf_counter()
+    read_columns = list(dict.fromkeys(list(columns) + (["variante"] if variants else []))) if columns else None
+    filters = [("variante", "in", list(variants))] if variants else None
+    tables = [pq.read_table(os.path.join(store_dir, index["locations"][key]["fichier"]),
+                            columns=read_columns, filters=filters)
+              for key in resolve_locations(index, queries)]
+    df = pa.concat_tables(tables).to_pandas() if tables else pd.DataFrame(columns=columns)
+    if columns:
+        df = df[list(columns)]
+    metrics.add("read_s", time.perf_counter() - start)
+    metrics.add("partitions_lues", len(tables))
+    metrics.add("rows_out", len(df))
+    return df
@@ -3,18 +3,30 @@
 # Projet : ANIP AI/Data Challenge 2025
 # Objectif : Télécharger les fichiers raster GeoTIFF de population pour le Bénin
 #            à partir du hub de données WorldPop.
+#            Les fichiers sont téléchargés en parallèle, par gros blocs ; un
+#            téléchargement interrompu (ou un fichier tronqué) est repris là
+#            où il s'était arrêté, et chaque fichier n'apparaît sous son nom
+#            final qu'une fois sa taille vérifiée (voir commun/downloader.py).
 # Source : https://hub.worldpop.org/
+# Utilisation : python 1_scrapping.py [--workers 4] [--taille-bloc 8] [--verifier]
 # Auteur : SOULE Fadile
 # Date : 21/09/25
 # ==============================================================================
 
+import argparse
 import requests
 from bs4 import BeautifulSoup
 import os
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from tqdm import tqdm
 import sys
 
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import downloader, metrics
+from commun.http_cache import create_session
+
 # --- CONFIGURATION ---
 # Définir la plage d'IDs des pages de données à télécharger
 START_ID = 73172  # ID de la première page
@@ -24,52 +36,90 @@ BASE_URL = "https://hub.worldpop.org/geodata/summary?id="
 # Dossier de destination pour les fichiers .tif téléchargés
 OUTPUT_DIR = "downloaded_tifs"
 
-print("Script 1: Démarrage du téléchargement des données de population de WorldPop.")
+# Nombre de fichiers téléchargés simultanément
+MAX_WORKERS = downloader.MAX_DOWNLOAD_WORKERS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Téléchargement des rasters de population WorldPop du Bénin.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Téléchargements simultanés")
+    parser.add_argument("--taille-bloc", type=float, default=downloader.CHUNK_SIZE / (1024 * 1024),
+                        help="Taille des blocs lus sur le réseau, en Mo")
+    parser.add_argument("--verifier", action="store_true",
+                        help="Recalculer le SHA-256 des fichiers déjà téléchargés")
+    return parser.parse_args(argv)
+
 
-# --- Étape 1: Préparation de l'environnement ---
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+def find_tif_url(session, page_url):
+    """Extrait le lien du fichier .tif depuis la page de résumé (None s'il est introuvable)."""
+    response = session.get(page_url, timeout=downloader.REQUEST_TIMEOUT)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.content, 'html.parser')
 
-# --- Étape 2: Génération des URLs à scraper ---
-page_urls = [f"{BASE_URL}{id_num}" for id_num in range(START_ID, END_ID - 1, -1)]
-print(f"Génération de {len(page_urls)} URLs à traiter (ID de {START_ID} à {END_ID}).")
+    files_div = soup.find('div', id='files')
+    if not files_div:
+        metrics.log(f"AVERTISSEMENT: Section de fichiers introuvable sur {page_url}")
+        return None
 
-# --- Étape 3: Boucle de scraping et de téléchargement ---
-print(f"Début du processus de téléchargement vers le dossier '{OUTPUT_DIR}'...")
-for page_url in tqdm(page_urls, desc="Progression des pages"):
+    link_tag = files_div.find('a', href=True)
+    if not link_tag or not link_tag['href'].endswith('.tif'):
+        metrics.log(f"AVERTISSEMENT: Lien de téléchargement .tif introuvable sur {page_url}")
+        return None
+    return link_tag['href'].strip()
+
+
+def resolve_page(session, page_url):
+    """find_tif_url, avec journalisation des erreurs HTTP (None en cas d'échec)."""
     try:
-        # Extraire le lien du fichier .tif depuis la page de résumé
-        response = requests.get(page_url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        files_div = soup.find('div', id='files')
-        if not files_div:
-            print(f"AVERTISSEMENT: Section de fichiers introuvable sur {page_url}")
-            continue
-
-        link_tag = files_div.find('a', href=True)
-        if not link_tag or not link_tag['href'].endswith('.tif'):
-            print(f"AVERTISSEMENT: Lien de téléchargement .tif introuvable sur {page_url}")
-            continue
-            
-        tif_url = link_tag['href'].strip()
-        
-        # Préparer le téléchargement du fichier
-        filename = os.path.basename(urlparse(tif_url).path)
-        filepath = os.path.join(OUTPUT_DIR, filename)
-        
-        if os.path.exists(filepath):
-            continue  # Ignorer si le fichier existe déjà
-
-        # Télécharger le fichier en mode stream pour gérer les gros fichiers
-        with requests.get(tif_url, stream=True) as r:
-            r.raise_for_status()
-            with open(filepath, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    
+        return find_tif_url(session, page_url)
     except requests.exceptions.RequestException as e:
-        print(f"ERREUR: Impossible de traiter l'URL {page_url}. Détails: {e}")
+        metrics.log(f"ERREUR: Impossible de traiter l'URL {page_url}. Détails: {e}")
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Rapport d'exécution structuré (voir commun/metrics.py)
+    metrics.start_run("geo_rasters")
+    metrics.log("Script 1: Démarrage du téléchargement des données de population de WorldPop.")
+
+    # --- Étape 1: Préparation de l'environnement ---
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    session = create_session(pool_size=args.workers)
+
+    # --- Étape 2: Génération des URLs à scraper ---
+    page_urls = [f"{BASE_URL}{id_num}" for id_num in range(START_ID, END_ID - 1, -1)]
+    metrics.log(f"Génération de {len(page_urls)} URLs à traiter (ID de {START_ID} à {END_ID}).")
+
+    # --- Étape 3: Extraction des liens .tif (pages interrogées en parallèle) ---
+    with metrics.stage("pages"):
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            tif_urls = [url for url in pool.map(lambda page_url: resolve_page(session, page_url), page_urls) if url]
+
+    # --- Étape 4: Téléchargement parallèle et reprenable des fichiers ---
+    jobs = [(tif_url, os.path.join(OUTPUT_DIR, os.path.basename(urlparse(tif_url).path))) for tif_url in tif_urls]
+    metrics.log(f"Début du processus de téléchargement vers le dossier '{OUTPUT_DIR}' ({args.workers} en parallèle)...")
+    with metrics.stage("telechargement"), tqdm(total=len(jobs), desc="Progression des fichiers") as progress:
+        results = downloader.download_files(
+            jobs, max_workers=args.workers, session=session,
+            chunk_size=int(args.taille_bloc * 1024 * 1024), verify=args.verifier,
+            on_done=lambda path, result: progress.update(1)
+        )
+
+    failures = {path: result for path, result in results.items() if isinstance(result, Exception)}
+    for path, error in failures.items():
+        metrics.log(f"ERREUR: Échec du téléchargement de '{os.path.basename(path)}'. Détails: {error}")
+    counts = {status: sum(1 for r in results.values() if r == status)
+              for status in (downloader.DOWNLOADED, downloader.RESUMED, downloader.UP_TO_DATE)}
+    metrics.log(", ".join(f"{n} {status}" for status, n in counts.items()) + f", {len(failures)} en échec.")
+
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Les fichiers TIF ont été téléchargés dans : '{OUTPUT_DIR}'")
+    # Code de sortie non nul : une nouvelle exécution reprendra les fichiers incomplets
+    if failures:
+        sys.exit(1)
+
 
-print("\nScript terminé.")
-print(f"Les fichiers TIF ont été téléchargés dans : '{OUTPUT_DIR}'")
\ No newline at end of file
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    main()
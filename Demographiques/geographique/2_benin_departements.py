@@ -9,11 +9,17 @@
 # Date : 21/09/25
 # ==============================================================================
 
+import argparse
 import requests
 import zipfile
 import os
 import geopandas as gpd
 import sys
+import time
+
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
 
 # --- CONFIGURATION ---
 SHAPEFILE_URL = "https://naturalearth.s3.amazonaws.com/10m_cultural/ne_10m_admin_1_states_provinces.zip"
@@ -21,51 +27,75 @@ OUTPUT_DIR = "shapes_data"
 RAW_SHAPEFILE_NAME = "ne_10m_admin_1_states_provinces.shp"
 FINAL_SHAPEFILE_NAME = "benin_departments.shp"
 
-print("Script 2: Démarrage de la préparation des limites administratives du Bénin.")
-
-# --- Étape 1: Téléchargement et extraction du shapefile mondial ---
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-zip_path = os.path.join(OUTPUT_DIR, "world_admin_boundaries.zip")
-
-try:
-    print(f"Téléchargement du shapefile depuis {SHAPEFILE_URL}...")
-    response = requests.get(SHAPEFILE_URL, timeout=30)
-    response.raise_for_status()
-    with open(zip_path, "wb") as f:
-        f.write(response.content)
-
-    print(f"Extraction des fichiers nécessaires depuis '{zip_path}'...")
-    with zipfile.ZipFile(zip_path, "r") as z:
-        for file in z.namelist():
-            if file.endswith(('.shp', '.dbf', '.prj', '.shx')):
-                z.extract(file, OUTPUT_DIR)
-    print("Extraction terminée.")
-
-except requests.exceptions.RequestException as e:
-    print(f"ERREUR: Le téléchargement a échoué. Détails: {e}")
-    sys.exit(1)
-
-# --- Étape 2: Filtrage pour isoler les départements du Bénin ---
-raw_shapefile_path = os.path.join(OUTPUT_DIR, RAW_SHAPEFILE_NAME)
-try:
-    print(f"Chargement du shapefile mondial depuis '{raw_shapefile_path}'...")
-    world_gdf = gpd.read_file(raw_shapefile_path)
-    
-    print("Filtrage pour ne conserver que les départements du Bénin...")
-    benin_departments = world_gdf[world_gdf['admin'] == 'Benin'].copy()
-
-    if benin_departments.empty:
-        print("AVERTISSEMENT: Aucun département trouvé pour le Bénin dans le fichier source.")
-        sys.exit(0)
-
-    # --- Étape 3: Sauvegarde du shapefile filtré ---
-    final_shapefile_path = os.path.join(OUTPUT_DIR, FINAL_SHAPEFILE_NAME)
-    benin_departments.to_file(final_shapefile_path, encoding='utf-8')
-    print(f"Shapefile du Bénin sauvegardé avec succès.")
-
-except Exception as e:
-    print(f"ERREUR: Le traitement du shapefile a échoué. Détails: {e}")
-    sys.exit(1)
-
-print("\nScript terminé.")
-print(f"Le shapefile des départements du Bénin est disponible ici : '{final_shapefile_path}'")
\ No newline at end of file
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Limites des départements du Bénin (Natural Earth).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    parse_args(argv)
+    # Rapport d'exécution structuré (voir commun/metrics.py)
+    metrics.start_run("geo_limites")
+    metrics.log("Script 2: Démarrage de la préparation des limites administratives du Bénin.")
+
+    # --- Étape 1: Téléchargement et extraction du shapefile mondial ---
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    zip_path = os.path.join(OUTPUT_DIR, "world_admin_boundaries.zip")
+
+    try:
+        metrics.log(f"Téléchargement du shapefile depuis {SHAPEFILE_URL}...")
+        with metrics.stage("telechargement"):
+            start = time.perf_counter()
+            response = requests.get(SHAPEFILE_URL, timeout=30)
+            response.raise_for_status()
+            with open(zip_path, "wb") as f:
+                f.write(response.content)
+            metrics.add("download_s", time.perf_counter() - start)
+            metrics.add("bytes_downloaded", len(response.content))
+
+        metrics.log(f"Extraction des fichiers nécessaires depuis '{zip_path}'...")
+        with metrics.stage("extraction"), zipfile.ZipFile(zip_path, "r") as z:
+            for file in z.namelist():
+                if file.endswith(('.shp', '.dbf', '.prj', '.shx')):
+                    z.extract(file, OUTPUT_DIR)
+                    metrics.add("fichiers_extraits")
+        metrics.log("Extraction terminée.")
+
+    except requests.exceptions.RequestException as e:
+        metrics.log(f"ERREUR: Le téléchargement a échoué. Détails: {e}")
+        sys.exit(1)
+
+    # --- Étape 2: Filtrage pour isoler les départements du Bénin ---
+    raw_shapefile_path = os.path.join(OUTPUT_DIR, RAW_SHAPEFILE_NAME)
+    try:
+        metrics.log(f"Chargement du shapefile mondial depuis '{raw_shapefile_path}'...")
+        with metrics.stage("filtrage"):
+            world_gdf = gpd.read_file(raw_shapefile_path)
+
+            metrics.log("Filtrage pour ne conserver que les départements du Bénin...")
+            benin_departments = world_gdf[world_gdf['admin'] == 'Benin'].copy()
+            metrics.add("rows_in", len(world_gdf))
+            metrics.add("rows_out", len(benin_departments))
+
+        if benin_departments.empty:
+            metrics.log("AVERTISSEMENT: Aucun département trouvé pour le Bénin dans le fichier source.")
+            sys.exit(0)
+
+        # --- Étape 3: Sauvegarde du shapefile filtré ---
+        final_shapefile_path = os.path.join(OUTPUT_DIR, FINAL_SHAPEFILE_NAME)
+        with metrics.stage("sauvegarde"):
+            benin_departments.to_file(final_shapefile_path, encoding='utf-8')
+            metrics.add("rows_written_shapefile", len(benin_departments))
+        metrics.log(f"Shapefile du Bénin sauvegardé avec succès.")
+
+    except Exception as e:
+        metrics.log(f"ERREUR: Le traitement du shapefile a échoué. Détails: {e}")
+        sys.exit(1)
+
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Le shapefile des départements du Bénin est disponible ici : '{final_shapefile_path}'")
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@
 # Date : 21/09/25
 # ==============================================================================
 
+import argparse
 import rasterio
 from rasterio.mask import mask
 import geopandas as gpd
@@ -16,71 +17,106 @@ import pandas as pd
 import os
 from tqdm import tqdm
 import sys
+import time
+
+# Rendre le dossier partagé `commun` importable depuis ce script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from commun import metrics
+from commun.columnar import save_dataset
 
 # --- CONFIGURATION ---
 INPUT_RASTER_DIR = "downloaded_tifs"
 INPUT_SHAPEFILE_PATH = "shapes_data/benin_departments.shp"
 OUTPUT_CSV_PATH = "population_par_departement_benin.csv"
 
-print("Script 3: Démarrage de l'agrégation de la population par département.")
-
-# --- Étape 1: Vérifier et charger les fichiers d'entrée ---
-if not os.path.exists(INPUT_SHAPEFILE_PATH):
-    print(f"ERREUR: Fichier shapefile '{INPUT_SHAPEFILE_PATH}' non trouvé. Exécutez le script 2.")
-    sys.exit(1)
-if not os.path.exists(INPUT_RASTER_DIR):
-    print(f"ERREUR: Dossier raster '{INPUT_RASTER_DIR}' non trouvé. Exécutez le script 1.")
-    sys.exit(1)
-
-try:
-    admin_boundaries = gpd.read_file(INPUT_SHAPEFILE_PATH)
-    tif_files = sorted([f for f in os.listdir(INPUT_RASTER_DIR) if f.endswith('.tif')])
-    if not tif_files:
-        print(f"ERREUR: Aucun fichier .tif trouvé dans '{INPUT_RASTER_DIR}'.")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Population WorldPop agrégée par département du Bénin.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    parse_args(argv)
+    metrics.start_run("geo_population")
+    metrics.log("Script 3: Démarrage de l'agrégation de la population par département.")
+
+    # --- Étape 1: Vérifier et charger les fichiers d'entrée ---
+    if not os.path.exists(INPUT_SHAPEFILE_PATH):
+        metrics.log(f"ERREUR: Fichier shapefile '{INPUT_SHAPEFILE_PATH}' non trouvé. Exécutez le script 2.")
+        sys.exit(1)
+    if not os.path.exists(INPUT_RASTER_DIR):
+        metrics.log(f"ERREUR: Dossier raster '{INPUT_RASTER_DIR}' non trouvé. Exécutez le script 1.")
         sys.exit(1)
-except Exception as e:
-    print(f"ERREUR: Impossible de charger les fichiers d'entrée. Détails: {e}")
-    sys.exit(1)
-
-# --- Étape 2: Initialiser le DataFrame de résultats ---
-final_df = admin_boundaries[['name', 'geometry']].copy()
-final_df.rename(columns={'name': 'departement'}, inplace=True)
-
-# --- Étape 3: Boucle de traitement pour chaque fichier raster ---
-for tif_file in tqdm(tif_files, desc="Agrégation de la population par année"):
-    filepath = os.path.join(INPUT_RASTER_DIR, tif_file)
-    
+
     try:
-        year = next(part for part in tif_file.split('_') if part.isdigit() and len(part) == 4)
-        col_name = f"population_{year}"
-    except StopIteration:
-        col_name = f"population_{os.path.splitext(tif_file)[0]}"
-    
-    populations = []
-    with rasterio.open(filepath) as src:
-        # Reprojeter le shapefile si le CRS ne correspond pas
-        if admin_boundaries.crs != src.crs:
-            admin_boundaries_reprojected = admin_boundaries.to_crs(src.crs)
-        else:
-            admin_boundaries_reprojected = admin_boundaries
-            
-        for index, row in admin_boundaries_reprojected.iterrows():
-            out_image, out_transform = mask(src, [row.geometry], crop=True, nodata=0)
-            population_sum = out_image[0][out_image[0] >= 0].sum()
-            populations.append(population_sum)
-
-    final_df[col_name] = populations
-
-# --- Étape 4: Nettoyage final et sauvegarde ---
-final_df = final_df.drop(columns='geometry')
-
-# Correction orthographique d'un problème d'encodage connu
-if 'OuÃ©mÃ©' in final_df['departement'].values:
-    final_df['departement'] = final_df['departement'].str.replace('OuÃ©mÃ©', 'Ouémé')
-
-final_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding='utf-8-sig')
-
-print("\nScript terminé.")
-print(f"Le dataset agrégé a été sauvegardé dans : '{OUTPUT_CSV_PATH}'")
-print("\nAperçu du dataset final :")
-print(final_df.head())
\ No newline at end of file
+        admin_boundaries = gpd.read_file(INPUT_SHAPEFILE_PATH)
+        tif_files = sorted([f for f in os.listdir(INPUT_RASTER_DIR) if f.endswith('.tif')])
+        if not tif_files:
+            metrics.log(f"ERREUR: Aucun fichier .tif trouvé dans '{INPUT_RASTER_DIR}'.")
+            sys.exit(1)
+    except Exception as e:
+        metrics.log(f"ERREUR: Impossible de charger les fichiers d'entrée. Détails: {e}")
+        sys.exit(1)
+
+    # --- Étape 2: Initialiser le DataFrame de résultats ---
+    final_df = admin_boundaries[['name', 'geometry']].copy()
+    final_df.rename(columns={'name': 'departement'}, inplace=True)
+
+    # --- Étape 3: Boucle de traitement pour chaque fichier raster ---
+    for tif_file in tqdm(tif_files, desc="Agrégation de la population par année"):
+        filepath = os.path.join(INPUT_RASTER_DIR, tif_file)
+
+        try:
+            year = next(part for part in tif_file.split('_') if part.isdigit() and len(part) == 4)
+            col_name = f"population_{year}"
+        except StopIteration:
+            col_name = f"population_{os.path.splitext(tif_file)[0]}"
+
+        populations = []
+        raster_start = time.perf_counter()
+        with metrics.stage("agregation_rasters"), rasterio.open(filepath) as src:
+            # Reprojeter le shapefile si le CRS ne correspond pas
+            if admin_boundaries.crs != src.crs:
+                admin_boundaries_reprojected = admin_boundaries.to_crs(src.crs)
+            else:
+                admin_boundaries_reprojected = admin_boundaries
+
+            for index, row in admin_boundaries_reprojected.iterrows():
+                department_start = time.perf_counter()
+                out_image, out_transform = mask(src, [row.geometry], crop=True, nodata=0)
+                population_sum = out_image[0][out_image[0] >= 0].sum()
+                populations.append(population_sum)
+                # Durée de découpage et de somme par département et par année
+                metrics.timing("departement", time.perf_counter() - department_start,
+                               annee=col_name[len("population_"):], departement=row["name"])
+                metrics.add("pixels_lus", int(out_image[0].size))
+            metrics.timing("raster", time.perf_counter() - raster_start, annee=col_name[len("population_"):], fichier=tif_file)
+            metrics.add("rasters_lus")
+
+        final_df[col_name] = populations
+
+    # --- Étape 4: Nettoyage final et sauvegarde ---
+    final_df = final_df.drop(columns='geometry')
+
+    # Correction orthographique d'un problème d'encodage connu
+    if 'OuÃ©mÃ©' in final_df['departement'].values:
+        final_df['departement'] = final_df['departement'].str.replace('OuÃ©mÃ©', 'Ouémé')
+
+    # Format long pour le magasin Parquet : une ligne par (département, année)
+    year_cols = [c for c in final_df.columns if c.startswith('population_') and c[len('population_'):].isdigit()]
+    df_parquet = final_df.melt(id_vars=['departement'], value_vars=year_cols, var_name='annee', value_name='valeur')
+    df_parquet['annee'] = df_parquet['annee'].str[len('population_'):].astype(int)
+    df_parquet['indicator'] = 'population'
+
+    # Export CSV et/ou magasin Parquet partitionné par source et indicateur (voir commun/columnar.py)
+    with metrics.stage("sauvegarde"):
+        save_dataset(final_df, OUTPUT_CSV_PATH, 'worldpop', df_parquet, ['departement'], index=False, encoding='utf-8-sig')
+
+    metrics.log("\nScript terminé.")
+    metrics.log(f"Le dataset agrégé a été sauvegardé dans : '{OUTPUT_CSV_PATH}'")
+    metrics.log("\nAperçu du dataset final :")
+    print(final_df.head())
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    main()
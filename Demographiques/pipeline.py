@@ -0,0 +1,332 @@
+# ==============================================================================
+# ORCHESTRATEUR DU PIPELINE DE DONNÉES
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Déclarer les scripts numérotés du projet comme les étapes d'un
+#            graphe de dépendances (DAG) et les exécuter :
+#            - les branches indépendantes (Banque Mondiale, DHS, WPP,
+#              géographique) tournent en parallèle ;
+#            - une étape dont le code et les entrées n'ont pas changé depuis
+#              sa dernière exécution réussie est ignorée (empreintes SHA-256) ;
+#            - un rapport final donne la durée de chaque étape et le chemin
+#              critique, c'est-à-dire la durée minimale d'une reconstruction
+#              complète avec un parallélisme illimité.
+# Utilisation : python pipeline.py [ETAPE ...] [--force] [--workers N] [--dry-run] [--list]
+# ==============================================================================
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from commun.watermarks import Watermarks, file_fingerprint
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(BASE_DIR, ".cache", "pipeline")
+STATE_PATH = os.path.join(STATE_DIR, "state.json")
+LOG_DIR = os.path.join(STATE_DIR, "logs")
+MAX_WORKERS = 4
+# Les étapes « source » téléchargent des données distantes : leur fraîcheur ne peut pas
+# être connue hors ligne, elles sont donc relancées au-delà de cet âge (en heures)
+SOURCE_MAX_AGE_HOURS = 24
+# Code partagé importé par les scripts : le modifier invalide toutes les étapes
+COMMON_CODE = ["commun/*.py"]
+WPP_DIR = "WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL"
+
+# Statuts d'exécution
+OK, UP_TO_DATE, FAILED, SKIPPED = "ok", "à jour", "échec", "ignorée"
+
+
+def _wb_outputs():
+    """Fichiers produits par `wb_runner.py`, d'après le registre des indicateurs."""
+    with open(os.path.join(BASE_DIR, "wb_indicators.json"), encoding="utf-8") as f:
+        return [f"{spec['dossier']}/content/data/cleaned/{spec['output_file']}" for spec in json.load(f)]
+
+
+# Déclaration des étapes. Les chemins sont relatifs à BASE_DIR ; chaque script est
+# exécuté depuis son propre dossier, comme lorsqu'il est lancé à la main (avec les
+# arguments facultatifs `args`).
+STAGES = {
+    "wb_indicateurs": {
+        "script": "wb_runner.py",
+        "deps": [],
+        "inputs": ["wb_indicators.json"],
+        "outputs": _wb_outputs(),
+        "source": True,
+    },
+    "wb_education": {
+        "script": "C_7/main.py",
+        "deps": [],
+        "inputs": [],
+        "outputs": ["C_7/data/cleaned/education_indicators_benin_consolidated.csv"],
+        "source": True,
+    },
+    "dhs_indicateurs": {
+        "script": "DHS/2_main.py",
+        "deps": [],
+        "inputs": [],
+        "outputs": ["DHS/dhs_indicators_benin_api.csv"],
+        "source": True,
+    },
+    "dhs_departements": {
+        "script": "DHS/2_main.py",
+        "args": ["--sous-national"],
+        "deps": [],
+        "inputs": [],
+        "outputs": ["DHS/dhs_indicators_benin_departements.csv"],
+        "source": True,
+    },
+    # Conversion unique des feuilles du classeur (cache Parquet) et magasin par pays : les étapes
+    # de nettoyage en dépendent, pour ne pas analyser le même classeur plusieurs fois en parallèle
+    # et toujours lire le classeur par le même chemin (cache des feuilles complètes)
+    "wpp_index_pays": {
+        "script": f"{WPP_DIR}/1_load_un_data.py",
+        "args": ["--index-pays"],
+        "deps": [],
+        "inputs": [f"{WPP_DIR}/kaggle_data_unzipped/WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL.xlsx"],
+        "outputs": ["data/wpp_locations/index.json"],
+        "source": False,
+    },
+    # Chargement et nettoyage enchaînés en mémoire : le CSV brut intermédiaire n'est pas produit
+    "wpp_nettoyage": {
+        "script": f"{WPP_DIR}/2_clean_un_data.py",
+        "args": ["--depuis-excel"],
+        "deps": ["wpp_index_pays"],
+        "inputs": [f"{WPP_DIR}/kaggle_data_unzipped/WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL.xlsx"],
+        "outputs": [f"{WPP_DIR}/un_demographic_indicators_benin_cleaned.csv"],
+        "source": False,
+    },
+    "wpp_projections_nettoyage": {
+        "script": f"{WPP_DIR}/2_clean_un_data.py",
+        "args": ["--depuis-excel", "--projections"],
+        "deps": ["wpp_index_pays"],
+        "inputs": [f"{WPP_DIR}/kaggle_data_unzipped/WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL.xlsx"],
+        "outputs": [f"{WPP_DIR}/un_demographic_indicators_benin_projections_cleaned.csv"],
+        "source": False,
+    },
+    "geo_rasters": {
+        "script": "geographique/1_scrapping.py",
+        "deps": [],
+        "inputs": [],
+        "outputs": ["geographique/downloaded_tifs"],
+        "source": True,
+    },
+    "geo_departements": {
+        "script": "geographique/2_benin_departements.py",
+        "deps": [],
+        "inputs": [],
+        "outputs": ["geographique/shapes_data/benin_departments.shp"],
+        "source": True,
+    },
+    "geo_population": {
+        "script": "geographique/3_filtrage_netoyage.py",
+        "deps": ["geo_rasters", "geo_departements"],
+        "inputs": ["geographique/downloaded_tifs", "geographique/shapes_data/benin_departments.*"],
+        "outputs": ["geographique/population_par_departement_benin.csv"],
+        "source": False,
+    },
+}
+
+
+def topological_order(stages):
+    """Ordre d'exécution compatible avec les dépendances. Lève ValueError si le graphe est invalide."""
+    order, visiting, done = [], set(), set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name not in stages:
+            raise ValueError(f"Étape inconnue : '{name}' (requise par {' -> '.join(path) or 'la ligne de commande'}).")
+        if name in visiting:
+            raise ValueError(f"Cycle de dépendances : {' -> '.join(path + [name])}.")
+        visiting.add(name)
+        for dep in stages[name]["deps"]:
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in stages:
+        visit(name, [])
+    return order
+
+
+def select_stages(stages, targets):
+    """Restreint le graphe aux étapes demandées et à tous leurs ancêtres."""
+    selected, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"Étape inconnue : '{name}'. Étapes disponibles : {', '.join(stages)}.")
+        if name not in selected:
+            selected.add(name)
+            todo.extend(stages[name]["deps"])
+    return {name: stage for name, stage in stages.items() if name in selected}
+
+
+def _expand(patterns):
+    """Liste triée des fichiers désignés par des chemins, motifs glob ou dossiers (relatifs à BASE_DIR)."""
+    files = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(BASE_DIR, pattern)):
+            if os.path.isdir(path):
+                for dirpath, _, filenames in os.walk(path):
+                    files.update(os.path.join(dirpath, f) for f in filenames)
+            else:
+                files.add(path)
+    return sorted(files)
+
+
+def stage_fingerprint(stage):
+    """Empreinte du script (et de ses arguments), du code partagé et des entrées d'une étape (noms et contenus)."""
+    files = _expand([stage["script"]] + COMMON_CODE + stage["inputs"])
+    names = "\n".join([os.path.relpath(path, BASE_DIR) for path in files] + stage.get("args", []))
+    return hashlib.sha256((names + file_fingerprint(*files)).encode("utf-8")).hexdigest()
+
+
+def _outputs_exist(stage):
+    return all(glob.glob(os.path.join(BASE_DIR, pattern)) for pattern in stage["outputs"])
+
+
+def is_up_to_date(name, stage, state, fingerprint):
+    """Vrai si les sorties existent et que ni le code ni les entrées n'ont changé (et, pour une source, si elle est récente)."""
+    if not _outputs_exist(stage) or not state.is_current(name, fingerprint):
+        return False
+    if stage["source"]:
+        updated_at = time.mktime(time.strptime(state.get(name)["updated_at"], "%Y-%m-%dT%H:%M:%S"))
+        return time.time() - updated_at < SOURCE_MAX_AGE_HOURS * 3600
+    return True
+
+
+def run_stage(name, stage, state, force=False):
+    """Exécute une étape dans un sous-processus si elle n'est pas à jour. Renvoie (statut, durée en secondes)."""
+    fingerprint = stage_fingerprint(stage)
+    if not force and is_up_to_date(name, stage, state, fingerprint):
+        return UP_TO_DATE, 0.0
+
+    print(f"[{name}] démarrage de '{stage['script']}'...")
+    script = os.path.join(BASE_DIR, stage["script"])
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.run(
+            [sys.executable, script, *stage.get("args", [])], cwd=os.path.dirname(script),
+            stdout=log, stderr=subprocess.STDOUT, env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+        )
+    duration = time.perf_counter() - start
+
+    if process.returncode != 0:
+        print(f"ERREUR: L'étape '{name}' a échoué (code {process.returncode}). Journal : '{log_path}'")
+        return FAILED, duration
+    if not _outputs_exist(stage):
+        print(f"ERREUR: L'étape '{name}' n'a pas produit toutes ses sorties {stage['outputs']}. Journal : '{log_path}'")
+        return FAILED, duration
+    state.update(name, fingerprint, None)
+    return OK, duration
+
+
+def run_pipeline(stages, max_workers=MAX_WORKERS, force=False):
+    """
+    Exécute le graphe : chaque étape démarre dès que toutes ses dépendances
+    ont réussi ; les descendants d'une étape en échec sont ignorés.
+    Renvoie {étape: (statut, durée)} et la durée totale (horloge murale).
+    """
+    topological_order(stages)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    state = Watermarks(STATE_PATH)
+    results, pending, running = {}, dict(stages), {}
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending or running:
+                ready = [name for name, stage in pending.items() if all(dep in results for dep in stage["deps"])]
+                for name in ready:
+                    stage = pending.pop(name)
+                    failed_deps = [dep for dep in stage["deps"] if results[dep][0] in (FAILED, SKIPPED)]
+                    if failed_deps:
+                        results[name] = (SKIPPED, 0.0)
+                        print(f"[{name}] ignorée : dépendance(s) en échec {failed_deps}.")
+                        continue
+                    running[executor.submit(run_stage, name, stage, state, force)] = name
+                if ready and not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    print(f"[{name}] {results[name][0]} ({results[name][1]:.1f} s)")
+    finally:
+        state.save()
+    return results, time.perf_counter() - start
+
+
+def critical_path(stages, results):
+    """Chaîne de dépendances la plus longue (en durée mesurée) et sa durée totale."""
+    finish, previous = {}, {}
+    for name in topological_order(stages):
+        deps = stages[name]["deps"]
+        longest = max(deps, key=lambda dep: finish[dep], default=None)
+        previous[name] = longest
+        finish[name] = results.get(name, (None, 0.0))[1] + (finish[longest] if longest else 0.0)
+    end = max(finish, key=finish.get)
+    chain = [end]
+    while previous[chain[-1]]:
+        chain.append(previous[chain[-1]])
+    return chain[::-1], finish[end]
+
+
+def print_report(stages, results, wall_time):
+    print("\n--- Rapport d'exécution ---")
+    print(f"{'étape':<26} {'statut':<8} {'durée (s)':>9}")
+    for name in topological_order(stages):
+        status, duration = results[name]
+        print(f"{name:<26} {status:<8} {duration:>9.1f}")
+    chain, chain_time = critical_path(stages, results)
+    total = sum(duration for _, duration in results.values())
+    print(f"\nDurée totale (horloge murale) : {wall_time:.1f} s — somme des étapes : {total:.1f} s")
+    print(f"Chemin critique : {' -> '.join(chain)} ({chain_time:.1f} s)")
+
+
+def main(argv=None, prog=None):
+    """Point d'entrée en ligne de commande ; renvoie le code de sortie."""
+    parser = argparse.ArgumentParser(prog=prog, description="Exécution du pipeline de données Démographiques.")
+    parser.add_argument("etapes", nargs="*", help="Étapes à produire (avec leurs dépendances). Par défaut : toutes.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Nombre d'étapes simultanées")
+    parser.add_argument("--force", action="store_true", help="Ré-exécuter les étapes même si elles sont à jour")
+    parser.add_argument("--dry-run", action="store_true", help="Afficher les étapes à exécuter sans les lancer")
+    parser.add_argument("--list", action="store_true", help="Afficher le graphe des étapes")
+    args = parser.parse_args(argv)
+
+    try:
+        stages = select_stages(STAGES, args.etapes) if args.etapes else STAGES
+        order = topological_order(stages)
+    except ValueError as e:
+        print(f"ERREUR: {e}")
+        return 2
+
+    if args.list or args.dry_run:
+        state = Watermarks(STATE_PATH)
+        for name in order:
+            stage = stages[name]
+            deps = f" <- {', '.join(stage['deps'])}" if stage["deps"] else ""
+            line = f"{name:<26} {stage['script']}{deps}"
+            if args.dry_run:
+                current = not args.force and is_up_to_date(name, stage, state, stage_fingerprint(stage))
+                line += " [à jour]" if current else " [à exécuter]"
+            print(line)
+        return 0
+
+    results, wall_time = run_pipeline(stages, max_workers=args.workers, force=args.force)
+    print_report(stages, results, wall_time)
+    return 1 if any(status in (FAILED, SKIPPED) for status, _ in results.values()) else 0
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    sys.exit(main())
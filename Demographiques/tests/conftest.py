@@ -0,0 +1,10 @@
+# ==============================================================================
+# CONFIGURATION DES TESTS
+# Rend le dossier partagé `commun` importable, comme le font les scripts.
+# Utilisation : python -m pytest -q Demographiques/tests
+# ==============================================================================
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,72 @@
+# ==============================================================================
+# TESTS : RÉFÉRENCE DU BENCHMARK DE LA CHAÎNE BANQUE MONDIALE
+# (benchmarks/bench_pipeline.py)
+# Le nombre de lignes de chaque étape sur les ZIP versionnés doit rester celui
+# de la référence versionnée (baseline_pipeline.json), et un ralentissement
+# (uniforme ou d'une seule étape) doit être signalé comme régression.
+# ==============================================================================
+
+import importlib.util
+import json
+import os
+
+BENCH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "bench_pipeline.py")
+
+
+def _load_bench():
+    spec = importlib.util.spec_from_file_location("bench_pipeline", BENCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_fixture_row_counts_match_committed_baseline():
+    bench = _load_bench()
+    with open(bench.BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    results = {"fixtures": bench.benchmark(bench.fixture_sources(), ["Benin"], repeat=1)}
+    assert {stage: entry["rows"] for stage, entry in results["fixtures"].items()} == \
+        {stage: entry["rows"] for stage, entry in baseline["fixtures"].items()}
+    assert abs(sum(entry["share"] for entry in baseline["fixtures"].values()) - 1) < 0.01
+
+
+def test_row_count_change_is_reported_as_regression():
+    bench = _load_bench()
+    baseline = {"s": {stage: {"rows": 10, "share": 0.2} for stage in bench.STAGES}}
+    results = {"s": {stage: {"rows": 10, "share": 0.2, "wall_s": 1.0, "peak_rss_mb": 100.0}
+                     for stage in bench.STAGES}}
+    assert bench.find_regressions(results, baseline) == []
+
+    results["s"]["filtrage"]["rows"] = 9
+    results["s"]["nettoyage"]["share"] = 0.6
+    assert len(bench.find_regressions(results, baseline)) == 2
+
+
+def test_uniform_slowdown_is_reported_as_regression():
+    bench = _load_bench()
+    baseline = {"s": {stage: {"rows": 10, "share": 0.2, "norm": 1.0} for stage in bench.STAGES}}
+    # Toutes les étapes deux fois plus lentes sur une machine de même étalonnage : parts inchangées
+    results = {"s": {stage: {"rows": 10, "share": 0.2, "norm": 2.0, "calibration_s": 0.05}
+                     for stage in bench.STAGES}}
+    regressions = bench.find_regressions(results, baseline)
+    assert len(regressions) == len(bench.STAGES)
+    assert all("temps normalisé" in line for line in regressions)
+
+
+def test_injected_slowdown_of_one_stage_is_reported(monkeypatch):
+    bench = _load_bench()
+    sources = bench.fixture_sources()
+    baseline = bench.baseline_entries({"fixtures": bench.benchmark(sources, ["Benin"], repeat=5)})
+
+    # Filtrage deux fois plus lent : chaque lecture du CSV est faite deux fois
+    read_wb_csv = bench.read_wb_csv
+
+    def slow_read_wb_csv(*args, **kwargs):
+        read_wb_csv(*args, **kwargs)
+        return read_wb_csv(*args, **kwargs)
+
+    monkeypatch.setattr(bench, "read_wb_csv", slow_read_wb_csv)
+    results = {"fixtures": bench.benchmark(sources, ["Benin"], repeat=5)}
+    regressions = bench.find_regressions(results, baseline)
+    assert any(line.startswith("fixtures/filtrage : temps normalisé") for line in regressions), regressions
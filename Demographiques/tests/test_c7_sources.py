@@ -0,0 +1,138 @@
+# ==============================================================================
+# TESTS : SOURCES « zip » ET « api » DE C_7 (C_7/main.py)
+# Une session HTTP factice sert, pour les mêmes ZIP versionnés sous
+# C_*/content/data/raw/, le fichier global de chaque indicateur et les pages
+# de l'API JSON. Les deux modes doivent produire les mêmes tableaux consolidés.
+# ==============================================================================
+
+import glob
+import importlib.util
+import json
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+import requests
+
+from commun import wb_api
+from commun.consolidation import consolidate, consolidate_panel
+from commun.http_cache import HttpCache
+from commun.wb_reader import read_wb_csv
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURE_PATTERN = os.path.join(BASE_DIR, "C_*", "content", "data", "raw", "*.zip")
+ZIP_URL_PREFIX = "https://api.worldbank.org/v2/en/indicator/"
+
+
+def _load_c7():
+    spec = importlib.util.spec_from_file_location("c7_main", os.path.join(BASE_DIR, "C_7", "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fixtures():
+    """{code de l'indicateur: (chemin du ZIP, membre CSV)} pour les ZIP versionnés."""
+    fixtures = {}
+    for zip_path in sorted(glob.glob(FIXTURE_PATTERN)):
+        with zipfile.ZipFile(zip_path) as z:
+            member = next(n for n in z.namelist() if n.startswith("API_") and n.endswith(".csv"))
+        fixtures.setdefault(member[len("API_"):].split("_DS2_")[0], (zip_path, member))
+    return fixtures
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b""):
+        self.status_code = status_code
+        self.content = body
+        self.headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class WorldBankSession:
+    """Sert les ZIP versionnés (mode zip) et leur contenu page par page, années décroissantes (mode api)."""
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get(self, url, params=None, headers=None, stream=False, timeout=None):
+        if url.startswith(ZIP_URL_PREFIX):
+            code = url[len(ZIP_URL_PREFIX):].split("?")[0]
+            if code not in self.fixtures:
+                return FakeResponse(404)
+            with open(self.fixtures[code][0], "rb") as f:
+                return FakeResponse(body=f.read())
+
+        _, countries, _, code = url[len(wb_api.API_BASE_URL) + 1:].split("/")
+        if code not in self.fixtures:
+            body = [{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}]
+            return FakeResponse(body=json.dumps(body).encode("utf-8"))
+        first, last = (int(y) for y in params["date"].split(":"))
+        df = read_wb_csv(*self.fixtures[code], countries=countries.split(";"))
+        records = [
+            {
+                "indicator": {"id": code, "value": ""},
+                "country": {"id": row["Country Code"][:2], "value": row["Country Name"]},
+                "countryiso3code": row["Country Code"],
+                "date": str(year),
+                "value": None if pd.isna(row[str(year)]) else row[str(year)],
+            }
+            for _, row in df.iterrows()
+            for year in range(last, first - 1, -1)
+            if str(year) in df.columns
+        ]
+        page, per_page = params["page"], params["per_page"]
+        meta = {"page": page, "pages": max(1, -(-len(records) // per_page)), "per_page": per_page,
+                "total": len(records)}
+        return FakeResponse(body=json.dumps([meta, records[(page - 1) * per_page:page * per_page]]).encode("utf-8"))
+
+
+@pytest.fixture
+def c7(tmp_path, monkeypatch):
+    module = _load_c7()
+    session = WorldBankSession(_fixtures())
+    monkeypatch.setattr(module, "create_session", lambda pool_size=8: session)
+    monkeypatch.setattr(module, "HttpCache", lambda session: HttpCache(str(tmp_path / "http"), session=session))
+    monkeypatch.setattr(wb_api, "PER_PAGE", 50)
+    return module
+
+
+def test_zip_and_api_sources_give_identical_consolidated_output(c7):
+    by_source = {source: c7.collect_indicators(c7.INDICATORS, max_workers=2, source=source)
+                 for source in ("zip", "api")}
+    # Un indicateur sans fichier versionné échoue dans les deux modes
+    assert len(by_source["zip"]) == len(_fixtures().keys() & c7.INDICATORS.keys()) >= 2
+    pd.testing.assert_frame_equal(consolidate(by_source["api"], on="annee"),
+                                  consolidate(by_source["zip"], on="annee"))
+
+
+def test_zip_and_api_sources_give_identical_panels(c7):
+    countries = ["BEN", "TGO", "NER"]
+    by_source = {source: c7.collect_indicators(c7.INDICATORS, max_workers=2, countries=countries, source=source)
+                 for source in ("zip", "api")}
+    df_zip = consolidate_panel(by_source["zip"])
+    assert sorted(df_zip["country_code"].unique()) == sorted(countries)
+    pd.testing.assert_frame_equal(consolidate_panel(by_source["api"]), df_zip)
@@ -0,0 +1,54 @@
+# ==============================================================================
+# TESTS : MAGASIN PARQUET PARTITIONNÉ (commun/columnar.py)
+# ==============================================================================
+
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+
+from commun import columnar
+
+pytest.importorskip("pyarrow")
+
+
+def _panel(country):
+    return pd.DataFrame({"pays": country, "annee": range(2000, 2010), "indicator": "SE.PRM.ENRR",
+                         "valeur": [float(i) for i in range(10)]})
+
+
+def _write(root, countries):
+    for country in countries:
+        columnar.write_parquet(_panel(country), "world_bank", ["pays"], root=root)
+
+
+def test_concurrent_processes_keep_all_entities(tmp_path):
+    pytest.importorskip("fcntl")
+    root = str(tmp_path)
+    countries = [f"P{i:02d}" for i in range(20)]
+    # Deux processus (comme wb_runner.py et C_7/main.py) écrivent la même partition
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_write, args=(root, countries[i::2])) for i in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    df = columnar.read_parquet("world_bank", indicators=["SE.PRM.ENRR"], root=root)
+    assert sorted(df["pays"].astype(str).unique()) == countries
+    assert len(df) == 10 * len(countries)
+
+
+def test_interrupted_write_does_not_break_reads(tmp_path):
+    root = str(tmp_path)
+    [path] = columnar.write_parquet(_panel("BEN"), "world_bank", ["pays"], root=root)
+    # Fichier temporaire vide laissé par une écriture en cours ou interrompue
+    fd, _ = columnar._temp_file(os.path.dirname(path))
+    os.close(fd)
+
+    df = columnar.read_parquet("world_bank", root=root)
+    assert len(df) == 10
+    columnar.write_parquet(_panel("TGO"), "world_bank", ["pays"], root=root)
+    assert len(columnar.read_parquet("world_bank", root=root)) == 20
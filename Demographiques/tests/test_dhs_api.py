@@ -0,0 +1,83 @@
+# ==============================================================================
+# TESTS : CLIENT DE L'API DHS (commun/dhs_api.py)
+# Session HTTP factice servant une requête de deux pages, dont le contenu
+# change entre deux « versions » de l'API.
+# ==============================================================================
+
+import json
+import os
+
+from commun import dhs_api
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self._body = json.dumps(payload).encode("utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i:i + chunk_size]
+
+
+class FakeSession:
+    """Deux pages d'une ligne ; `version` change les valeurs servies."""
+
+    def __init__(self):
+        self.version = 1
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        page = int(params["page"])
+        self.requests.append(page)
+        data = [{"Indicator": "Taux", "SurveyYear": 2000 + page, "Value": 10.0 * self.version + page}]
+        return FakeResponse({"TotalPages": 2, "Page": page, "Data": data})
+
+
+def _fetch(session, cache):
+    limiter = dhs_api.RateLimiter(rate=1000)
+    return dhs_api.fetch_dhs_data("BJ", ["X"], session=session, cache=cache, limiter=limiter, max_workers=2)
+
+
+def test_query_snapshot_is_cached_and_expires_as_a_whole(tmp_path):
+    session = FakeSession()
+    cache = dhs_api.ResponseCache(str(tmp_path), ttl_hours=1)
+    assert _fetch(session, cache)["Value"].tolist() == [11.0, 12.0]
+    assert sorted(session.requests) == [1, 2]
+
+    # Instantané valide : aucune requête
+    session.version = 2
+    assert _fetch(session, cache)["Value"].tolist() == [11.0, 12.0]
+    assert len(session.requests) == 2
+
+    # Instantané expiré : toutes les pages sont redemandées, jamais un mélange des deux versions
+    (snapshot,) = [d for d in os.listdir(tmp_path) if os.path.isdir(tmp_path / d)]
+    manifest_path = tmp_path / snapshot / dhs_api.SNAPSHOT_MANIFEST
+    manifest = json.loads(manifest_path.read_text())
+    manifest["created_at"] -= 2 * 3600
+    manifest_path.write_text(json.dumps(manifest))
+    assert _fetch(session, cache)["Value"].tolist() == [21.0, 22.0]
+    assert sorted(session.requests[2:]) == [1, 2]
+    assert os.listdir(tmp_path) == [snapshot]
+
+
+def test_truncated_cached_page_refetches_whole_query(tmp_path):
+    session = FakeSession()
+    cache = dhs_api.ResponseCache(str(tmp_path), ttl_hours=1)
+    _fetch(session, cache)
+    (snapshot,) = os.listdir(tmp_path)
+    page_path = tmp_path / snapshot / "page-2.json.gz"
+    page_path.write_bytes(page_path.read_bytes()[:10])
+
+    session.version = 2
+    assert _fetch(session, cache)["Value"].tolist() == [21.0, 22.0]
+    assert sorted(session.requests[2:]) == [1, 2]
@@ -0,0 +1,107 @@
+# ==============================================================================
+# TESTS : CATALOGUE LOCAL DES INDICATEURS DHS (commun/dhs_catalog.py)
+# Points d'accès /surveys et /indicators factices ; base SQLite temporaire.
+# ==============================================================================
+
+import pandas as pd
+import pytest
+
+from commun import dhs_api, dhs_catalog
+
+INDICATORS = [
+    {"IndicatorId": "HC_ELEC_H_ELC", "Label": "Ménages ayant l'électricité", "ShortName": "Électricité",
+     "Definition": "Pourcentage de ménages ayant l'électricité", "Level1": "Caractéristiques des ménages",
+     "Level2": "Électricité", "Level3": None, "MeasurementType": "Percent"},
+    {"IndicatorId": "ED_LITR_W_LIT", "Label": "Femmes alphabétisées", "ShortName": "Alphabétisation",
+     "Definition": "Pourcentage de femmes sachant lire", "Level1": "Éducation",
+     "Level2": "Alphabétisation", "Level3": None, "MeasurementType": "Percent"},
+    {"IndicatorId": "WS_SRCE_H_IMP", "Label": "Source d'eau améliorée", "ShortName": "Eau potable",
+     "Definition": "Ménages utilisant une source d'eau de boisson améliorée", "Level1": "Eau et assainissement",
+     "Level2": "Source d'eau", "Level3": None, "MeasurementType": "Percent"},
+]
+SURVEYS = [
+    {"SurveyId": "BJ2006DHS", "DHS_CountryCode": "BJ", "SurveyYear": 2006, "SurveyType": "DHS", "ReleaseDate": "2007"},
+    {"SurveyId": "BJ2018DHS", "DHS_CountryCode": "BJ", "SurveyYear": 2018, "SurveyType": "DHS", "ReleaseDate": "2019"},
+    {"SurveyId": "TG2014DHS", "DHS_CountryCode": "TG", "SurveyYear": 2014, "SurveyType": "DHS", "ReleaseDate": "2015"},
+]
+# Indicateurs publiés par pays (returnFields=IndicatorId)
+AVAILABLE = {"BJ": ["HC_ELEC_H_ELC", "ED_LITR_W_LIT", "WS_SRCE_H_IMP"], "TG": ["HC_ELEC_H_ELC"]}
+
+
+class FakeApi:
+    """Remplace dhs_api.fetch_dhs_endpoint et compte les appels par point d'accès."""
+
+    def __init__(self):
+        self.indicators = [dict(r) for r in INDICATORS]
+        self.calls = []
+
+    def __call__(self, endpoint, params=None, session=None, base_url=None, cache=None):
+        params = params or {}
+        self.calls.append(endpoint)
+        if endpoint == "surveys":
+            countries = params["countryIds"].split(",")
+            return pd.DataFrame([s for s in SURVEYS if s["DHS_CountryCode"] in countries])
+        if "countryIds" in params:
+            return pd.DataFrame({"IndicatorId": AVAILABLE.get(params["countryIds"], [])})
+        return pd.DataFrame(self.indicators)
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr(dhs_api, "fetch_dhs_endpoint", api)
+    conn = dhs_catalog.open_catalog(str(tmp_path / "catalogue.sqlite"))
+    yield conn, api
+    conn.close()
+
+
+def _rowids(conn):
+    return (conn.execute("SELECT rowid, indicator_id, row_hash FROM indicators ORDER BY indicator_id").fetchall(),
+            conn.execute("SELECT rowid, indicator_id FROM indicators_fts ORDER BY indicator_id").fetchall())
+
+
+def test_catalog_is_built_and_searchable_offline(catalog):
+    conn, api = catalog
+    summary = dhs_catalog.update_catalog(conn, ["BJ", "TG"])
+    assert summary["indicateurs_ajoutes"] == 3
+    assert summary["enquetes"] == 3
+    assert summary["pays_actualises"] == ["BJ", "TG"]
+
+    # Recherche insensible aux accents, avec préfixes
+    assert dhs_catalog.search(conn, "electricite")["indicator_id"].tolist() == ["HC_ELEC_H_ELC"]
+    assert dhs_catalog.search(conn, "alphab")["indicator_id"].tolist() == ["ED_LITR_W_LIT"]
+    assert set(dhs_catalog.search(conn, "menages")["indicator_id"]) == {"HC_ELEC_H_ELC", "WS_SRCE_H_IMP"}
+    # Restriction aux indicateurs disponibles pour un pays
+    assert dhs_catalog.search(conn, "menages", country="TG")["indicator_id"].tolist() == ["HC_ELEC_H_ELC"]
+    assert len(dhs_catalog.search(conn, country="BJ", limit=None)) == 3
+    assert dhs_catalog.available_countries(conn, "HC_ELEC_H_ELC") == ["BJ", "TG"]
+
+
+def test_refresh_without_changes_does_not_rewrite_rows(catalog):
+    conn, api = catalog
+    dhs_catalog.update_catalog(conn, ["BJ", "TG"])
+    before = _rowids(conn)
+
+    # Aucune nouvelle enquête : seule la liste des enquêtes est relue
+    api.calls.clear()
+    summary = dhs_catalog.update_catalog(conn, ["BJ", "TG"])
+    assert api.calls == ["surveys"]
+    assert summary["pays_actualises"] == []
+
+    # Relecture forcée d'une liste d'indicateurs identique : aucune ligne réécrite
+    summary = dhs_catalog.update_catalog(conn, ["BJ", "TG"], force=True)
+    assert (summary["indicateurs_ajoutes"], summary["indicateurs_modifies"], summary["indicateurs_supprimes"]) == (0, 0, 0)
+    assert _rowids(conn) == before
+
+
+def test_changed_and_removed_indicators_are_reindexed(catalog):
+    conn, api = catalog
+    dhs_catalog.update_catalog(conn, ["BJ"])
+
+    api.indicators[0]["Label"] = "Ménages raccordés au réseau électrique"
+    del api.indicators[2]
+    summary = dhs_catalog.update_catalog(conn, ["BJ"], force=True)
+    assert (summary["indicateurs_ajoutes"], summary["indicateurs_modifies"], summary["indicateurs_supprimes"]) == (0, 1, 1)
+    assert dhs_catalog.search(conn, "raccordes")["indicator_id"].tolist() == ["HC_ELEC_H_ELC"]
+    assert dhs_catalog.search(conn, "eau")["indicator_id"].tolist() == []
+    assert conn.execute("SELECT COUNT(*) FROM indicators_fts").fetchone()[0] == 2
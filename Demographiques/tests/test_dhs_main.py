@@ -0,0 +1,141 @@
+# ==============================================================================
+# TESTS : COLLECTE DHS (DHS/2_main.py)
+# `fetch_dhs_data` est remplacé par une réponse factice ; le magasin Parquet
+# est écrit dans un dossier temporaire.
+# ==============================================================================
+
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+from commun import columnar
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def _load_dhs_main():
+    spec = importlib.util.spec_from_file_location("dhs_2_main", os.path.join(BASE_DIR, "DHS", "2_main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def dhs(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "PARQUET_DIR", str(tmp_path / "parquet"))
+    monkeypatch.chdir(tmp_path)
+    return _load_dhs_main()
+
+
+def _national_payload(indicators, base):
+    return pd.DataFrame([
+        {"IndicatorId": indicator, "SurveyYear": year, "Value": base + k + (year - 2000) / 10, "IsPreferred": 1}
+        for k, indicator in enumerate(indicators)
+        for year in (2006, 2012, 2018)
+    ])
+
+
+def _entity_files(root, country):
+    """{chemin: (inode, date de modification)} des fichiers d'un pays dans le magasin."""
+    pattern_dir = os.path.join(root, "source=dhs_pays")
+    files = {}
+    for directory, _, names in os.walk(pattern_dir):
+        if os.path.basename(directory) == f"country_code={country}":
+            for name in names:
+                path = os.path.join(directory, name)
+                files[path] = (os.stat(path).st_ino, os.stat(path).st_mtime_ns)
+    return files
+
+
+def test_panel_refresh_rewrites_only_the_refreshed_country(dhs, monkeypatch):
+    root = columnar.PARQUET_DIR
+    payloads = {"BJ": _national_payload(dhs.INDICATOR_IDS, 10), "TG": _national_payload(dhs.INDICATOR_IDS, 50)}
+    monkeypatch.setattr(dhs, "fetch_dhs_data", lambda country, *args, **kwargs: payloads[country])
+    dhs.run_panel(["BJ", "TG"])
+    togo_files = _entity_files(root, "TG")
+    assert len(togo_files) == len(dhs.INDICATOR_IDS)
+
+    # Le Bénin est actualisé et ne publie plus un indicateur
+    dropped = "WS_SRCE_H_IMP"
+    payloads["BJ"] = _national_payload([i for i in dhs.INDICATOR_IDS if i != dropped], 20)
+    dhs.run_panel(["BJ"])
+
+    assert _entity_files(root, "TG") == togo_files
+    benin_files = _entity_files(root, "BJ")
+    assert len(benin_files) == len(dhs.INDICATOR_IDS) - 1
+    assert not any(f"indicator={dropped}" in path for path in benin_files)
+
+    # Écriture du Togo interrompue avant le remplacement : son fichier temporaire reste dans la partition
+    def crash(src, dst):
+        raise OSError("disque plein")
+
+    with monkeypatch.context() as m:
+        m.setattr(columnar.os, "replace", crash)
+        with pytest.raises(SystemExit):
+            dhs.run_panel(["TG"])
+    df = columnar.read_parquet("dhs_pays", filters=[("country_code", "in", ["BJ", "TG"])], root=root)
+    assert len(df) == 3 * (2 * len(dhs.INDICATOR_IDS) - 1)
+    assert df.loc[df["country_code"] == "BJ", "valeur"].min() >= 20
+
+
+def test_to_departement_maps_current_names_aliases_and_unknown_labels():
+    from commun.departements import to_departement
+
+    labels = pd.Series(["..Ouémé", "Atacora", "Couffo", "LITTORAL", "Atacora/Donga", None, "Zou"])
+    departements = to_departement(labels)
+    assert departements.tolist()[:4] == ["Ouémé", "Atakora", "Kouffo", "Littoral"]
+    assert departements.iloc[4:6].isna().all()
+    assert departements.iloc[6] == "Zou"
+    assert list(departements.cat.categories) == [
+        "Alibori", "Atakora", "Atlantique", "Borgou", "Collines", "Donga",
+        "Kouffo", "Littoral", "Mono", "Ouémé", "Plateau", "Zou",
+    ]
+
+
+def _subnational_payload():
+    rows = [
+        # Départements actuels (2006, 2018), dont deux lignes pour le même département et la même année
+        ("HC_ELEC_H_ELC", 2018, 40.0, 1, "Region", "..Ouémé"),
+        ("HC_ELEC_H_ELC", 2018, 42.0, 1, "Region", "Oueme"),
+        ("HC_ELEC_H_ELC", 2006, 20.0, 1, "Region", "Atacora"),
+        ("ED_LITR_W_LIT", 2018, 30.0, 1, "Region", "Atacora"),
+        # Anciens départements regroupés, libellé manquant, valeur non préférée, enquête antérieure, autre ventilation
+        ("HC_ELEC_H_ELC", 2006, 25.0, 1, "Region", "Atacora/Donga"),
+        ("HC_ELEC_H_ELC", 2018, 99.0, 1, "Region", None),
+        ("HC_ELEC_H_ELC", 2018, 99.0, 0, "Region", "Zou"),
+        ("HC_ELEC_H_ELC", 2001, 99.0, 1, "Region", "Zou"),
+        ("HC_ELEC_H_ELC", 2018, 99.0, 1, "Residence", "Urban"),
+    ]
+    df = pd.DataFrame(rows, columns=["IndicatorId", "SurveyYear", "Value", "IsPreferred",
+                                     "CharacteristicCategory", "CharacteristicLabel"])
+    # Types produits par commun/dhs_stream.py
+    return df.astype({"IndicatorId": "category", "CharacteristicCategory": "category",
+                      "CharacteristicLabel": "category"})
+
+
+def test_subnational_pivot(dhs, monkeypatch, capsys):
+    monkeypatch.setattr(dhs, "fetch_dhs_data", lambda *args, **kwargs: _subnational_payload())
+    dhs.run_subnational()
+
+    # Libellé nul exclu de la liste (il ne se compare pas à du texte), ventilation « Residence » ignorée
+    assert "AVERTISSEMENT: Régions DHS non reconnues, ignorées : Atacora/Donga\n" in capsys.readouterr().out
+    df = pd.read_csv(dhs.OUTPUT_SUBNATIONAL_CSV_PATH, encoding="utf-8-sig")
+    assert list(df.columns) == ["departement", "annee", "pct_alphab_femmes", "pct_menages_electricite"]
+    assert df[["departement", "annee"]].values.tolist() == [["Atakora", 2006], ["Atakora", 2018], ["Ouémé", 2018]]
+    assert df["pct_menages_electricite"].tolist()[0] == 20.0
+    assert df["pct_menages_electricite"].tolist()[2] == 41.0
+    assert pd.isna(df["pct_menages_electricite"].tolist()[1])
+    assert df["pct_alphab_femmes"].tolist()[1] == 30.0
+
+
+def test_subnational_error_payload_exits_with_message(dhs, monkeypatch, capsys):
+    def error_payload(*args, **kwargs):
+        raise ValueError("Réponse d'erreur de l'API DHS : Invalid indicator")
+
+    monkeypatch.setattr(dhs, "fetch_dhs_data", error_payload)
+    with pytest.raises(SystemExit) as excinfo:
+        dhs.run_subnational()
+    assert excinfo.value.code == 1
+    assert "ERREUR: La requête à l'API a échoué." in capsys.readouterr().out
@@ -0,0 +1,55 @@
+# ==============================================================================
+# TESTS : ANALYSE INCRÉMENTALE DES RÉPONSES DHS (commun/dhs_stream.py)
+# Les résultats sont comparés à ceux de json + pandas sur la même réponse.
+# ==============================================================================
+
+import json
+
+import pandas as pd
+import pytest
+
+from commun import dhs_stream
+
+RECORDS = [
+    {"Indicator": "Taux de fécondité", "CharacteristicLabel": "Total", "SurveyYear": 2018, "Value": 12.0,
+     "IsPreferred": 1, "DenominatorWeighted": None},
+    {"Indicator": "Taux de fécondité", "CharacteristicLabel": "Alibori", "SurveyYear": 2018, "Value": 5.5,
+     "IsPreferred": 1, "DenominatorWeighted": 120.0},
+    {"Indicator": "Âge médian", "CharacteristicLabel": None, "SurveyYear": 2011, "Value": 19.0,
+     "IsPreferred": 0, "DenominatorWeighted": 87.25},
+]
+
+
+def _chunks(payload, size):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_parse_payload_matches_json(chunk_size):
+    payload = {"RecordsReturned": 3, "TotalPages": 2, "Page": 1, "Data": RECORDS}
+    meta, frame = dhs_stream.parse_payload(_chunks(payload, chunk_size))
+    assert meta == {"RecordsReturned": 3, "TotalPages": 2, "Page": 1}
+
+    expected = pd.DataFrame(RECORDS)
+    assert list(frame.columns) == list(expected.columns)
+    for column in ("Indicator", "CharacteristicLabel"):
+        assert isinstance(frame[column].dtype, pd.CategoricalDtype)
+        assert frame[column].astype(object).where(frame[column].notna(), None).tolist() == [r[column] for r in RECORDS]
+    assert pd.api.types.is_integer_dtype(frame["SurveyYear"])
+    assert frame["SurveyYear"].tolist() == [2018, 2018, 2011]
+
+
+def test_whole_float_values_stay_float():
+    # Une page dont toutes les valeurs sont entières (12.0, 19.0) garde des flottants
+    records = [dict(RECORDS[0]), dict(RECORDS[2])]
+    _, frame = dhs_stream.parse_payload(_chunks({"TotalPages": 1, "Data": records}, 5))
+    assert frame["Value"].dtype == "float64"
+    assert frame["Value"].tolist() == [12.0, 19.0]
+    assert pd.api.types.is_integer_dtype(frame["IsPreferred"])
+
+
+def test_error_payload_returns_no_frame():
+    meta, frame = dhs_stream.parse_payload(_chunks({"error": "Invalid indicator"}, 4))
+    assert frame is None
+    assert meta == {"error": "Invalid indicator"}
@@ -0,0 +1,98 @@
+# ==============================================================================
+# TESTS : TÉLÉCHARGEMENT REPRENABLE (commun/downloader.py)
+# Serveur HTTP local acceptant les requêtes Range, qui annonce Content-MD5 et
+# peut couper la connexion au milieu d'un transfert.
+# ==============================================================================
+
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from commun import downloader
+
+CONTENT = bytes(range(256)) * 4096  # 1 Mo
+ETAG = '"v1"'
+# Blocs plus petits que la moitié du fichier : la partie reçue avant la coupure est conservée
+CHUNK = 64 * 1024
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    drops = 0
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(CONTENT)))
+        self.end_headers()
+
+    def do_GET(self):
+        start = 0
+        range_header = self.headers.get("Range")
+        type(self).requests.append(range_header)
+        if range_header and self.headers.get("If-Range") in (None, ETAG):
+            start = int(range_header.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}")
+        else:
+            self.send_response(200)
+            self.send_header("Content-MD5", base64.b64encode(hashlib.md5(CONTENT).digest()).decode("ascii"))
+        self.send_header("Content-Length", str(len(CONTENT) - start))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        if type(self).drops:
+            type(self).drops -= 1
+            self.wfile.write(CONTENT[start:start + (len(CONTENT) - start) // 2])
+            self.wfile.flush()
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(CONTENT[start:])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(downloader, "RETRY_DELAY_S", 0)
+    RangeHandler.drops, RangeHandler.requests = 0, []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/ben_ppp_2020.tif"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    RangeHandler.drops = 1
+    dest = tmp_path / "ben_ppp_2020.tif"
+    assert downloader.download_file(server, str(dest), chunk_size=CHUNK) == downloader.RESUMED
+    assert dest.read_bytes() == CONTENT
+    assert RangeHandler.requests == [None, f"bytes={len(CONTENT) // 2}-"]
+    assert not (tmp_path / "ben_ppp_2020.tif.part").exists()
+
+    entry = downloader.Manifest(str(tmp_path)).get("ben_ppp_2020.tif")
+    assert entry["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert entry["content_md5"] is not None
+    # Fichier complet et conforme au manifeste : aucune requête
+    assert downloader.download_file(server, str(dest), chunk_size=CHUNK) == downloader.UP_TO_DATE
+    assert len(RangeHandler.requests) == 2
+
+
+def test_resumed_file_is_checked_against_first_content_md5(server, tmp_path):
+    RangeHandler.drops = 1
+    dest = tmp_path / "ben_ppp_2020.tif"
+    with pytest.raises(Exception):
+        downloader.download_file(server, str(dest), chunk_size=CHUNK, max_attempts=1)
+    part = tmp_path / "ben_ppp_2020.tif.part"
+    corrupted = bytearray(part.read_bytes())
+    corrupted[10] ^= 0xFF
+    part.write_bytes(bytes(corrupted))
+
+    # La reprise produit un fichier dont le MD5 diffère : nouveau téléchargement complet, qui n'est pas une reprise
+    assert downloader.download_file(server, str(dest), chunk_size=CHUNK) == downloader.DOWNLOADED
+    assert dest.read_bytes() == CONTENT
+    assert RangeHandler.requests[1:] == [f"bytes={len(CONTENT) // 2}-", None]
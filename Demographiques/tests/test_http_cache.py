@@ -0,0 +1,74 @@
+# ==============================================================================
+# TESTS : CACHE HTTP PARTAGÉ (commun/http_cache.py)
+# ==============================================================================
+
+import json
+
+from commun.http_cache import HttpCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self._body
+
+
+class FakeSession:
+    """Sert `contents[url]` avec un ETag ; répond 304 si `always_304` ou si l'ETag est connu."""
+
+    def __init__(self, contents, always_304=False):
+        self.contents = contents
+        self.always_304 = always_304
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.requests.append(dict(headers or {}))
+        etag = f'"{len(self.contents[url])}"'
+        if self.always_304 or (headers or {}).get("If-None-Match") == etag:
+            self.always_304 = False
+            return FakeResponse(304)
+        return FakeResponse(200, self.contents[url], {"ETag": etag})
+
+
+def test_concurrent_instances_keep_each_others_entries(tmp_path):
+    contents = {"http://a": b"contenu A", "http://b": b"contenu B plus long"}
+    # Deux instances ouvertes avant toute écriture, comme deux étapes parallèles du pipeline
+    first = HttpCache(str(tmp_path), session=FakeSession(contents))
+    second = HttpCache(str(tmp_path), session=FakeSession(contents))
+    first.fetch("http://a")
+    second.fetch("http://b")
+
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert sorted(index["entries"]) == ["http://a", "http://b"]
+
+
+def test_304_without_entry_refetches_unconditionally(tmp_path):
+    contents = {"http://a": b"contenu A"}
+    session = FakeSession(contents, always_304=True)
+    cache = HttpCache(str(tmp_path), session=session)
+    with open(cache.fetch("http://a"), "rb") as f:
+        assert f.read() == b"contenu A"
+    assert session.requests == [{}, {}]
+
+
+def test_materialize_links_blob(tmp_path):
+    contents = {"http://a": b"contenu A"}
+    cache = HttpCache(str(tmp_path / "cache"), session=FakeSession(contents))
+    dest = tmp_path / "a.zip"
+    cache.materialize("http://a", str(dest))
+    cache.materialize("http://a", str(dest))
+    assert dest.read_bytes() == b"contenu A"
+    assert cache.hits == 1 and cache.misses == 1
@@ -0,0 +1,27 @@
+# ==============================================================================
+# TESTS : RAPPORT D'EXÉCUTION (commun/metrics.py)
+# Plusieurs scripts lancés dans le même processus (interface unifiée) : un
+# seul gestionnaire de sortie, un rapport par exécution, jamais deux fois.
+# ==============================================================================
+
+from commun import metrics
+
+
+def test_runs_in_one_process_each_get_one_report(tmp_path, monkeypatch, capsys):
+    registered = []
+    monkeypatch.setattr(metrics.atexit, "register", registered.append)
+    monkeypatch.setattr(metrics, "_EXIT_HOOK_REGISTERED", False)
+    monkeypatch.setattr(metrics, "_RUN", None)
+
+    metrics.start_run("wpp_chargement", report_dir=str(tmp_path))
+    metrics.add("rows_in", 3)
+    # Le script suivant démarre son exécution : la précédente est clôturée et écrite
+    metrics.start_run("wpp_nettoyage", report_dir=str(tmp_path))
+    assert [p.name.split("_2")[0] for p in tmp_path.iterdir()] == ["wpp_chargement"]
+    metrics.finish_run()
+    metrics.finish_run()
+
+    assert registered == [metrics.finish_run]
+    assert sorted(p.name.split("_2")[0] for p in tmp_path.iterdir()) == ["wpp_chargement", "wpp_nettoyage"]
+    assert capsys.readouterr().out.count("--- Métriques de l'exécution") == 2
+    assert metrics.current_run() is None
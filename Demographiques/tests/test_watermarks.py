@@ -0,0 +1,38 @@
+# ==============================================================================
+# TESTS : RAFRAÎCHISSEMENT INCRÉMENTAL (commun/watermarks.py)
+# Un rafraîchissement incrémental doit donner le même fichier qu'une
+# consolidation complète, y compris quand la source retire des valeurs.
+# ==============================================================================
+
+import numpy as np
+import pandas as pd
+
+from commun.consolidation import consolidate
+from commun.watermarks import upsert
+
+
+def _frame(name, values):
+    return pd.DataFrame({"annee": list(values), name: list(values.values())})
+
+
+def test_upsert_matches_full_consolidation_when_values_are_withdrawn():
+    scolarisation = _frame("scolarisation", {2000: 80.0, 2001: 82.0})
+    alphabetisation_v1 = _frame("alphabetisation", {1999: 40.0, 2000: 41.0, 2001: 42.0})
+    df_existing = consolidate([scolarisation, alphabetisation_v1])
+
+    # La source retire 1999 (seule année de cette ligne) et révise 2001 ; 2002 est nouvelle
+    alphabetisation_v2 = _frame("alphabetisation", {2000: 41.0, 2001: 43.5, 2002: 44.0})
+    merged, n_changed = upsert(df_existing, consolidate([alphabetisation_v2]))
+
+    pd.testing.assert_frame_equal(merged, consolidate([scolarisation, alphabetisation_v2]))
+    assert n_changed == 3
+
+
+def test_upsert_keeps_other_columns_and_appends_new_ones():
+    df_existing = consolidate([_frame("scolarisation", {2000: 80.0, 2001: 82.0})])
+    merged, n_changed = upsert(df_existing, consolidate([_frame("depenses", {2001: 4.5})]))
+
+    assert list(merged.columns) == ["annee", "scolarisation", "depenses"]
+    assert merged["scolarisation"].tolist() == [80.0, 82.0]
+    assert np.isnan(merged["depenses"].iloc[0]) and merged["depenses"].iloc[1] == 4.5
+    assert n_changed == 1
@@ -0,0 +1,79 @@
+# ==============================================================================
+# TESTS : CLIENT JSON DE L'API DE LA BANQUE MONDIALE (commun/wb_api.py)
+# Session HTTP factice rejouant, page par page et dans l'ordre de l'API
+# (années décroissantes), le même tableau que le fichier ZIP.
+# ==============================================================================
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from commun import wb_api, wb_reader
+
+INDICATOR = "SE.PRM.ENRR"
+# Tableau « large » tel qu'il figure dans le CSV du ZIP
+WIDE = pd.DataFrame({
+    "Country Name": ["Benin", "Togo"],
+    "Country Code": ["BEN", "TGO"],
+    "2000": [80.5, np.nan],
+    "2001": [82.25, 101.0],
+    "2002": [np.nan, 103.5],
+})
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ReplaySession:
+    """Sert les observations de WIDE, `per_page` par page ; `error` simule une réponse d'erreur."""
+
+    def __init__(self, error=False):
+        self.error = error
+        self.pages = []
+        years = [c for c in WIDE.columns if c.isdigit()]
+        iso2 = {"BEN": "BJ", "TGO": "TG"}
+        self.records = [
+            {
+                "indicator": {"id": INDICATOR, "value": "School enrollment"},
+                "country": {"id": iso2[row["Country Code"]], "value": row["Country Name"]},
+                "countryiso3code": row["Country Code"],
+                "date": year,
+                "value": None if pd.isna(row[year]) else row[year],
+            }
+            for _, row in WIDE.iterrows()
+            for year in reversed(years)
+        ]
+
+    def get(self, url, params=None, timeout=None):
+        if self.error:
+            return FakeResponse([{"message": [{"id": "120", "value": "Invalid value"}]}])
+        page, per_page = params["page"], params["per_page"]
+        self.pages.append(page)
+        pages = -(-len(self.records) // per_page)
+        meta = {"page": page, "pages": pages, "per_page": per_page, "total": len(self.records)}
+        return FakeResponse([meta, self.records[(page - 1) * per_page:page * per_page]])
+
+
+def test_api_panel_matches_zip_panel(monkeypatch):
+    monkeypatch.setattr(wb_api, "PER_PAGE", 4)
+    session = ReplaySession()
+    df_api = wb_api.fetch_api_panel([INDICATOR], ["BJ", "TG"], date_range=(2000, 2002), session=session)
+    assert session.pages == [1, 2]
+
+    expected = wb_reader.to_long_panel(WIDE, INDICATOR)
+    pd.testing.assert_frame_equal(df_api, expected)
+
+
+def test_api_error_payload_raises():
+    with pytest.raises(ValueError):
+        wb_api.fetch_api_panel([INDICATOR], ["BJ"], session=ReplaySession(error=True))
@@ -0,0 +1,138 @@
+# ==============================================================================
+# TESTS : LECTURE DU CLASSEUR WPP (commun/wpp_reader.py)
+# Classeur synthétique au format WPP : une ligne de titre (Label/Separator)
+# dont les valeurs sont le marqueur '...', puis les lignes de deux pays.
+# ==============================================================================
+
+import pandas as pd
+import pytest
+
+from commun import wpp_reader
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("pyarrow")
+
+HEADER = 2
+NAME, YEAR, POPULATION, DENSITY, LIFE = (
+    "Region, subregion, country or area *",
+    "Year",
+    "Total Population, as of 1 July (thousands)",
+    "Population Density, as of 1 July (persons per square km)",
+    "Life Expectancy at Birth, both sexes (years)",
+)
+COLUMNS = ["Index", "Variant", NAME, "Notes", "Location code", "ISO3 Alpha-code", "Type", YEAR,
+           POPULATION, DENSITY, LIFE]
+ROWS = [
+    [1, "Estimates", "UN development groups", None, 1803, None, "Label/Separator", None, "...", "...", "..."],
+    [2, "Estimates", "Benin", None, 204, "BEN", "Country/Area", 1950, 2255.225, 20.0, 36.5],
+    [3, "Estimates", "Benin", "a", 204, "BEN", "Country/Area", 1951, 2297.813, 20.4, 37.25],
+    [4, "Estimates", "Togo", None, 768, "TGO", "Country/Area", 1950, 1395.0, 25.6, 38.1],
+    [5, "Estimates", "Togo", 3, 768, "TGO", "Country/Area", 1951, 1420.5, 26.1, 38.4],
+]
+KEPT = [NAME, YEAR, POPULATION, DENSITY, LIFE]
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Estimates"
+    sheet.append(["United Nations"])
+    sheet.append(["World Population Prospects 2024"])
+    sheet.append(COLUMNS)
+    for row in ROWS:
+        sheet.append(row)
+    path = tmp_path / "wpp.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+def test_placeholders_become_missing_values_in_sheet_cache(workbook, tmp_path):
+    df = wpp_reader.load_sheet(workbook, "Estimates", HEADER, cache_dir=str(tmp_path / "cache"))
+    for column in (POPULATION, DENSITY, LIFE):
+        assert pd.api.types.is_float_dtype(df[column])
+    assert df[POPULATION].isna().sum() == 1
+    # Colonne de vrai texte mêlé à des nombres : convertie en texte
+    assert df["Notes"].dropna().tolist() == ["a", "3"]
+
+
+def test_cached_and_streamed_paths_agree(workbook, tmp_path):
+    filters = [(NAME, "==", "Benin")]
+    cached = wpp_reader.load_sheet(workbook, "Estimates", HEADER, columns=KEPT, filters=filters,
+                                   cache_dir=str(tmp_path / "complet"))
+    streamed = wpp_reader.load_sheet(workbook, "Estimates", HEADER, columns=KEPT, filters=filters, stream=True,
+                                     cache_dir=str(tmp_path / "flux"))
+    # Le second appel en flux relit la sélection mise en cache
+    streamed_again = wpp_reader.load_sheet(workbook, "Estimates", HEADER, columns=KEPT, filters=filters,
+                                           stream=True, cache_dir=str(tmp_path / "flux"))
+
+    for df in (cached, streamed, streamed_again):
+        assert pd.api.types.is_float_dtype(df[POPULATION])
+    # L'année peut être flottante dans la feuille complète (lignes de titre sans année)
+    pd.testing.assert_frame_equal(cached.reset_index(drop=True), streamed, check_dtype=False)
+    pd.testing.assert_frame_equal(streamed, streamed_again, check_dtype=False)
+    assert streamed[POPULATION].tolist() == [2255.225, 2297.813]
+
+
+def test_location_store_skips_separators_and_feeds_clean(workbook, tmp_path):
+    import importlib.util
+    import os
+
+    store_dir = str(tmp_path / "magasin")
+    index, rebuilt = wpp_reader.build_location_store(workbook, HEADER, ["Estimates"], store_dir=store_dir,
+                                                     max_workers=1, cache_dir=str(tmp_path / "cache"))
+    assert rebuilt
+    assert sorted(index["locations"]) == ["BEN", "TGO"]
+    assert "1803" not in index["aliases"].values()
+
+    df = wpp_reader.read_locations(["BEN", "Togo"], columns=KEPT, variants=["estimations"], store_dir=store_dir)
+    assert len(df) == 4
+    assert pd.api.types.is_float_dtype(df[POPULATION])
+
+    # Le nettoyage du script 5 (mode --pays) s'applique tel quel aux lignes du magasin
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                          "WPP2024_GEN_F01_DEMOGRAPHIC_INDICATORS_FULL", "2_clean_un_data.py")
+    spec = importlib.util.spec_from_file_location("clean_un_data", script)
+    clean_un_data = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(clean_un_data)
+    df_cleaned = clean_un_data.clean(df, projections=False)
+    assert df_cleaned["population_nationale_un"].tolist() == [2255225, 2297813, 1395000, 1420500]
+
+
+def test_worker_sheet_metrics_reach_the_parent_run(workbook, tmp_path, monkeypatch):
+    from commun import metrics
+
+    run = metrics.RunReport("wpp_chargement")
+    monkeypatch.setattr(metrics, "_RUN", run)
+    with run.stage("chargement"):
+        df = wpp_reader.load_variants(workbook, ["Estimates"], HEADER, columns=KEPT, filters=[(NAME, "==", "Benin")],
+                                      max_workers=1, cache_dir=str(tmp_path / "cache"))
+    assert len(df) == 2
+    counters = run.stages["chargement"]["counters"]
+    assert (counters["cache_misses"], counters["rows_in"], counters["rows_out"]) == (1, 5, 2)
+    assert counters["parse_s"] > 0
+    assert [t["label"] for t in run.stages["chargement"]["timings"]] == ["feuille"]
+    assert any("Lecture en flux de la feuille 'Estimates'" in e["message"] for e in run.events)
+
+
+def test_projections_are_stitched_per_country(capsys):
+    rows = [("BEN", "estimations", year) for year in (2021, 2022, 2023)]
+    # Estimations du Togo arrêtées en 2021 ; le Niger n'a que des projections
+    rows += [("TGO", "estimations", year) for year in (2020, 2021)]
+    rows += [(country, "moyenne", year) for country in ("BEN", "TGO", "NER") for year in (2022, 2023, 2024, 2025)]
+    df = pd.DataFrame(rows, columns=["pays", "variante", "annee"])
+    df["variante"] = df["variante"].astype(pd.CategoricalDtype(["estimations", "moyenne"]))
+
+    df_stitched = wpp_reader.stitch_series(df, "annee", group_columns=["pays"])
+    years = df_stitched.groupby("pays")["annee"].apply(list).to_dict()
+    assert years == {"BEN": [2021, 2022, 2023, 2024, 2025], "NER": [2022, 2023, 2024, 2025],
+                     "TGO": [2020, 2021, 2022, 2023, 2024, 2025]}
+    assert capsys.readouterr().out == ""
+
+    # Projections du Togo commençant en 2024 : trou signalé pour ce pays seulement
+    df_gap = df[~((df["pays"] == "TGO") & (df["variante"] == "moyenne") & (df["annee"] < 2024))]
+    wpp_reader.stitch_series(df_gap, "annee", group_columns=["pays"])
+    assert capsys.readouterr().out == ("AVERTISSEMENT: Années manquantes pour 'TGO' entre les estimations (2021) "
+                                       "et la variante 'moyenne' (2024).\n")
@@ -0,0 +1,167 @@
+# ==============================================================================
+# TÂCHE 1 : EXÉCUTION GROUPÉE DES INDICATEURS DE LA BANQUE MONDIALE (C_1 À C_6)
+# Projet : ANIP AI/Data Challenge 2025
+# Objectif : Exécuter dans un seul processus le flux téléchargement ->
+#            lecture -> format long -> sauvegarde des scripts C_1 à C_6, à
+#            partir du registre déclaratif `wb_indicators.json`. Les imports,
+#            la session HTTP (keep-alive) et le cache sont partagés, et les
+#            indicateurs sont traités en parallèle. Les fichiers nettoyés sont
+#            identiques octet pour octet à ceux des scripts C_*.
+# Utilisation : python wb_runner.py [--data-dir DOSSIER] [--workers N] [--only C_1 C_3]
+# Source : Banque Mondiale (https://api.worldbank.org/v2/en/indicator/<code>?downloadformat=csv)
+# ==============================================================================
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from commun import metrics
+from commun.columnar import save_dataset
+from commun.http_cache import HttpCache, create_session
+from commun.watermarks import Watermarks, file_fingerprint
+from commun.wb_reader import find_data_member, read_wb_csv, to_long_panel
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_PATH = os.path.join(BASE_DIR, "wb_indicators.json")
+WB_URL = "https://api.worldbank.org/v2/en/indicator/{code}?downloadformat=csv"
+COUNTRY_NAME = "Benin"
+MAX_WORKERS = 6
+
+
+def load_registry(path=REGISTRY_PATH):
+    """Charge la liste des indicateurs à produire (voir `wb_indicators.json`)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def spec_dirs(spec, data_dir=None):
+    """
+    Dossiers raw/cleaned d'un indicateur : `<data_dir>/raw` et `<data_dir>/cleaned`
+    si `data_dir` est fourni, sinon `<dossier>/content/data/...` comme dans le dépôt.
+    """
+    base = data_dir or os.path.join(BASE_DIR, spec["dossier"], "content", "data")
+    return os.path.join(base, "raw"), os.path.join(base, "cleaned")
+
+
+def spec_fingerprint(zip_path, spec):
+    """Empreinte du ZIP source, de ce script et de la spécification de l'indicateur."""
+    payload = file_fingerprint(zip_path, os.path.abspath(__file__)) + json.dumps(spec, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def process_spec(spec, cache, data_dir=None, watermarks=None):
+    """
+    Produit le fichier nettoyé d'un indicateur (équivalent des étapes 1 à 8
+    d'un script C_*). Renvoie un statut : "ok", "à jour" ou "échec".
+    """
+    code, value_name = spec["indicator_code"], spec["value_name"]
+    raw_dir, cleaned_dir = spec_dirs(spec, data_dir)
+    output_path = os.path.join(cleaned_dir, spec["output_file"])
+    try:
+        # Étape 1: Téléchargement via le cache partagé (304 si inchangé)
+        zip_path = os.path.join(raw_dir, spec["zip_file"])
+        cache.materialize(WB_URL.format(code=code), zip_path)
+
+        fingerprint = spec_fingerprint(zip_path, spec)
+        key = spec["output_file"]
+        if watermarks is not None and os.path.exists(output_path) and watermarks.is_current(key, fingerprint):
+            metrics.log(f"[{spec['dossier']}] {code} : source inchangée, '{output_path}' est déjà à jour.")
+            return "à jour"
+
+        # Étapes 2-4: Lecture en flux de la ligne du Bénin et des années demandées
+        first_year, last_year = spec["years"]
+        years = [str(year) for year in range(first_year, last_year + 1)]
+        df_wide = read_wb_csv(zip_path, find_data_member(zip_path, code), countries=[COUNTRY_NAME], years=years)
+        if df_wide.empty:
+            raise ValueError(f"Aucune donnée trouvée pour {COUNTRY_NAME}.")
+
+        # Étapes 5-7: Format long vectorisé et suppression des valeurs manquantes
+        df_long = to_long_panel(df_wide, code)
+        country_names = dict(zip(df_wide["Country Code"], df_wide["Country Name"]))
+        df_final = pd.DataFrame({
+            "Country Name": df_long["country_code"].map(country_names),
+            "Country Code": df_long["country_code"],
+            "Année": df_long["annee"],
+            value_name: df_long["valeur"],
+        })
+
+        # Étape 8: Sauvegarde (CSV et/ou Parquet)
+        save_dataset(df_final, output_path, "world_bank", df_long, ["country_code"],
+                     index=False, encoding="utf-8")
+        if watermarks is not None:
+            watermarks.update(key, fingerprint, df_final["Année"].max())
+
+    except (requests.exceptions.RequestException, zipfile.BadZipFile, FileNotFoundError, ValueError) as e:
+        metrics.log(f"[{spec['dossier']}] ERREUR: Traitement échoué pour {code}. Détails: {e}")
+        return "échec"
+
+    metrics.log(f"[{spec['dossier']}] {code} : {len(df_final)} observations "
+          f"({df_final['Année'].min()}-{df_final['Année'].max()}) -> '{output_path}'")
+    return "ok"
+
+
+def run_registry(specs, data_dir=None, max_workers=MAX_WORKERS):
+    """
+    Traite tous les indicateurs du registre en parallèle, sur une session HTTP
+    et un cache partagés. Renvoie {dossier: statut}.
+    """
+    # Un fichier de filigranes par dossier de sortie, sauvegardé une fois tous les traitements terminés
+    watermarks = {}
+    for spec in specs:
+        raw_dir, cleaned_dir = spec_dirs(spec, data_dir)
+        os.makedirs(raw_dir, exist_ok=True)
+        os.makedirs(cleaned_dir, exist_ok=True)
+        if cleaned_dir not in watermarks:
+            watermarks[cleaned_dir] = Watermarks(os.path.join(cleaned_dir, "watermarks.json"))
+
+    def run(spec):
+        # Une étape du rapport d'exécution par indicateur
+        with metrics.stage(spec["dossier"]):
+            return process_spec(spec, cache, data_dir, watermarks[spec_dirs(spec, data_dir)[1]])
+
+    max_workers = max(1, min(max_workers, len(specs)))
+    with create_session(max_workers) as session:
+        cache = HttpCache(session=session)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            statuses = list(executor.map(run, specs))
+
+    for marks in watermarks.values():
+        marks.save()
+    return {spec["dossier"]: status for spec, status in zip(specs, statuses)}
+
+
+def main(argv=None, prog=None):
+    """Point d'entrée en ligne de commande ; renvoie le code de sortie."""
+    parser = argparse.ArgumentParser(prog=prog, description="Exécution groupée des indicateurs C_1 à C_6 de la Banque Mondiale.")
+    parser.add_argument("--registry", default=REGISTRY_PATH, help="Registre JSON des indicateurs")
+    parser.add_argument("--data-dir", help="Dossier commun contenant raw/ et cleaned/ (ex. /content/data). "
+                                           "Par défaut : <dossier>/content/data de chaque indicateur.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Nombre de traitements simultanés")
+    parser.add_argument("--only", nargs="+", metavar="DOSSIER", help="Ne traiter que ces dossiers (ex. C_1 C_3)")
+    args = parser.parse_args(argv)
+
+    metrics.start_run("wb_runner")
+    specs = load_registry(args.registry)
+    if args.only:
+        specs = [spec for spec in specs if spec["dossier"] in args.only]
+
+    metrics.log(f"Exécution groupée de {len(specs)} indicateur(s) de la Banque Mondiale...")
+    statuses = run_registry(specs, data_dir=args.data_dir, max_workers=args.workers)
+
+    failed = [dossier for dossier, status in statuses.items() if status == "échec"]
+    metrics.log(f"\nTerminé : {len(statuses) - len(failed)} indicateur(s) à jour, {len(failed)} échec(s).")
+    return 1 if failed else 0
+
+
+# --- SCRIPT PRINCIPAL ---
+if __name__ == "__main__":
+    sys.exit(main())